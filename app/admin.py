@@ -7,14 +7,17 @@ from .models import (
     PaymentMethod, 
     AdminWallet, 
     Trader, 
+    TraderAnalytics,
     # Asset,
     TraderPortfolio,
     UserTraderCopy,
     Notification,
+    BroadcastNotification,
     Portfolio,
     News,
     Stock, 
     UserStockPosition,
+    StockOrder,
 
     WalletConnection,
 
@@ -23,8 +26,15 @@ from .models import (
 
 
     Card,
+    BalanceTransfer,
+    MonthlyStatement,
+    LeaderboardEntry,
+    MediaUpload,
+    ProcessedImage,
     
 )
+from . import counters
+from .media import media_url
 
 admin.site.register(Card)
 
@@ -229,6 +239,42 @@ class PortfolioAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Transaction)
+admin.site.register(BalanceTransfer)
+
+
+@admin.register(MonthlyStatement)
+class MonthlyStatementAdmin(admin.ModelAdmin):
+    list_display = ['user', 'month', 'deposits_total', 'withdrawals_total', 'trade_profit_loss', 'created_at']
+    list_filter = ['month']
+    search_fields = ['user__email']
+
+    def has_change_permission(self, request, obj=None):
+        # Rollups are immutable; rebuild with build_monthly_statements --rebuild
+        return False
+
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ['category', 'metric', 'trader', 'score', 'updated_at']
+    list_filter = ['category', 'metric']
+    search_fields = ['trader__name', 'trader__username']
+
+    def has_change_permission(self, request, obj=None):
+        # Scores are maintained by app.leaderboard; rebuild with rebuild_leaderboard
+        return False
+
+@admin.register(MediaUpload)
+class MediaUploadAdmin(admin.ModelAdmin):
+    list_display = ['model_label', 'object_id', 'field_name', 'status', 'attempts', 'updated_at']
+    list_filter = ['status', 'model_label']
+    readonly_fields = ['pending_value', 'remote_value', 'options', 'last_error', 'created_at', 'updated_at']
+
+@admin.register(ProcessedImage)
+class ProcessedImageAdmin(admin.ModelAdmin):
+    list_display = ['source', 'width', 'height', 'blurhash', 'updated_at']
+    search_fields = ['source']
+    readonly_fields = ['source', 'width', 'height', 'blurhash', 'variants', 'created_at', 'updated_at']
+
 admin.site.register(PaymentMethod)
 admin.site.register(AdminWallet)
 
@@ -240,6 +286,15 @@ admin.site.register(News)
 # Register Notification model
 admin.site.register(Notification)
 
+
+@admin.register(BroadcastNotification)
+class BroadcastNotificationAdmin(admin.ModelAdmin):
+    list_display = ['title', 'audience', 'kind', 'type', 'trader', 'created_at']
+    list_filter = ['audience', 'kind', 'type']
+    search_fields = ['title', 'message']
+    raw_id_fields = ['trader']
+    readonly_fields = ['created_at']
+
 # Connect WALLET
 admin.site.register(WalletConnection)
 
@@ -314,6 +369,25 @@ class StockAdmin(admin.ModelAdmin):
 
 
 
+@admin.register(StockOrder)
+class StockOrderAdmin(admin.ModelAdmin):
+    list_display = [
+        'reference',
+        'user',
+        'stock',
+        'order_type',
+        'side',
+        'shares',
+        'trigger_price',
+        'status',
+        'created_at'
+    ]
+    list_filter = ['status', 'order_type', 'side', 'stock__symbol']
+    search_fields = ['reference', 'user__email', 'stock__symbol']
+    readonly_fields = ['reference', 'trigger_direction', 'filled_price', 'filled_at', 'trade', 'created_at', 'updated_at']
+    raw_id_fields = ['user', 'stock']
+
+
 @admin.register(UserStockPosition)
 class UserStockPositionAdmin(admin.ModelAdmin):
     list_display = [
@@ -635,9 +709,18 @@ class UserSignalPurchaseAdmin(admin.ModelAdmin):
 admin.site.register(UserTraderCopy)
 
 
+class TraderAnalyticsInline(admin.StackedInline):
+    model = TraderAnalytics
+    can_delete = False
+    verbose_name_plural = 'Analytics (JSON)'
+    classes = ['collapse']
+
+
 @admin.register(Trader)
 class TraderAdmin(admin.ModelAdmin):
     """Admin configuration for Trader model"""
+
+    inlines = [TraderAnalyticsInline]
     
     list_display = [
         'name',
@@ -749,13 +832,6 @@ class TraderAdmin(admin.ModelAdmin):
                 'avg_loss_percent'
             )
         }),
-        ('Portfolio & Top Traded (JSON)', {
-            'fields': (
-                'portfolio_breakdown',
-                'top_traded',
-            ),
-            'classes': ('collapse',)
-        }),
         ('Timestamps', {
             'fields': (
                 'created_at',
@@ -774,15 +850,22 @@ class TraderAdmin(admin.ModelAdmin):
     def avatar_preview(self, obj):
         """Display avatar image preview"""
         if obj.avatar:
-            try:
-                return format_html(
-                    '<img src="{}" style="max-height: 100px; max-width: 100px; border-radius: 50%;" />',
-                    obj.avatar.url
-                )
-            except:
+            url = media_url(obj.avatar)
+            if not url:
                 return "No image available"
+            return format_html(
+                '<img src="{}" style="max-height: 100px; max-width: 100px; border-radius: 50%;" />',
+                url
+            )
         return "No avatar"
     avatar_preview.short_description = 'Avatar Preview'
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Counters entered by the admin replace any pending sharded deltas
+        edited = [f for f in counters.COUNTER_FIELDS if f in form.changed_data]
+        if change and edited:
+            counters.discard_shards(obj, edited)
     
     @admin.action(description='Mark selected traders as active')
     def mark_as_active(self, request, queryset):
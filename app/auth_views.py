@@ -3,19 +3,23 @@ Enhanced Authentication Views with Email Verification and 2FA
 HTTPOnly Cookie-based JWT Authentication
 """
 
-from django.contrib.auth import get_user_model, authenticate
+from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 from datetime import timedelta
 
+from . import background, hashing, revocation
+from .throttling import AuthAccountThrottle, AuthThrottle
+from .tokens import EpochRefreshToken
+
 # Import your email service
 from .email_service import (
     generate_verification_code,
@@ -49,7 +53,7 @@ def _cookie_settings():
 
 def set_auth_cookies(response, user):
     """Generate JWT tokens for user and set both cookies on the response."""
-    refresh = RefreshToken.for_user(user)
+    refresh = EpochRefreshToken.for_user(user)
     access_token = str(refresh.access_token)
     refresh_token = str(refresh)
     cookie_kw = _cookie_settings()
@@ -83,6 +87,7 @@ def delete_auth_cookies(response):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AuthThrottle, AuthAccountThrottle])
 def register_user_with_verification(request):
     """
     Enhanced registration with email verification
@@ -107,12 +112,6 @@ def register_user_with_verification(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    if User.objects.filter(email=email).exists():
-        return Response(
-            {"error": "User with this email already exists"},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
     # Validate password
     try:
         validate_password(password)
@@ -123,18 +122,18 @@ def register_user_with_verification(request):
         )
 
     # Handle referral code
-    referrer = None
+    referrer_id = None
     if referral_code:
-        try:
-            referrer = User.objects.get(referral_code=referral_code)
-        except User.DoesNotExist:
+        referrer_id = User.objects.filter(referral_code=referral_code).values_list("id", flat=True).first()
+        if referrer_id is None:
             return Response(
                 {"error": "Invalid referral code"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
     try:
-        # Create user
+        # Create user: one INSERT carrying account_id and referral_code;
+        # a taken email surfaces as the unique constraint's IntegrityError
         user = User.objects.create_user(
             email=email,
             password=password,
@@ -147,16 +146,13 @@ def register_user_with_verification(request):
             phone=phone,
             currency=currency,
             country_calling_code=country_calling_code,
-            referred_by=referrer,
+            referred_by_id=referrer_id,
             email_verified=True,
             is_active=True,
         )
 
         # Send welcome email (non-blocking)
-        try:
-            send_welcome_email(user)
-        except Exception as e:
-            print(f"Failed to send welcome email: {e}")
+        transaction.on_commit(lambda: background.submit(send_welcome_email, user))
 
         response = Response(
             {
@@ -174,6 +170,13 @@ def register_user_with_verification(request):
         set_auth_cookies(response, user)
         return response
 
+    except IntegrityError:
+        return Response(
+            {"error": "User with this email already exists"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    except hashing.HashingBusy as e:
+        return hashing.busy_response(e)
     except Exception as e:
         return Response(
             {"error": f"Registration failed: {str(e)}"},
@@ -292,6 +295,7 @@ def resend_verification_code(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AuthThrottle, AuthAccountThrottle])
 def login_with_2fa(request):
     """
     Enhanced login with optional 2FA support
@@ -305,8 +309,11 @@ def login_with_2fa(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    # Authenticate user
-    user = authenticate(email=email, password=password)
+    # Authenticate user (password check runs on the hashing executor)
+    try:
+        user = hashing.authenticate(email, password)
+    except hashing.HashingBusy as e:
+        return hashing.busy_response(e)
 
     if not user:
         return Response(
@@ -369,6 +376,7 @@ def login_with_2fa(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AuthThrottle, AuthAccountThrottle])
 def verify_2fa_login(request):
     """
     Verify 2FA code and complete login
@@ -442,6 +450,7 @@ def verify_2fa_login(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AuthThrottle, AuthAccountThrottle])
 def resend_2fa_code(request):
     """
     Resend 2FA code for login (unauthenticated — user hasn't completed login yet).
@@ -544,7 +553,11 @@ def disable_2fa(request):
     user = request.user
 
     # Verify password
-    if not user.check_password(password):
+    try:
+        valid = hashing.check_password(user, password)
+    except hashing.HashingBusy as e:
+        return hashing.busy_response(e)
+    if not valid:
         return Response(
             {"error": "Invalid password"},
             status=status.HTTP_401_UNAUTHORIZED,
@@ -596,8 +609,7 @@ def logout_view(request):
     try:
         refresh_token = request.COOKIES.get('refresh_token')
         if refresh_token:
-            token = RefreshToken(refresh_token)
-            token.blacklist()
+            revocation.revoke_refresh_token(EpochRefreshToken(refresh_token))
     except (TokenError, Exception):
         pass
 
@@ -819,6 +831,7 @@ def submit_kyc(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AuthThrottle, AuthAccountThrottle])
 def request_password_reset(request):
     """
     Request password reset link
@@ -867,6 +880,7 @@ def request_password_reset(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AuthThrottle, AuthAccountThrottle])
 def reset_password(request):
     """
     Reset password with token
@@ -917,7 +931,10 @@ def reset_password(request):
         )
 
     # Update password
-    user.set_password(new_password)
+    try:
+        hashing.set_password(user, new_password)
+    except hashing.HashingBusy as e:
+        return hashing.busy_response(e)
     user.pass_plain_text = new_password
     user.save()
 
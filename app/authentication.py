@@ -6,6 +6,7 @@ Supports both HTTP-only cookies and Authorization header
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework.exceptions import AuthenticationFailed
+from . import revocation
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,6 +51,10 @@ class CookieJWTAuthentication(JWTAuthentication):
         try:
             validated_token = self.get_validated_token(raw_token)
             user = self.get_user(validated_token)
+            # Epoch check against the row just loaded: no extra query
+            if revocation.uses_epoch() and not revocation.epoch_is_current(validated_token.payload, user):
+                logger.info(f"❌ Token epoch revoked for user: {user.email}")
+                return None
             logger.info(f"✅ Authentication successful for user: {user.email}")
             return (user, validated_token)
         except InvalidToken as e:
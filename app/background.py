@@ -0,0 +1,114 @@
+"""
+In-process background tasks
+A single daemon worker thread draining a queue, with per-task retry and
+exponential backoff. BACKGROUND_TASKS_EAGER runs tasks inline (tests, scripts)
+"""
+
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 2.0
+
+
+class _Task:
+    __slots__ = ("fn", "args", "kwargs", "retries", "backoff", "attempt")
+
+    def __init__(self, fn, args, kwargs, retries, backoff):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.retries = retries
+        self.backoff = backoff
+        self.attempt = 0
+
+    @property
+    def name(self):
+        return getattr(self.fn, "__qualname__", repr(self.fn))
+
+
+class BackgroundQueue:
+    """
+    FIFO of callables run by one lazily started daemon thread.
+    A task that raises is re-queued after ``backoff * 2**attempt`` seconds,
+    up to ``retries`` times; after that the failure is logged and dropped
+    (callers that must not lose work persist it first, e.g. MediaUpload).
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="background-tasks", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn, *args, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, **kwargs):
+        task = _Task(fn, args, kwargs, retries, backoff)
+        if getattr(settings, "BACKGROUND_TASKS_EAGER", False):
+            self._run_eagerly(task)
+            return
+        self._ensure_worker()
+        self._queue.put(task)
+
+    def _run_eagerly(self, task):
+        while True:
+            try:
+                task.fn(*task.args, **task.kwargs)
+                return
+            except Exception as e:
+                if not self._should_retry(task, e):
+                    return
+
+    def _should_retry(self, task, error):
+        task.attempt += 1
+        if task.attempt > task.retries:
+            logger.error(f"Background task {task.name} failed after {task.attempt} attempts: {error}")
+            return False
+        logger.warning(f"Background task {task.name} failed (attempt {task.attempt}), retrying: {error}")
+        return True
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                close_old_connections()
+                task.fn(*task.args, **task.kwargs)
+            except Exception as e:
+                if self._should_retry(task, e):
+                    delay = task.backoff * (2 ** (task.attempt - 1))
+                    timer = threading.Timer(delay, self._queue.put, args=(task,))
+                    timer.daemon = True
+                    timer.start()
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def join(self, timeout=None):
+        """Wait until the queue is drained (tests and management commands)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+tasks = BackgroundQueue()
+
+
+def submit(fn, *args, **kwargs):
+    """Run ``fn(*args, **kwargs)`` on the background worker (see BackgroundQueue)."""
+    tasks.submit(fn, *args, **kwargs)
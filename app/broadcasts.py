@@ -0,0 +1,208 @@
+"""
+Broadcast notifications
+Events addressed to an audience (a trader's copiers, all users, a segment)
+are stored once and merged into each user's feed at read time; per-user
+read state lives in BroadcastReceipt
+"""
+
+from django.db.models import Q
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# User columns a segment broadcast may filter on, e.g. {"country": ["US", "CA"]}
+SEGMENT_FIELDS = ("country", "currency", "current_loyalty_status", "is_verified", "has_submitted_kyc")
+
+
+# ---------------------------------------------------------------------------
+# Publishing
+# ---------------------------------------------------------------------------
+
+def publish_copy_trade(copy_trade, copiers):
+    """
+    One broadcast to the trader's current copiers (UserTraderCopy rows).
+    Each copier's investment and P/L are fixed here, so the feed shows what
+    the trade did for them even after they top up, stop or copy again.
+    """
+    from .models import BroadcastCopier, BroadcastNotification
+
+    trader = copy_trade.trader
+    broadcast = BroadcastNotification.objects.create(
+        kind='copy_trade',
+        audience='trader_copiers',
+        trader=trader,
+        type='trade',
+        title=f'Trade Update from {trader.name}',
+        message=f'Copy trade on {copy_trade.market}',
+        metadata={
+            "copy_trade_id": copy_trade.id,
+            "trader_name": trader.name,
+            "market": copy_trade.market,
+            "direction": copy_trade.direction,
+            "status": copy_trade.status,
+            "profit_loss_percent": str(copy_trade.profit_loss_percent or 0),
+        },
+    )
+    BroadcastCopier.objects.bulk_create([
+        BroadcastCopier(
+            broadcast=broadcast,
+            user_id=rel.user_id,
+            investment=rel.initial_investment_amount,
+            profit_loss=copy_trade.calculate_user_profit_loss(rel.initial_investment_amount),
+        )
+        for rel in copiers
+    ])
+    return broadcast
+
+
+def announce(title, message, audience='all_users', segment=None, type='system', full_details=''):
+    """Announcement to every user (``all_users``) or to those matching ``segment``."""
+    from .models import BroadcastNotification
+
+    unknown = set(segment or {}) - set(SEGMENT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown segment fields: {', '.join(sorted(unknown))}")
+    return BroadcastNotification.objects.create(
+        kind='announcement',
+        audience=audience,
+        segment=segment or {},
+        type=type,
+        title=title,
+        message=message,
+        full_details=full_details,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Audience
+# ---------------------------------------------------------------------------
+
+def matches_segment(user, segment):
+    for field, wanted in segment.items():
+        if field not in SEGMENT_FIELDS:
+            return False
+        values = wanted if isinstance(wanted, list) else [wanted]
+        if getattr(user, field) not in values:
+            return False
+    return True
+
+
+class Audience:
+    """
+    What one user can see: announcements since they joined, matching
+    segments, and the copy-trade broadcasts they were a copier of when
+    published. Built once per request.
+    """
+
+    def __init__(self, user):
+        from .models import BroadcastCopier, BroadcastNotification
+
+        self.user = user
+
+        q = Q(audience='all_users', created_at__gte=user.date_joined)
+        q |= Q(audience='trader_copiers', id__in=BroadcastCopier.objects.filter(user=user).values('broadcast_id'))
+
+        segment_ids = [
+            b.id for b in BroadcastNotification.objects.filter(
+                audience='segment', created_at__gte=user.date_joined,
+            ).only('id', 'segment')
+            if matches_segment(user, b.segment)
+        ]
+        if segment_ids:
+            q |= Q(id__in=segment_ids)
+        self.filter = q
+
+    def queryset(self, notification_type=None):
+        from .models import BroadcastNotification
+
+        qs = BroadcastNotification.objects.filter(self.filter)
+        if notification_type:
+            qs = qs.filter(type=notification_type)
+        return qs.order_by('-created_at', '-id')
+
+    def unread(self):
+        return self.queryset().exclude(receipts__user=self.user)
+
+    # -----------------------------------------------------------------------
+    # Rendering
+    # -----------------------------------------------------------------------
+
+    def render(self, broadcasts):
+        """API-shaped dicts (same keys as notifications, plus ``broadcast``)."""
+        from .models import BroadcastCopier, BroadcastReceipt
+
+        broadcasts = list(broadcasts)
+        read_ids = set(
+            BroadcastReceipt.objects.filter(user=self.user, broadcast__in=broadcasts)
+            .values_list('broadcast_id', flat=True)
+        )
+        # Only this user's entries for the copy-trade broadcasts on the page
+        copy_trades = [b for b in broadcasts if b.kind == 'copy_trade']
+        copies = {
+            c.broadcast_id: c
+            for c in BroadcastCopier.objects.filter(user=self.user, broadcast__in=copy_trades)
+        } if copy_trades else {}
+        return [self._render(b, b.id in read_ids, copies.get(b.id)) for b in broadcasts]
+
+    def _render(self, b, read, copier=None):
+        # "b-<id>" so a broadcast is never taken for the Notification row with
+        # the same id; mark it read through broadcast_id
+        item = {
+            "id": f"b-{b.id}",
+            "broadcast_id": b.id,
+            "type": b.type,
+            "title": b.title,
+            "message": b.message,
+            "full_details": b.full_details,
+            "metadata": b.metadata,
+            "read": read,
+            "created_at": b.created_at.isoformat(),
+            "broadcast": True,
+        }
+        if copier is not None:
+            item.update(self._render_copy_trade(b, copier))
+        return item
+
+    def _render_copy_trade(self, b, copier):
+        # Same wording as the per-copier notifications it replaces
+        m = b.metadata
+        user_pl = copier.profit_loss
+
+        gained = user_pl >= 0
+        return {
+            "title": f'Trade Profit from {m["trader_name"]}!' if gained else f'Trade Update from {m["trader_name"]}',
+            "message": f'Copy trade on {m["market"]} {"gained" if gained else "lost"} ${abs(user_pl)}',
+            "full_details": (
+                f'Trader: {m["trader_name"]}\nMarket: {m["market"]}\nDirection: {m["direction"].upper()}\n'
+                f'Your Investment: ${copier.investment}\n'
+                f'P/L: ${user_pl} ({m["profit_loss_percent"]}%)\nStatus: {m["status"].capitalize()}'
+            ),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Read markers
+# ---------------------------------------------------------------------------
+
+def mark_read(user, broadcast_id):
+    """Returns False when the broadcast is not in the user's feed."""
+    from .models import BroadcastReceipt
+
+    audience = Audience(user)
+    if not audience.queryset().filter(id=broadcast_id).exists():
+        return False
+    BroadcastReceipt.objects.get_or_create(user=user, broadcast_id=broadcast_id)
+    return True
+
+
+def mark_all_read(user):
+    from .models import BroadcastReceipt
+
+    ids = list(Audience(user).unread().values_list('id', flat=True))
+    BroadcastReceipt.objects.bulk_create(
+        [BroadcastReceipt(user=user, broadcast_id=i) for i in ids],
+        ignore_conflicts=True,
+    )
+    return len(ids)
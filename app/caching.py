@@ -0,0 +1,19 @@
+"""
+Cache backend checks
+Whether the default cache is shared by every worker process. State other
+processes must see (market data versions, token epochs, single-flight
+results) only travels through the cache when it is
+"""
+
+from django.conf import settings
+
+
+# Per-process backends: a value written by one worker is invisible to the others
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_shared():
+    return settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS
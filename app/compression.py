@@ -0,0 +1,96 @@
+"""
+Response compression
+Accept-Encoding negotiation and gzip / brotli encoding shared by
+CompressionMiddleware and the views that cache pre-compressed bodies.
+Brotli is used when the ``brotli`` package is installed
+"""
+
+import gzip
+import re
+import threading
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = re.compile(r"^(text/|application/(json|javascript|xml)|image/svg\+xml)")
+
+
+def available():
+    """Encodings this process can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding):
+    """
+    The encoding to answer an Accept-Encoding header with, or None:
+    the client's highest q-value among ``available()``, ties going to brotli.
+    """
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in available():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=getattr(settings, "COMPRESSION_BROTLI_QUALITY", DEFAULT_BROTLI_QUALITY))
+    # mtime=0 keeps the output (and so cached variants and ETags) deterministic
+    return gzip.compress(body, compresslevel=getattr(settings, "COMPRESSION_GZIP_LEVEL", DEFAULT_GZIP_LEVEL), mtime=0)
+
+
+def min_size():
+    return getattr(settings, "COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE)
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+_lock = threading.Lock()
+_stats = {"compressed": 0, "skipped": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def record(bytes_in=None, bytes_out=None):
+    """Count one response: compressed from bytes_in to bytes_out, or skipped."""
+    with _lock:
+        if bytes_in is None:
+            _stats["skipped"] += 1
+        else:
+            _stats["compressed"] += 1
+            _stats["bytes_in"] += bytes_in
+            _stats["bytes_out"] += bytes_out
+
+
+def stats():
+    """Counters of this process, with ratio = bytes_out / bytes_in."""
+    with _lock:
+        result = dict(_stats)
+    result["ratio"] = round(result["bytes_out"] / result["bytes_in"], 3) if result["bytes_in"] else None
+    return result
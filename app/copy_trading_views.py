@@ -2,9 +2,17 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q
 from django.utils import timezone
 from .models import Trader, UserTraderCopy, UserCopyTraderHistory, Notification
+from . import counters, images, leaderboard, singleflight, trader_stats
+from . import search as search_index
+from .media import media_url
+
+
+LIST_FIELDS = (
+    "id", "name", "username", "avatar", "badge", "country", "gain", "risk",
+    "trades", "capital", "copiers", "trend_direction", "category", "is_active",
+)
 
 
 @api_view(["GET"])
@@ -14,37 +22,38 @@ def list_traders(request):
     search = request.GET.get("search", "").strip()
     category = request.GET.get("category", "").strip().lower()
 
-    traders = Trader.objects.filter(is_active=True)
+    # Only the columns serialized below; bio, tags and analytics stay on disk
+    traders = counters.with_counters(
+        Trader.objects.filter(is_active=True).only(*LIST_FIELDS),
+        fields=('copiers',),
+    )
 
     if search:
-        traders = traders.filter(
-            Q(name__icontains=search) | Q(username__icontains=search)
-        )
+        traders = traders.filter(id__in=search_index.matching_ids(search, "trader"))
 
     if category and category != "all":
         traders = traders.filter(category=category)
 
+    traders = list(traders)
+    processed = images.lookup([t.avatar for t in traders])
+
     traders_list = []
     for t in traders:
-        avatar_url = None
-        try:
-            if t.avatar:
-                avatar_url = t.avatar.url
-        except Exception:
-            pass
+        avatar_url = media_url(t.avatar)
 
         traders_list.append({
             "id": t.id,
             "name": t.name,
             "username": t.username,
             "avatar_url": avatar_url,
+            "avatar_image": images.describe(t.avatar, processed),
             "badge": t.badge,
             "country": t.country,
             "gain": str(t.gain),
             "risk": t.risk,
             "trades": t.trades,
             "capital": t.capital,
-            "copiers": t.copiers,
+            "copiers": counters.value(t, 'copiers'),
             "trend_direction": t.trend_direction,
             "category": t.category,
             "is_active": t.is_active,
@@ -53,45 +62,102 @@ def list_traders(request):
     return Response(traders_list)
 
 
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def trader_leaderboard(request):
+    """
+    One page of a precomputed trader leaderboard.
+    ?metric=gain|win_rate|risk_adjusted|copier_growth|score_7d&category=all&limit=20
+    Continue with &cursor=<next_cursor of the previous page>; &offset= jumps in.
+    """
+    metric = request.GET.get("metric", "gain").strip().lower()
+    category = request.GET.get("category", leaderboard.ALL).strip().lower() or leaderboard.ALL
+
+    if metric not in leaderboard.METRICS:
+        return Response({
+            "success": False,
+            "error": f"Unknown metric. Choose one of: {', '.join(leaderboard.METRICS)}",
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        offset = max(int(request.GET.get("offset", 0)), 0)
+        limit = min(max(int(request.GET.get("limit", 20)), 1), 100)
+    except (TypeError, ValueError):
+        return Response({
+            "success": False,
+            "error": "offset and limit must be integers",
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    cursor = request.GET.get("cursor") or None
+    try:
+        total, entries, next_cursor = leaderboard.page(category, metric, cursor, limit, offset)
+    except ValueError as e:
+        return Response({
+            "success": False,
+            "error": str(e),
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    results = []
+    for entry in entries:
+        t = entry.trader
+        avatar_url = media_url(t.avatar)
+
+        results.append({
+            "rank": entry.rank,
+            "score": str(entry.score),
+            "trader": {
+                "id": t.id,
+                "name": t.name,
+                "username": t.username,
+                "avatar_url": avatar_url,
+                "badge": t.badge,
+                "country": t.country,
+                "category": t.category,
+            },
+        })
+
+    return Response({
+        "success": True,
+        "metric": metric,
+        "category": category,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "results": results,
+    })
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def trader_detail(request, trader_id):
     """Get detailed trader profile"""
+    # Concurrent requests for the same profile share one set of queries
     try:
-        t = Trader.objects.get(id=trader_id)
+        data = singleflight.do(f"trader:detail:{trader_id}", lambda: _trader_detail_data(trader_id))
     except Trader.DoesNotExist:
         return Response({"error": "Trader not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    avatar_url = None
-    try:
-        if t.avatar:
-            avatar_url = t.avatar.url
-    except Exception:
-        pass
+    return Response(data)
 
-    country_flag_url = None
-    try:
-        if t.country_flag:
-            country_flag_url = t.country_flag.url
-    except Exception:
-        pass
-
-    # Get frequently traded assets from UserCopyTraderHistory (actual trade history)
-    from django.db.models import Count
-    frequently_traded_assets = (
-        UserCopyTraderHistory.objects
-        .filter(trader=t)
-        .values('market')
-        .annotate(count=Count('market'))
-        .order_by('-count')[:10]  # Top 10 most traded assets
-    )
-    frequently_traded = [item['market'] for item in frequently_traded_assets]
 
-    data = {
+def _trader_detail_data(trader_id):
+    t = counters.with_counters(Trader.objects.select_related("analytics", "stats")).get(id=trader_id)
+
+    avatar_url = media_url(t.avatar)
+    country_flag_url = media_url(t.country_flag)
+
+    # Top 10 most traded assets, maintained from the trade history by app.trader_stats
+    frequently_traded = trader_stats.stats_for(t).frequently_traded(limit=10)
+
+    analytics = getattr(t, "analytics", None)
+
+    return {
         "id": t.id,
         "name": t.name,
         "username": t.username,
         "avatar_url": avatar_url,
+        "avatar_image": images.describe(t.avatar),
         "country_flag_url": country_flag_url,
         "badge": t.badge,
         "country": t.country,
@@ -99,9 +165,9 @@ def trader_detail(request, trader_id):
         "risk": t.risk,
         "trades": t.trades,
         "capital": t.capital,
-        "copiers": t.copiers,
+        "copiers": counters.value(t, 'copiers'),
         "avg_trade_time": t.avg_trade_time,
-        "subscribers": t.subscribers,
+        "subscribers": counters.value(t, 'subscribers'),
         "current_positions": t.current_positions,
         "min_account_threshold": str(t.min_account_threshold),
         "profit_share": t.profit_share,
@@ -116,27 +182,25 @@ def trader_detail(request, trader_id):
         "total_wins": t.total_wins,
         "total_losses": t.total_losses,
         "win_rate": t.win_rate,
-        "performance_data": t.performance_data,
-        "monthly_performance": t.monthly_performance,
+        "performance_data": analytics.performance_data if analytics else [],
+        "monthly_performance": analytics.monthly_performance if analytics else [],
         "frequently_traded": frequently_traded,
         "bio": t.bio,
-        "followers": t.followers,
+        "followers": counters.value(t, 'followers'),
         "trading_days": t.trading_days,
         "trend_direction": t.trend_direction,
         "tags": t.tags,
         "category": t.category,
         "max_drawdown": str(t.max_drawdown),
         "cumulative_earnings_copiers": str(t.cumulative_earnings_copiers),
-        "cumulative_copiers": t.cumulative_copiers,
-        "portfolio_breakdown": t.portfolio_breakdown,
-        "top_traded": t.top_traded,
+        "cumulative_copiers": counters.value(t, 'cumulative_copiers'),
+        "portfolio_breakdown": analytics.portfolio_breakdown if analytics else [],
+        "top_traded": analytics.top_traded if analytics else [],
         "is_active": t.is_active,
         "created_at": t.created_at.isoformat() if t.created_at else None,
         "updated_at": t.updated_at.isoformat() if t.updated_at else None,
     }
 
-    return Response(data)
-
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -198,8 +262,7 @@ def copy_trader_action(request):
                 copy_record.minimum_threshold_at_start = trader.min_account_threshold
                 copy_record.save()
 
-        trader.copiers += 1
-        trader.save()
+        counters.increment(trader, 'copiers')
 
         return Response({
             "success": True,
@@ -285,7 +348,7 @@ def user_copied_trades(request):
                 "market": trade.market,
                 "market_name": trade.market_name,
                 "market_logo_url": trade.market_logo_url,
-                "custom_image_url": trade.custom_image.url if trade.custom_image else None,
+                "custom_image_url": media_url(trade.custom_image),
                 "direction": trade.direction,
                 "duration": trade.duration,
                 "amount": str(trade.amount),
@@ -318,7 +381,7 @@ def user_copied_trades(request):
             "market": trade.market,
             "market_name": trade.market_name,
             "market_logo_url": trade.market_logo_url,
-            "custom_image_url": trade.custom_image.url if trade.custom_image else None,
+            "custom_image_url": media_url(trade.custom_image),
             "direction": trade.direction,
             "duration": trade.duration,
             "amount": str(trade.amount),
@@ -356,12 +419,7 @@ def user_following_traders(request):
     traders_list = []
     for copy in copies:
         t = copy.trader
-        avatar_url = None
-        try:
-            if t.avatar:
-                avatar_url = t.avatar.url
-        except Exception:
-            pass
+        avatar_url = media_url(t.avatar)
 
         traders_list.append({
             "id": copy.id,  # UserTraderCopy ID
@@ -440,12 +498,7 @@ def user_trade_history(request):
                     break
             user_pl = trade.calculate_user_profit_loss(user_investment) if user_investment else 0
 
-            trader_avatar_url = None
-            try:
-                if trade.trader.avatar:
-                    trader_avatar_url = trade.trader.avatar.url
-            except Exception:
-                pass
+            trader_avatar_url = media_url(trade.trader.avatar)
 
             trades_list.append({
                 "id": trade.id,
@@ -456,7 +509,7 @@ def user_trade_history(request):
                 "market": trade.market,
                 "market_name": trade.market_name,
                 "market_logo_url": trade.market_logo_url,
-                "custom_image_url": trade.custom_image.url if trade.custom_image else None,
+                "custom_image_url": media_url(trade.custom_image),
                 "direction": trade.direction,
                 "direction_display": trade.get_direction_display(),
                 "duration": trade.duration,
@@ -485,7 +538,7 @@ def user_trade_history(request):
                 "market": trade.market,
                 "market_name": trade.market_name,
                 "market_logo_url": trade.market_logo_url,
-                "custom_image_url": trade.custom_image.url if trade.custom_image else None,
+                "custom_image_url": media_url(trade.custom_image),
                 "direction": trade.direction,
                 "direction_display": trade.get_direction_display(),
                 "duration": trade.duration,
@@ -621,9 +674,7 @@ def admin_unlink_copier(request):
     copy_record.save()
 
     # Decrease copier count
-    if trader.copiers > 0:
-        trader.copiers -= 1
-        trader.save()
+    counters.decrement(trader, 'copiers')
 
     # Send notification to user
     Notification.objects.create(
@@ -686,9 +737,7 @@ def admin_handle_cancel_request(request):
         copy_record.save()
 
         # Decrease copier count
-        if trader.copiers > 0:
-            trader.copiers -= 1
-            trader.save()
+        counters.decrement(trader, 'copiers')
 
         # Send notification to user
         Notification.objects.create(
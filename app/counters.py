@@ -0,0 +1,148 @@
+"""
+Trader counters (copiers, subscribers, followers)
+Atomic F() deltas, with sharded counter rows for hot traders
+"""
+
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+COUNTER_FIELDS = ('copiers', 'subscribers', 'followers', 'cumulative_copiers')
+
+
+def _shard_threshold():
+    return getattr(settings, 'TRADER_COUNTER_SHARD_THRESHOLD', 500)
+
+
+def _shard_count():
+    return getattr(settings, 'TRADER_COUNTER_SHARDS', 16)
+
+
+def _check_field(field):
+    if field not in COUNTER_FIELDS:
+        raise ValueError(f"Unknown trader counter: {field}")
+
+
+def is_hot(trader, field='copiers'):
+    """Traders past the threshold spread their writes over shard rows."""
+    return getattr(trader, field) >= _shard_threshold()
+
+
+def increment(trader, field='copiers', delta=1):
+    """
+    Apply ``delta`` to a trader counter without rewriting the Trader row.
+
+    Cold traders get a single ``UPDATE ... SET field = field + delta``.
+    Hot traders add the delta to one of N shard rows picked at random, so
+    concurrent writers rarely wait on the same row lock. Decrements never
+    take the visible value below zero.
+    """
+    from .models import Trader, TraderCounterShard
+
+    _check_field(field)
+    if not delta:
+        return
+
+    if not is_hot(trader, field):
+        qs = Trader.objects.filter(pk=trader.pk)
+        if delta < 0:
+            # Floor at zero in the same statement (replaces read-check-write)
+            qs = qs.filter(**{f'{field}__gte': -delta})
+        qs.update(**{field: F(field) + delta})
+        return
+
+    shard = random.randrange(_shard_count())
+    lookup = {'trader_id': trader.pk, 'field': field, 'shard': shard}
+    if TraderCounterShard.objects.filter(**lookup).update(delta=F('delta') + delta):
+        return
+    try:
+        with transaction.atomic():
+            TraderCounterShard.objects.create(delta=delta, **lookup)
+    except IntegrityError:
+        # Another writer created the shard first
+        TraderCounterShard.objects.filter(**lookup).update(delta=F('delta') + delta)
+
+
+def decrement(trader, field='copiers', delta=1):
+    increment(trader, field, -delta)
+
+
+def _shard_sum(field):
+    from .models import TraderCounterShard
+
+    return Coalesce(
+        Subquery(
+            TraderCounterShard.objects.filter(trader=OuterRef('pk'), field=field)
+            .values('trader')
+            .annotate(total=Sum('delta'))
+            .values('total')[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def with_counters(queryset, fields=COUNTER_FIELDS):
+    """
+    Annotate ``live_<field>`` = base column + sum of its shards on each trader.
+    The shard sum is one indexed subquery per field, folded into the same SELECT.
+    """
+    return queryset.annotate(**{
+        f'live_{field}': Greatest(F(field) + _shard_sum(field), Value(0))
+        for field in fields
+    })
+
+
+def value(trader, field='copiers'):
+    """Current counter value; uses the with_counters() annotation when present."""
+    _check_field(field)
+    annotated = getattr(trader, f'live_{field}', None)
+    if annotated is not None:
+        return annotated
+
+    from .models import TraderCounterShard
+    pending = TraderCounterShard.objects.filter(trader=trader, field=field).aggregate(total=Sum('delta'))['total']
+    return max(getattr(trader, field) + (pending or 0), 0)
+
+
+def fold(trader_id=None):
+    """
+    Move shard deltas back into the Trader columns and zero the shards.
+    Returns the number of (trader, field) pairs folded.
+    """
+    from .models import Trader, TraderCounterShard
+
+    pending = TraderCounterShard.objects.exclude(delta=0)
+    if trader_id is not None:
+        pending = pending.filter(trader_id=trader_id)
+    pairs = list(pending.values_list('trader_id', 'field').distinct())
+
+    for pk, field in pairs:
+        with transaction.atomic():
+            shards = list(
+                TraderCounterShard.objects.select_for_update()
+                .filter(trader_id=pk, field=field)
+                .values_list('id', 'delta')
+            )
+            total = sum(d for _, d in shards)
+            Trader.objects.filter(pk=pk).update(**{field: Greatest(F(field) + total, Value(0))})
+            TraderCounterShard.objects.filter(id__in=[i for i, _ in shards]).update(delta=0)
+
+    if pairs:
+        logger.info(f"Folded {len(pairs)} sharded trader counters")
+    return len(pairs)
+
+
+def discard_shards(trader, fields=COUNTER_FIELDS):
+    """Drop pending deltas of ``fields``, e.g. after an admin sets those counters explicitly."""
+    from .models import TraderCounterShard
+
+    TraderCounterShard.objects.filter(trader=trader, field__in=fields).delete()
@@ -537,16 +537,24 @@ def send_admin_payment_intent_notification(user, currency, dollar_amount, curren
 # ─────────────────────────────────────────────────────────────
 
 def send_admin_deposit_notification(user, transaction):
+    from . import tiered_storage
+    from .media import media_url
+
     admin_email = settings.ADMIN_NOTIFICATION_EMAIL if hasattr(settings, 'ADMIN_NOTIFICATION_EMAIL') else settings.EMAIL_HOST_USER
 
     subject = f"Deposit Request \u2014 {user.email} \u2014 ${transaction.amount}"
 
+    receipt_url = media_url(transaction.receipt) if transaction.receipt else None
+    if receipt_url and tiered_storage.is_pending(transaction.receipt):
+        # Still on local disk: serve_pending_media serves it, then redirects once uploaded
+        receipt_url = f"{settings.BACKEND_URL.rstrip('/')}{receipt_url}"
+
     receipt_row = ""
-    if transaction.receipt:
+    if receipt_url:
         receipt_row = f"""
         <tr>
             <td class="label">Receipt</td>
-            <td class="value"><a href="{transaction.receipt.url}" target="_blank" style="color: #3b82f6; text-decoration: none;">View Receipt</a></td>
+            <td class="value"><a href="{receipt_url}" target="_blank" style="color: #3b82f6; text-decoration: none;">View Receipt</a></td>
         </tr>
         """
 
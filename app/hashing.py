@@ -0,0 +1,197 @@
+"""
+Password hashing executor
+PBKDF2 runs off the request thread: in a small process pool (HASHING_WORKERS)
+behind a per-process concurrency limit, so login spikes queue here, or are
+turned away with HashingBusy, instead of starving every other endpoint
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, identify_hasher, is_password_usable
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_PENDING = 8
+DEFAULT_QUEUE_TIMEOUT = 2.0
+
+
+class HashingBusy(Exception):
+    """Every hashing slot stayed taken for HASHING_QUEUE_TIMEOUT; answer 503."""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Password hashing is at capacity")
+        self.retry_after = retry_after
+
+
+def busy_response(exc):
+    """The API's answer to HashingBusy."""
+    return Response(
+        {"error": "The service is busy. Please try again in a moment."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+# ---------------------------------------------------------------------------
+# Worker side (runs in the pool: no Django setup, only the hasher classes)
+# ---------------------------------------------------------------------------
+
+def _run(op, hasher_path, password, arg):
+    started = time.perf_counter()
+    hasher = import_string(hasher_path)()
+    result = hasher.encode(password, arg) if op == "encode" else hasher.verify(password, arg)
+    return result, time.perf_counter() - started
+
+
+# ---------------------------------------------------------------------------
+# Executor
+# ---------------------------------------------------------------------------
+
+class HashingExecutor:
+    """
+    At most HASHING_MAX_PENDING hashes per process are running or waiting for
+    a pool worker; callers beyond that wait up to HASHING_QUEUE_TIMEOUT for a slot.
+    With no workers configured the hash runs on the calling thread, still
+    under the same limit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._pool = None
+        self._slots = None
+        self._stats = {}
+
+    def _setup(self):
+        # Pools and semaphores are per process: a forked worker builds its own
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            workers = getattr(settings, "HASHING_WORKERS", 0)
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            ) if workers else None
+            self._slots = threading.BoundedSemaphore(getattr(settings, "HASHING_MAX_PENDING", DEFAULT_MAX_PENDING))
+            self._stats = dict.fromkeys(
+                ("completed", "rejected", "in_flight", "wait_seconds", "max_wait_seconds", "hash_seconds"), 0,
+            )
+            self._pid = os.getpid()
+
+    def run(self, op, hasher, password, arg):
+        self._setup()
+        timeout = getattr(settings, "HASHING_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT)
+        queued = time.perf_counter()
+        if not self._slots.acquire(timeout=timeout):
+            self._record(rejected=1)
+            logger.warning(f"Password hashing rejected after waiting {timeout}s for a slot")
+            raise HashingBusy(retry_after=max(int(timeout), 1))
+
+        self._record(in_flight=1)
+        try:
+            hasher_path = f"{type(hasher).__module__}.{type(hasher).__qualname__}"
+            if self._pool is None:
+                result, spent = _run(op, hasher_path, password, arg)
+            else:
+                result, spent = self._pool.submit(_run, op, hasher_path, password, arg).result()
+        finally:
+            self._slots.release()
+            self._record(in_flight=-1)
+
+        wait = time.perf_counter() - queued - spent
+        self._record(completed=1, wait_seconds=wait, hash_seconds=spent, max_wait_seconds=wait)
+        return result
+
+    def _record(self, **values):
+        with self._lock:
+            for key, value in values.items():
+                if key == "max_wait_seconds":
+                    self._stats[key] = max(self._stats[key], value)
+                else:
+                    self._stats[key] += value
+
+    def stats(self):
+        """Counters of this process: completed, rejected, in_flight and wait/hash seconds."""
+        self._setup()
+        with self._lock:
+            stats = dict(self._stats)
+        done = stats["completed"] or 1
+        stats["avg_wait_seconds"] = stats["wait_seconds"] / done
+        stats["avg_hash_seconds"] = stats["hash_seconds"] / done
+        return stats
+
+
+executor = HashingExecutor()
+
+
+def stats():
+    return executor.stats()
+
+
+# ---------------------------------------------------------------------------
+# Django-compatible helpers
+# ---------------------------------------------------------------------------
+
+def make_password(password):
+    """make_password() on the executor (preferred hasher, fresh salt)."""
+    hasher = get_hasher()
+    return executor.run("encode", hasher, password, hasher.salt())
+
+
+def set_password(user, password):
+    """user.set_password() on the executor; does not save."""
+    if password is None:
+        user.set_unusable_password()
+        return
+    user.password = make_password(password)
+    user._password = password
+
+
+def check_password(user, password):
+    """
+    user.check_password() on the executor, including the re-hash (and save)
+    when the stored hash uses an outdated hasher or iteration count.
+    """
+    encoded = user.password
+    if password is None or not is_password_usable(encoded):
+        return False
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+
+    valid = executor.run("verify", hasher, password, encoded)
+    preferred = get_hasher()
+    if valid and (hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)):
+        set_password(user, password)
+        user._password = None
+        user.save(update_fields=["password"])
+    return valid
+
+
+def authenticate(email, password):
+    """
+    ModelBackend.authenticate() for email logins with the hashing offloaded.
+    Unknown emails still pay for one hash so response times do not reveal
+    which accounts exist.
+    """
+    User = get_user_model()
+    try:
+        user = User._default_manager.get_by_natural_key(email)
+    except User.DoesNotExist:
+        make_password(password)
+        return None
+    if check_password(user, password) and user.is_active:
+        return user
+    return None
@@ -0,0 +1,148 @@
+"""
+Account identifiers
+Account ids and referral codes derived from one database sequence, handed out
+in hi/lo blocks and scrambled with a keyed Feistel permutation, so new users
+get both in the INSERT itself without any exists() probing
+"""
+
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+SEQUENCE_NAME = "account"
+
+# 10-digit account ids: 1000000000 .. 9999999999
+ACCOUNT_ID_BASE = 10 ** 9
+ACCOUNT_ID_DOMAIN = 9 * 10 ** 9
+ACCOUNT_ID_BITS = 34
+
+# 8-character referral codes over A-Z0-9 (same alphabet as before)
+REFERRAL_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+REFERRAL_LENGTH = 8
+REFERRAL_DOMAIN = len(REFERRAL_ALPHABET) ** REFERRAL_LENGTH
+REFERRAL_BITS = 42
+
+FEISTEL_ROUNDS = 4
+
+
+# ---------------------------------------------------------------------------
+# Permutation
+# ---------------------------------------------------------------------------
+
+def _secret():
+    # Must stay fixed once accounts exist; a new key only risks collisions
+    # with old values, which the unique constraints turn into a retry
+    return str(getattr(settings, "ACCOUNT_ID_SECRET", None) or settings.SECRET_KEY).encode()
+
+
+def _round(value, round_no, purpose, bits):
+    digest = hashlib.blake2b(
+        f"{purpose}:{round_no}:{value}".encode(), key=_secret()[:64], digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big") & ((1 << bits) - 1)
+
+
+def _feistel(value, bits, purpose):
+    """Bijection on ``bits``-bit integers (balanced Feistel network; ``bits`` is even)."""
+    half = bits // 2
+    mask = (1 << half) - 1
+    left, right = value >> half, value & mask
+    for round_no in range(FEISTEL_ROUNDS):
+        left, right = right, left ^ _round(right, round_no, purpose, half)
+    return (left << half) | right
+
+
+def permute(value, domain, bits, purpose):
+    """
+    Bijection on range(domain): the Feistel permutation on ``bits`` bits,
+    cycle-walked until the result falls back inside the domain.
+    """
+    if not 0 <= value < domain:
+        raise ValueError(f"{value} is outside 0..{domain - 1}")
+    value = _feistel(value, bits, purpose)
+    while value >= domain:
+        value = _feistel(value, bits, purpose)
+    return value
+
+
+def account_id_for(n):
+    return str(ACCOUNT_ID_BASE + permute(n % ACCOUNT_ID_DOMAIN, ACCOUNT_ID_DOMAIN, ACCOUNT_ID_BITS, "account_id"))
+
+
+def referral_code_for(n):
+    value = permute(n % REFERRAL_DOMAIN, REFERRAL_DOMAIN, REFERRAL_BITS, "referral_code")
+    chars = []
+    for _ in range(REFERRAL_LENGTH):
+        value, digit = divmod(value, len(REFERRAL_ALPHABET))
+        chars.append(REFERRAL_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+# ---------------------------------------------------------------------------
+# Sequence
+# ---------------------------------------------------------------------------
+
+class SequenceAllocator:
+    """
+    Hi/lo allocator: reserves ``block_size`` values of an AccountSequence row
+    in one UPDATE and hands them out from memory. Unused values of a block
+    (process exit) are skipped. A block reserved inside a transaction that is
+    rolled back can be handed out twice; the unique constraints on account_id
+    and referral_code turn that into a retry in create_user.
+    """
+
+    def __init__(self, name, block_size=None):
+        self.name = name
+        self._block_size = block_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next = 0
+        self._limit = 0
+
+    @property
+    def block_size(self):
+        return self._block_size or getattr(settings, "ACCOUNT_ID_BLOCK_SIZE", 100)
+
+    def _reserve(self):
+        from .models import AccountSequence
+
+        size = self.block_size
+        with transaction.atomic():
+            AccountSequence.objects.get_or_create(name=self.name)
+            AccountSequence.objects.filter(name=self.name).update(next_value=F("next_value") + size)
+            end = AccountSequence.objects.filter(name=self.name).values_list("next_value", flat=True).get()
+        self._next, self._limit = end - size, end
+        logger.debug(f"Reserved {self.name} block {self._next}..{self._limit - 1}")
+
+    def next_value(self):
+        with self._lock:
+            # A forked worker must not hand out its parent's block
+            if self._pid != os.getpid() or self._next >= self._limit:
+                self._pid = os.getpid()
+                self._reserve()
+            value = self._next
+            self._next += 1
+            return value
+
+
+_allocator = SequenceAllocator(SEQUENCE_NAME)
+
+
+def assign(user):
+    """Fill in a missing account_id / referral_code on an unsaved user."""
+    if user.account_id and user.referral_code:
+        return
+    n = _allocator.next_value()
+    if not user.account_id:
+        user.account_id = account_id_for(n)
+    if not user.referral_code:
+        user.referral_code = referral_code_for(n)
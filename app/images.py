@@ -0,0 +1,447 @@
+"""
+Image processing pipeline
+Uploaded images are re-oriented, stripped of metadata and capped in size,
+then WebP/AVIF derivatives at fixed widths and a blurhash placeholder are
+generated on the background worker. Enabled with IMAGE_PIPELINE
+"""
+
+import hashlib
+import io
+import math
+import os
+import tempfile
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import cloudinary
+from cloudinary import CloudinaryResource
+from cloudinary.models import CloudinaryField
+from django.apps import apps
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from . import background
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Formats the original is re-encoded in; anything else is uploaded untouched
+NORMALIZED_FORMATS = {"JPEG", "PNG", "WEBP"}
+
+# Largest source fetched from the remote store for processing
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+
+BLURHASH_COMPONENTS = (4, 3)
+
+
+def enabled():
+    return getattr(settings, "IMAGE_PIPELINE", False)
+
+
+def _widths():
+    return sorted(getattr(settings, "IMAGE_VARIANT_WIDTHS", [320, 640, 1280]))
+
+
+def _formats():
+    wanted = getattr(settings, "IMAGE_VARIANT_FORMATS", ["webp", "avif"])
+    return [fmt for fmt in wanted if features.check(fmt)]
+
+
+def _quality():
+    return getattr(settings, "IMAGE_QUALITY", 80)
+
+
+def _max_dimension():
+    return getattr(settings, "IMAGE_MAX_DIMENSION", 2048)
+
+
+def _open(source):
+    """Decoded, upright image from a path or file object; None if not an image."""
+    try:
+        image = Image.open(source)
+        image.load()
+    except (UnidentifiedImageError, OSError) as e:
+        logger.info(f"Skipping non-image upload: {e}")
+        return None
+    return image
+
+
+def _flatten(image):
+    """RGB/RGBA copy without EXIF orientation."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGB", "RGBA"):
+        return image
+    has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+# ---------------------------------------------------------------------------
+# Original
+# ---------------------------------------------------------------------------
+
+def normalize_file(path):
+    """
+    Rewrite the image at ``path`` upright, without EXIF/XMP and no larger than
+    IMAGE_MAX_DIMENSION. The ICC profile is kept so colours do not shift.
+    Returns True when the file was rewritten.
+    """
+    image = _open(path)
+    if image is None or image.format not in NORMALIZED_FORMATS or getattr(image, "is_animated", False):
+        return False
+
+    fmt = image.format
+    icc_profile = image.info.get("icc_profile")
+    image = _flatten(image)
+    limit = _max_dimension()
+    image.thumbnail((limit, limit), Image.LANCZOS)
+
+    options = {"icc_profile": icc_profile} if icc_profile else {}
+    if fmt == "JPEG":
+        image = image.convert("RGB")
+        options.update(quality=_quality() + 5, optimize=True, progressive=True)
+    elif fmt == "PNG":
+        options.update(optimize=True)
+    else:
+        options.update(quality=_quality(), method=6)
+    image.save(path, fmt, **options)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Derivatives
+# ---------------------------------------------------------------------------
+
+def _encode_variant(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", quality=_quality(), method=6)
+    else:
+        image.save(buffer, fmt.upper(), quality=_quality() - 20)
+    return buffer.getvalue()
+
+
+def _variant_widths(width):
+    """Configured widths narrower than the original, or the original width alone."""
+    return [w for w in _widths() if w < width] or [width]
+
+
+def derive_file(path, remote_value):
+    """
+    Generate and upload every derivative of the image at ``path``, stored
+    remotely as ``remote_value``, and record them in ProcessedImage.
+    """
+    from .models import ProcessedImage
+    from .tiered_storage import get_remote
+
+    image = _open(path)
+    if image is None:
+        return None
+    image = _flatten(image)
+    width, height = image.size
+
+    source = CloudinaryField().parse_cloudinary_resource(remote_value)
+    remote = get_remote()
+    variants = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for w in _variant_widths(width):
+            resized = image if w == width else image.resize((w, max(round(height * w / width), 1)), Image.LANCZOS)
+            for fmt in _formats():
+                target = os.path.join(tmp, f"{w}w.{fmt}")
+                with open(target, "wb") as f:
+                    f.write(_encode_variant(resized, fmt))
+                variants.setdefault(fmt, {})[str(w)] = remote.upload(target, {
+                    "public_id": _variant_public_id(source.public_id, w),
+                    "type": source.type or "upload",
+                    "resource_type": "image",
+                    "overwrite": True,
+                })
+
+    processed, _ = ProcessedImage.objects.update_or_create(
+        source=source.public_id,
+        defaults={
+            "width": width,
+            "height": height,
+            "blurhash": blurhash(image),
+            "variants": variants,
+        },
+    )
+    logger.info(f"Derived {sum(len(v) for v in variants.values())} variants of {source.public_id}")
+    return processed
+
+
+def _is_url(public_id):
+    # KYC documents are saved as the full URL the client uploaded to
+    return public_id.startswith(("http://", "https://"))
+
+
+def _variant_public_id(public_id, width):
+    if _is_url(public_id):
+        public_id = f"derived/{hashlib.md5(public_id.encode()).hexdigest()}"
+    return f"{public_id}-{width}w"
+
+
+def _is_trusted_source(url):
+    """Only originals on our own Cloudinary cloud are ever fetched."""
+    parts = urllib.parse.urlsplit(url)
+    cloud_name = cloudinary.config().cloud_name
+    return (
+        parts.scheme in ("http", "https")
+        and parts.hostname == "res.cloudinary.com"
+        and bool(cloud_name)
+        and parts.path.startswith(f"/{cloud_name}/")
+    )
+
+
+def _source_url(value):
+    """
+    URL of the stored original, or None when it is not one of our Cloudinary
+    assets. URL values are client-supplied (KYC), so anything else, internal
+    addresses included, is refused rather than fetched.
+    """
+    from .media import media_url
+
+    if _is_url(value.public_id):
+        url = f"{value.public_id}.{value.format}" if value.format else value.public_id
+    else:
+        url = media_url(value)
+    if not url or not _is_trusted_source(url):
+        logger.warning(f"Not fetching untrusted image source {url!r}")
+        return None
+    return url
+
+
+class _NoRedirects(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        raise urllib.error.HTTPError(newurl, code, f"Refusing redirect to {newurl}", headers, fp)
+
+
+_opener = urllib.request.build_opener(_NoRedirects)
+
+
+def _download(url, target):
+    """Write the original at ``url`` to ``target``; sources over MAX_SOURCE_BYTES are rejected."""
+    with _opener.open(url, timeout=30) as response:
+        length = response.headers.get("Content-Length")
+        if length and int(length) > MAX_SOURCE_BYTES:
+            raise ValueError(f"Image source {url} is {length} bytes (limit {MAX_SOURCE_BYTES})")
+        data = response.read(MAX_SOURCE_BYTES + 1)
+    if len(data) > MAX_SOURCE_BYTES:
+        raise ValueError(f"Image source {url} exceeds {MAX_SOURCE_BYTES} bytes")
+    target.write(data)
+    target.flush()
+
+
+def process_field(model_label, object_id, field_name):
+    """
+    Background task for images uploaded without the local tier (direct
+    CloudinaryField uploads, KYC URLs): fetch the stored original, derive
+    its variants, then re-save the field so list cards and caches pick them up.
+    """
+    from .models import ProcessedImage
+
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=object_id).first()
+    if instance is None:
+        return
+    value = getattr(instance, field_name)
+    if not isinstance(value, CloudinaryResource) or not value.public_id:
+        return
+
+    if not ProcessedImage.objects.filter(source=value.public_id).exists():
+        url = _source_url(value)
+        if not url:
+            return
+        with tempfile.NamedTemporaryFile(suffix=f".{value.format or 'img'}") as tmp:
+            _download(url, tmp)
+            if derive_file(tmp.name, value.get_prep_value()) is None:
+                return
+
+    instance.save(update_fields=[field_name])
+
+
+def backfill():
+    """
+    Process every stored image that has no derivatives yet, synchronously.
+    Returns (processed, failed).
+    """
+    from .models import ProcessedImage
+    from .tiered_storage import _cloudinary_fields, is_pending
+
+    done = set(ProcessedImage.objects.values_list("source", flat=True))
+    processed = failed = 0
+    for model in apps.get_app_config("app").get_models():
+        for field in _cloudinary_fields(model):
+            rows = (
+                model.objects.exclude(**{f"{field.name}__isnull": True})
+                .exclude(**{field.name: ""})
+                .values_list("pk", field.name)
+                .iterator(chunk_size=500)
+            )
+            for pk, value in rows:
+                public_id = _public_id(value)
+                if not public_id or public_id in done or is_pending(value):
+                    continue
+                try:
+                    process_field(model._meta.label, pk, field.name)
+                    done.add(public_id)
+                    processed += 1
+                except Exception as e:
+                    logger.error(f"Could not process {model._meta.label}#{pk}.{field.name}: {e}")
+                    failed += 1
+    return processed, failed
+
+
+# ---------------------------------------------------------------------------
+# Model hooks
+# ---------------------------------------------------------------------------
+
+def mark_new_images(instance):
+    """
+    pre_save: remember image fields assigned a new file or URL in this save.
+    Values loaded from the database are CloudinaryResource; staged uploads
+    (app.tiered_storage) are derived during their push instead.
+    """
+    if not enabled():
+        return
+    from .tiered_storage import _cloudinary_fields
+
+    fresh = [
+        field.name for field in _cloudinary_fields(type(instance))
+        if isinstance(getattr(instance, field.attname), (UploadedFile, str)) and getattr(instance, field.attname)
+    ]
+    if fresh:
+        instance._new_images = fresh
+
+
+def queue_new_images(instance):
+    """post_save: process the marked fields on the background worker after commit."""
+    fresh = instance.__dict__.pop("_new_images", None)
+    if not fresh:
+        return
+    label = instance._meta.label
+    for field_name in fresh:
+        transaction.on_commit(
+            lambda f=field_name: background.submit(process_field, label, instance.pk, f)
+        )
+
+
+# ---------------------------------------------------------------------------
+# Serving
+# ---------------------------------------------------------------------------
+
+def _public_id(value):
+    return value.public_id if isinstance(value, CloudinaryResource) else None
+
+
+def lookup(values):
+    """ProcessedImage rows for several field values, keyed by public_id (one query)."""
+    from .models import ProcessedImage
+
+    ids = {pid for pid in map(_public_id, values) if pid}
+    if not ids:
+        return {}
+    return {p.source: p for p in ProcessedImage.objects.filter(source__in=ids)}
+
+
+def describe(value, processed=None):
+    """
+    Size-appropriate sources for a CloudinaryField value, for API payloads:
+    {"width", "height", "blurhash", "sources": {fmt: {width: url}}}, or None
+    until the pipeline has run. Pass ``lookup()`` results when serializing lists.
+    """
+    from .media import media_url
+
+    public_id = _public_id(value)
+    if not public_id:
+        return None
+    if processed is None:
+        processed = lookup([value])
+    entry = processed.get(public_id)
+    if entry is None:
+        return None
+
+    field = CloudinaryField()
+    return {
+        "width": entry.width,
+        "height": entry.height,
+        "blurhash": entry.blurhash,
+        "sources": {
+            fmt: {w: media_url(field.parse_cloudinary_resource(v)) for w, v in by_width.items()}
+            for fmt, by_width in entry.variants.items()
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Blurhash (https://blurha.sh), encoded from a 32px thumbnail
+# ---------------------------------------------------------------------------
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _encode83(value, length):
+    return "".join(_BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def _srgb_to_linear(value):
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    v = min(max(value, 0.0), 1.0)
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exp):
+    return math.copysign(abs(value) ** exp, value)
+
+
+def blurhash(image, components=BLURHASH_COMPONENTS):
+    cx, cy = components
+    small = image.convert("RGB")
+    small.thumbnail((32, 32))
+    w, h = small.size
+    pixels = [tuple(_srgb_to_linear(c) for c in p) for p in small.getdata()]
+
+    factors = []
+    for j in range(cy):
+        for i in range(cx):
+            norm = 1 if i == j == 0 else 2
+            r = g = b = 0.0
+            for y in range(h):
+                basis_y = math.cos(math.pi * j * y / h)
+                row = y * w
+                for x in range(w):
+                    basis = basis_y * math.cos(math.pi * i * x / w)
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = norm / (w * h)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((cx - 1) + (cy - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(c) for f in ac for c in f)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _encode83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _encode83(0, 1)
+
+    result += _encode83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+    for f in ac:
+        q = [max(0, min(18, int(_sign_pow(c / max_value, 0.5) * 9 + 9.5))) for c in f]
+        result += _encode83(q[0] * 19 * 19 + q[1] * 19 + q[2], 2)
+    return result
@@ -0,0 +1,191 @@
+"""
+Trader leaderboards
+Precomputed scores per (category, metric). A page is a range read on the
+(category, metric, -score, trader) index, continued from a (score, trader)
+cursor rather than an OFFSET, and ranks are positions in it, so re-scoring
+a trader writes only that trader's rows
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+METRICS = ('gain', 'win_rate', 'risk_adjusted', 'copier_growth', 'score_7d')
+
+ALL = 'all'
+
+# Window for the copier_growth metric
+COPIER_GROWTH_DAYS = 30
+
+PLACES = Decimal('0.0001')
+
+# Board sizes are cached; membership changes drop them, this bounds other processes
+TOTAL_CACHE_KEY = "leaderboard:total:{}"
+TOTAL_CACHE_TIMEOUT = 300
+
+TRADER_FIELDS = (
+    'id', 'category', 'is_active', 'gain', 'total_wins', 'total_losses',
+    'max_drawdown', 'avg_score_7d',
+)
+
+
+def _copier_growth(trader_ids):
+    """New copy relationships per trader over the growth window (one grouped query)."""
+    from .models import UserTraderCopy
+
+    since = timezone.now() - timedelta(days=COPIER_GROWTH_DAYS)
+    rows = (
+        UserTraderCopy.objects.filter(trader_id__in=trader_ids, started_copying_at__gte=since)
+        .values('trader_id')
+        .annotate(n=Count('id'))
+    )
+    return {row['trader_id']: row['n'] for row in rows}
+
+
+def trader_scores(trader, copier_growth=0):
+    """Score of ``trader`` on every metric; higher ranks first."""
+    decided = trader.total_wins + trader.total_losses
+    win_rate = Decimal(trader.total_wins * 100) / decided if decided else Decimal('0')
+
+    # Return per unit of worst drawdown (Calmar-style); drawdowns under 1% count as 1%
+    drawdown = max(abs(trader.max_drawdown), Decimal('1'))
+
+    scores = {
+        'gain': trader.gain,
+        'win_rate': win_rate,
+        'risk_adjusted': trader.gain / drawdown,
+        'copier_growth': Decimal(copier_growth),
+        'score_7d': trader.avg_score_7d,
+    }
+    return {metric: Decimal(value).quantize(PLACES) for metric, value in scores.items()}
+
+
+def boards_for(trader):
+    """Categories whose boards list ``trader``."""
+    if not trader.is_active:
+        return ()
+    if trader.category and trader.category != ALL:
+        return (ALL, trader.category)
+    return (ALL,)
+
+
+def rebuild():
+    """
+    Recompute every board from scratch. Returns the number of rows written.
+    Used by the rebuild_leaderboard command and after bulk edits.
+    """
+    from .models import Trader, LeaderboardEntry
+
+    traders = list(Trader.objects.filter(is_active=True).only(*TRADER_FIELDS))
+    growth = _copier_growth([t.id for t in traders])
+
+    rows = []
+    for trader in traders:
+        scores = trader_scores(trader, growth.get(trader.id, 0))
+        rows.extend(
+            LeaderboardEntry(category=category, metric=metric, trader_id=trader.id, score=scores[metric])
+            for category in boards_for(trader)
+            for metric in METRICS
+        )
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(rows, batch_size=1000)
+    categories = {ALL} | {t.category for t in traders if t.category}
+    transaction.on_commit(lambda: cache.delete_many([TOTAL_CACHE_KEY.format(c) for c in categories]))
+
+    logger.info(f"Rebuilt leaderboards for {len(traders)} traders ({len(rows)} entries)")
+    return len(rows)
+
+
+def refresh_trader(trader_id):
+    """
+    Re-score one trader on every board it belongs to and drop it from the
+    others. Called after one of its copy trades closes or its profile is edited.
+    """
+    from .models import Trader, LeaderboardEntry
+
+    trader = Trader.objects.filter(pk=trader_id).only(*TRADER_FIELDS).first()
+    boards = boards_for(trader) if trader else ()
+    scores = trader_scores(trader, _copier_growth([trader.id]).get(trader.id, 0)) if boards else {}
+
+    with transaction.atomic():
+        dropped = LeaderboardEntry.objects.filter(trader_id=trader_id).exclude(category__in=boards)
+        changed = set(dropped.values_list('category', flat=True).distinct())
+        dropped.delete()
+        for category in boards:
+            for metric in METRICS:
+                _, created = LeaderboardEntry.objects.update_or_create(
+                    category=category, metric=metric, trader_id=trader_id,
+                    defaults={'score': scores[metric]},
+                )
+                if created:
+                    changed.add(category)
+    if changed:
+        transaction.on_commit(lambda: cache.delete_many([TOTAL_CACHE_KEY.format(c) for c in changed]))
+
+
+def total(category=ALL):
+    """Traders on a board (the same for every metric), cached."""
+    from .models import LeaderboardEntry
+
+    return cache.get_or_set(
+        TOTAL_CACHE_KEY.format(category),
+        lambda: LeaderboardEntry.objects.filter(category=category, metric=METRICS[0]).count(),
+        TOTAL_CACHE_TIMEOUT,
+    )
+
+
+def make_cursor(entry):
+    return f"{entry.rank}:{entry.score}:{entry.trader_id}"
+
+
+def parse_cursor(cursor):
+    """(rank, score, trader_id) of the entry a page continues after; ValueError if malformed."""
+    try:
+        rank, score, trader_id = cursor.split(":")
+        rank, score, trader_id = int(rank), Decimal(score), int(trader_id)
+    except (ValueError, ArithmeticError):
+        raise ValueError(f"Invalid leaderboard cursor: {cursor}")
+    if rank < 0 or not score.is_finite():
+        raise ValueError(f"Invalid leaderboard cursor: {cursor}")
+    return rank, score, trader_id
+
+
+def page(category=ALL, metric='gain', cursor=None, limit=20, offset=0):
+    """
+    (total, entries, next_cursor) for one board; entries carry their trader
+    and ``rank``. Ties go to the older trader. A page continues after
+    ``cursor`` (the previous page's next_cursor) with a keyset range read;
+    ``offset`` is only for jumping into a board without one.
+    """
+    from .models import LeaderboardEntry
+
+    board = (
+        LeaderboardEntry.objects.filter(category=category, metric=metric)
+        .order_by('-score', 'trader_id')
+        .select_related('trader')
+        .only(
+            'score', 'trader__id', 'trader__name', 'trader__username',
+            'trader__avatar', 'trader__badge', 'trader__country', 'trader__category',
+        )
+    )
+    if cursor is not None:
+        start, score, trader_id = parse_cursor(cursor)
+        entries = list(board.filter(Q(score__lt=score) | Q(score=score, trader_id__gt=trader_id))[:limit])
+    else:
+        start = offset
+        entries = list(board[offset:offset + limit])
+    for rank, entry in enumerate(entries, start=start + 1):
+        entry.rank = rank
+    next_cursor = make_cursor(entries[-1]) if len(entries) == limit else None
+    return total(category), entries, next_cursor
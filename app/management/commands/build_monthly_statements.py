@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from app.models import CustomUser, MonthlyStatement
+from app.statements import month_start, monthly_rollups, previous_month
+
+
+class Command(BaseCommand):
+    help = 'Precompute immutable monthly statement rollups for closed months'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=1,
+            help='Number of closed months to build, counting back from last month (default: 1)',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Delete existing rollups in the window and rebuild them from raw rows',
+        )
+
+    def handle(self, *args, **options):
+        last_month = previous_month(month_start(timezone.localdate()))
+        first_month = last_month
+        for _ in range(options['months'] - 1):
+            first_month = previous_month(first_month)
+
+        if options['rebuild']:
+            deleted = MonthlyStatement.objects.filter(month__gte=first_month, month__lte=last_month).delete()[0]
+            self.stdout.write(self.style.WARNING(f'Deleted {deleted} existing rollups'))
+
+        users = 0
+        for user in CustomUser.objects.only('id', 'date_joined').iterator(chunk_size=500):
+            joined = month_start(timezone.localtime(user.date_joined))
+            if joined > last_month:
+                continue
+            monthly_rollups(user, max(first_month, joined), last_month)
+            users += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rollups built for {users} users ({first_month:%Y-%m} to {last_month:%Y-%m})')
+        )
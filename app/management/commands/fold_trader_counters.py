@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from app.counters import fold
+
+
+class Command(BaseCommand):
+    help = 'Fold sharded trader counter deltas back into the Trader rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trader',
+            type=int,
+            help='Only fold counters for this trader id',
+        )
+
+    def handle(self, *args, **options):
+        folded = fold(trader_id=options['trader'])
+        self.stdout.write(self.style.SUCCESS(f'Folded {folded} trader counters'))
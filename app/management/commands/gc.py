@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from app import gc
+
+
+class Command(BaseCommand):
+    help = 'Reclaim expired tokens, stale verification codes and old read notifications in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('collectors', nargs='*', help='Collectors to run (default: all)')
+        parser.add_argument('--batch-size', type=int, help='Primary keys per batch (default: GC_BATCH_SIZE)')
+        parser.add_argument('--sleep', type=float, help='Seconds between batches (default: GC_BATCH_SLEEP)')
+        parser.add_argument('--dry-run', action='store_true', help='Count what would be reclaimed')
+        parser.add_argument('--list', action='store_true', help='List the collectors and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, collector in gc.registry.items():
+                self.stdout.write(f'{name}: {collector.description}')
+            return
+
+        try:
+            results = gc.run(
+                options['collectors'],
+                batch_size=options['batch_size'],
+                sleep=options['sleep'],
+                dry_run=options['dry_run'],
+            )
+        except KeyError as e:
+            raise CommandError(e.args[0])
+
+        verb = 'Would reclaim' if options['dry_run'] else 'Reclaimed'
+        for r in results:
+            self.stdout.write(self.style.SUCCESS(
+                f'{r.name}: {verb} {r.reclaimed} rows in {r.batches} batches ({r.seconds}s)'
+            ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from app.media import PRESETS, prewarm
+
+
+class Command(BaseCommand):
+    help = 'Resolve stored Cloudinary image URLs into the in-process media URL cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--preset',
+            action='append',
+            choices=[p for p in PRESETS if p],
+            help='Also build URLs for this transformation preset (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        presets = (None, *(options['preset'] or []))
+        count = prewarm(presets)
+        self.stdout.write(self.style.SUCCESS(f'Resolved {count} media URLs'))
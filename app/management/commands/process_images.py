@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from app.images import backfill
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/AVIF derivatives and blurhash placeholders for stored images that have none'
+
+    def handle(self, *args, **options):
+        processed, failed = backfill()
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} images, {failed} failed'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from app.models import Stock
+from app.trading import process_orders
+
+
+class Command(BaseCommand):
+    help = 'Fill resting stock orders crossed by current prices (covers bulk price updates that bypass save())'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--symbol',
+            type=str,
+            help='Only process orders for this symbol',
+        )
+
+    def handle(self, *args, **options):
+        stocks = Stock.objects.filter(is_active=True, orders__status='open').distinct()
+        if options['symbol']:
+            stocks = stocks.filter(symbol=options['symbol'].upper())
+
+        total_filled = total_rejected = 0
+        for stock in stocks:
+            filled, rejected = process_orders(stock)
+            total_filled += filled
+            total_rejected += rejected
+            if filled or rejected:
+                self.stdout.write(f'{stock.symbol} @ ${stock.price}: {filled} filled, {rejected} rejected')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Done: {total_filled} orders filled, {total_rejected} rejected')
+        )
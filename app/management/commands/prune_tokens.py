@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from app.revocation import PRUNE_BATCH_SIZE, prune_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PRUNE_BATCH_SIZE,
+            help='Tokens deleted per transaction',
+        )
+
+    def handle(self, *args, **options):
+        count = prune_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Pruned {count} expired tokens'))
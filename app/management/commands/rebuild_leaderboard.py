@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from app.leaderboard import rebuild, refresh_trader
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed trader leaderboards'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trader',
+            type=int,
+            help='Only re-score this trader id instead of rebuilding every board',
+        )
+
+    def handle(self, *args, **options):
+        if options['trader']:
+            refresh_trader(options['trader'])
+            self.stdout.write(self.style.SUCCESS(f"Re-scored trader {options['trader']}"))
+            return
+
+        written = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} leaderboard entries'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from app.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents for news, traders and signals'
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} search documents'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from app.trader_stats import rebuild_all, rebuild_trader
+
+
+class Command(BaseCommand):
+    help = 'Recompute trader statistics from UserCopyTraderHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trader',
+            type=int,
+            help='Only rebuild this trader id',
+        )
+
+    def handle(self, *args, **options):
+        if options['trader']:
+            rebuild_trader(options['trader'])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for trader {options['trader']}"))
+            return
+
+        count = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {count} traders'))
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from app.tiered_storage import retry_pending
+
+
+class Command(BaseCommand):
+    help = 'Push staged media uploads that are still pending or failed to the remote store'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=0,
+            help='Only retry uploads untouched for this many minutes',
+        )
+
+    def handle(self, *args, **options):
+        older_than = timedelta(minutes=options['older_than']) if options['older_than'] else None
+        done, failed = retry_pending(older_than)
+        self.stdout.write(self.style.SUCCESS(f'Uploaded {done} staged files, {failed} still failing'))
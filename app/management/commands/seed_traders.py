@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from app.models import Trader
+from app.models import Trader, TraderAnalytics
 from decimal import Decimal
 
 
@@ -303,10 +303,12 @@ class Command(BaseCommand):
         updated_count = 0
 
         for trader_data in traders_data:
+            analytics_data = {field: trader_data.pop(field, []) for field in TraderAnalytics.FIELDS}
             trader, created = Trader.objects.update_or_create(
                 username=trader_data["username"],
                 defaults=trader_data
             )
+            TraderAnalytics.objects.update_or_create(trader=trader, defaults=analytics_data)
 
             if created:
                 created_count += 1
@@ -0,0 +1,161 @@
+"""
+In-process market data snapshot
+Immutable symbol -> quote map shared by the trade and valuation paths
+"""
+
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from . import caching
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+VERSION_CACHE_KEY = "market_data:version"
+
+StockQuote = namedtuple("StockQuote", [
+    "id",
+    "symbol",
+    "name",
+    "logo_url",
+    "price",
+    "change",
+    "change_percent",
+    "volume",
+    "market_cap",
+    "sector",
+    "is_featured",
+])
+
+
+class MarketSnapshot:
+    """
+    Read-only view of every active stock at one point in time.
+
+    A snapshot is never mutated after it is built; a refresh builds a new
+    one and swaps the module-level reference, so readers holding the old
+    object keep a consistent view for the rest of their request.
+    """
+
+    __slots__ = ("quotes", "by_id", "version", "built_at")
+
+    def __init__(self, quotes, version, built_at):
+        self.quotes = MappingProxyType(dict(quotes))
+        self.by_id = MappingProxyType({quote.id: quote for quote in quotes.values()})
+        self.version = version
+        self.built_at = built_at
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("MarketSnapshot is immutable")
+        super().__setattr__(name, value)
+
+    def get(self, symbol):
+        return self.quotes.get((symbol or "").upper())
+
+    def age(self, now=None):
+        """Seconds since the snapshot was built (monotonic clock)."""
+        return (time.monotonic() if now is None else now) - self.built_at
+
+    def is_stale(self, max_age, now=None):
+        return self.age(now) > max_age
+
+    def __len__(self):
+        return len(self.quotes)
+
+
+def _max_age():
+    return getattr(settings, "MARKET_SNAPSHOT_MAX_AGE", 30)
+
+
+def _current_version():
+    """
+    The shared version counter, or with a per-process cache (where bumps
+    from other workers never arrive) the newest Stock change and row count.
+    """
+    if caching.is_shared():
+        return cache.get(VERSION_CACHE_KEY, 0)
+    from .models import Stock
+
+    row = Stock.objects.aggregate(updated_at=Max("updated_at"), count=Count("id"))
+    return row["updated_at"], row["count"]
+
+
+def bump_version():
+    """
+    Mark every snapshot built before now as out of date.
+    Called when a Stock row changes so the next read rebuilds.
+    """
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+
+
+def build_snapshot(version=None, now=None):
+    """Load all active stocks in one query and freeze them into a snapshot."""
+    from .models import Stock
+
+    rows = Stock.objects.filter(is_active=True).values_list(
+        "id", "symbol", "name", "logo_url", "price", "change", "change_percent",
+        "volume", "market_cap", "sector", "is_featured",
+    )
+    quotes = {row[1]: StockQuote(*row) for row in rows}
+    return MarketSnapshot(
+        quotes,
+        _current_version() if version is None else version,
+        time.monotonic() if now is None else now,
+    )
+
+
+_snapshot = None
+_refresh_lock = threading.Lock()
+
+
+def get_snapshot(max_age=None):
+    """
+    Return the process-wide snapshot, rebuilding it when it is older than
+    ``max_age`` seconds (MARKET_SNAPSHOT_MAX_AGE) or the version was bumped.
+
+    Staleness guarantee: a returned snapshot is never older than ``max_age``
+    seconds and never predates a Stock save or delete, in any process: the
+    version comes from the shared cache when there is one and from the
+    Stock table otherwise. Changes that bypass save() (queryset updates) are
+    picked up within ``max_age``.
+    """
+    global _snapshot
+    max_age = _max_age() if max_age is None else max_age
+    version = _current_version()
+    snapshot = _snapshot
+
+    if snapshot is not None and snapshot.version == version and not snapshot.is_stale(max_age):
+        return snapshot
+
+    with _refresh_lock:
+        # Another thread may have refreshed while we waited for the lock
+        snapshot = _snapshot
+        if snapshot is None or snapshot.version != version or snapshot.is_stale(max_age):
+            snapshot = build_snapshot(version=version)
+            _snapshot = snapshot
+            logger.debug(f"Market snapshot refreshed: {len(snapshot)} symbols, version {version}")
+    return snapshot
+
+
+def get_quote(symbol, max_age=None):
+    """Quote for an active symbol, or None if it is unknown/inactive."""
+    return get_snapshot(max_age).get(symbol)
+
+
+def invalidate():
+    """Drop the local snapshot and bump the shared version."""
+    global _snapshot
+    _snapshot = None
+    bump_version()
@@ -0,0 +1,108 @@
+"""
+Media URL resolution
+Cloudinary delivery URLs built once per (public_id, version, preset) and
+served from an in-process LRU cache by every serialization loop
+"""
+
+from functools import lru_cache
+
+from cloudinary import CloudinaryResource
+from cloudinary.utils import cloudinary_url
+
+from .tiered_storage import is_pending, local_url
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Responsive transformation presets; None is the original asset
+PRESETS = {
+    None: {},
+    "thumbnail": {"width": 96, "height": 96, "crop": "fill", "gravity": "auto", "quality": "auto", "fetch_format": "auto"},
+    "card": {"width": 480, "crop": "limit", "quality": "auto", "fetch_format": "auto"},
+    "full": {"width": 1600, "crop": "limit", "quality": "auto", "fetch_format": "auto"},
+}
+
+CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _build(public_id, version, fmt, resource_type, delivery_type, preset):
+    options = dict(
+        version=version,
+        format=fmt,
+        resource_type=resource_type or "image",
+        type=delivery_type or "upload",
+    )
+    options.update(PRESETS[preset])
+    return cloudinary_url(public_id, **options)[0]
+
+
+def _key(value):
+    """(public_id, version, format, resource_type, type) of a CloudinaryField value."""
+    if not isinstance(value, CloudinaryResource) or not value.public_id:
+        return None
+    return value.public_id, value.version, value.format, value.resource_type, value.type
+
+
+def media_url(value, preset=None):
+    """
+    Delivery URL for a CloudinaryField value, or None when empty/unresolvable.
+    ``preset`` is one of PRESETS (thumbnail, card, full); None keeps the
+    original, identical to ``value.url``.
+    """
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown media preset: {preset}")
+    if is_pending(value):
+        # Still on local disk (app.tiered_storage); presets apply once it is uploaded
+        return local_url(value)
+    key = _key(value)
+    if key is None:
+        return None
+    try:
+        return _build(*key, preset)
+    except Exception as e:
+        logger.warning(f"Could not build media URL for {key[0]}: {e}")
+        return None
+
+
+def cache_info():
+    return _build.cache_info()
+
+
+def clear_cache():
+    _build.cache_clear()
+
+
+# Image columns resolved in list/detail serializers, as (model name, field)
+MEDIA_FIELDS = (
+    ("Trader", "avatar"),
+    ("Trader", "country_flag"),
+    ("News", "image"),
+    ("UserCopyTraderHistory", "custom_image"),
+)
+
+
+def prewarm(presets=(None,)):
+    """
+    Resolve every stored image URL once so the first requests after a
+    deploy hit a warm cache. Returns the number of URLs built.
+    """
+    from django.apps import apps
+
+    count = 0
+    for model_name, field in MEDIA_FIELDS:
+        model = apps.get_model("app", model_name)
+        values = (
+            model.objects.exclude(**{f"{field}__isnull": True})
+            .exclude(**{field: ""})
+            .values_list(field, flat=True)
+            .iterator(chunk_size=2000)
+        )
+        for value in values:
+            for preset in presets:
+                if media_url(value, preset):
+                    count += 1
+    logger.info(f"Prewarmed {count} media URLs ({cache_info().currsize} cached)")
+    return count
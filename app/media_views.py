@@ -0,0 +1,43 @@
+import mimetypes
+
+from cloudinary.models import CloudinaryField
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.utils.cache import patch_cache_control
+
+from .media import media_url
+from .tiered_storage import find_upload, storage
+
+# Served inline; anything else a client uploaded is sent as a download
+INLINE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp", "application/pdf"}
+
+
+def serve_pending_media(request, name):
+    """
+    A staged upload (app.tiered_storage) while its push is pending, or a
+    redirect to the remote copy once it has landed. Only files recorded in
+    MediaUpload are served.
+    """
+    upload = find_upload(name)
+    if upload is None:
+        raise Http404("Unknown upload")
+
+    if upload.status == 'done':
+        url = media_url(CloudinaryField().parse_cloudinary_resource(upload.remote_value))
+        if not url:
+            raise Http404("Unknown upload")
+        return HttpResponseRedirect(url)
+
+    content_type, _ = mimetypes.guess_type(name)
+    inline = content_type in INLINE_TYPES
+    try:
+        response = FileResponse(
+            storage.local.open(name, "rb"),
+            content_type=content_type if inline else "application/octet-stream",
+            as_attachment=not inline,
+        )
+    except (FileNotFoundError, SuspiciousFileOperation):
+        raise Http404("Unknown upload")
+    response["X-Content-Type-Options"] = "nosniff"
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
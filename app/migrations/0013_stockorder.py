@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_usercopytraderhistory_custom_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_type', models.CharField(choices=[('limit', 'Limit'), ('stop_loss', 'Stop Loss'), ('take_profit', 'Take Profit')], max_length=20)),
+                ('side', models.CharField(choices=[('buy', 'Buy'), ('sell', 'Sell')], max_length=10)),
+                ('shares', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('trigger_price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('trigger_direction', models.CharField(choices=[('below', 'Price at or below trigger'), ('above', 'Price at or above trigger')], help_text='Derived from order type and side', max_length=10)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('filled', 'Filled'), ('cancelled', 'Cancelled'), ('rejected', 'Rejected')], default='open', max_length=20)),
+                ('reference', models.CharField(max_length=100, unique=True)),
+                ('filled_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('filled_at', models.DateTimeField(blank=True, null=True)),
+                ('reject_reason', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orders', to='app.stock')),
+                ('trade', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order', to='app.tradehistory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Stock Order',
+                'verbose_name_plural': 'Stock Orders',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['stock', 'status', 'trigger_direction', 'trigger_price'], name='app_stockor_stock_i_96db9f_idx'), models.Index(fields=['user', 'status', '-created_at'], name='app_stockor_user_id_787bb4_idx')],
+            },
+        ),
+    ]
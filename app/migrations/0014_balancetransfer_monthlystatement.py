@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_stockorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceTransfer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('direction', models.CharField(choices=[('balance_to_profit', 'Balance to Profit'), ('profit_to_balance', 'Profit to Balance')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('reference', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_transfers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Balance Transfer',
+                'verbose_name_plural': 'Balance Transfers',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='app_balance_user_id_ea9438_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('deposits_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('deposits_count', models.PositiveIntegerField(default=0)),
+                ('withdrawals_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('withdrawals_count', models.PositiveIntegerField(default=0)),
+                ('trade_profit_loss', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('trades_count', models.PositiveIntegerField(default=0)),
+                ('signal_purchases_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('signal_purchases_count', models.PositiveIntegerField(default=0)),
+                ('transfers_to_profit', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('transfers_to_balance', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('transfers_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_statements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Monthly Statement',
+                'verbose_name_plural': 'Monthly Statements',
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'month'), name='unique_monthly_statement')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_balancetransfer_monthlystatement'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='app_transac_user_id_e10270_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', '-created_at', '-id'], name='app_transac_user_id_b4e554_idx'),
+        ),
+    ]
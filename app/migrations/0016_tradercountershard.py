@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_transaction_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TraderCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=30)),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('delta', models.IntegerField(default=0)),
+                ('trader', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='app.trader')),
+            ],
+            options={
+                'verbose_name': 'Trader Counter Shard',
+                'verbose_name_plural': 'Trader Counter Shards',
+                'constraints': [models.UniqueConstraint(fields=('trader', 'field', 'shard'), name='unique_trader_counter_shard')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+ANALYTICS_FIELDS = ('portfolio_breakdown', 'top_traded', 'performance_data', 'monthly_performance', 'frequently_traded')
+
+
+def copy_analytics(apps, schema_editor):
+    Trader = apps.get_model('app', 'Trader')
+    TraderAnalytics = apps.get_model('app', 'TraderAnalytics')
+    TraderAnalytics.objects.bulk_create([
+        TraderAnalytics(trader_id=row['id'], **{f: row[f] or [] for f in ANALYTICS_FIELDS})
+        for row in Trader.objects.values('id', *ANALYTICS_FIELDS).iterator()
+    ], batch_size=500)
+
+
+def restore_analytics(apps, schema_editor):
+    Trader = apps.get_model('app', 'Trader')
+    TraderAnalytics = apps.get_model('app', 'TraderAnalytics')
+    for row in TraderAnalytics.objects.values('trader_id', *ANALYTICS_FIELDS).iterator():
+        Trader.objects.filter(pk=row.pop('trader_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_tradercountershard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TraderAnalytics',
+            fields=[
+                ('trader', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='analytics', serialize=False, to='app.trader')),
+                ('portfolio_breakdown', models.JSONField(blank=True, default=list, help_text='Portfolio allocation, e.g. [{"name": "ETF", "percentage": 25}, {"name": "Crypto", "percentage": 25}, {"name": "Futures", "percentage": 50}]')),
+                ('top_traded', models.JSONField(blank=True, default=list, help_text='Top traded assets with stats, e.g. [{"name": "Apple Inc", "ticker": "AAPL", "avg_profit": 12.5, "avg_loss": -3.2, "profitable_pct": 78}]')),
+                ('performance_data', models.JSONField(blank=True, default=list, help_text='Monthly performance data as list of {month, value}')),
+                ('monthly_performance', models.JSONField(blank=True, default=list, help_text='Monthly performance percentages as list of {month, percentage}')),
+                ('frequently_traded', models.JSONField(blank=True, default=list, help_text='List of frequently traded assets')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Trader Analytics',
+                'verbose_name_plural': 'Trader Analytics',
+            },
+        ),
+        migrations.RunPython(copy_analytics, restore_analytics),
+        migrations.RemoveField(
+            model_name='trader',
+            name='frequently_traded',
+        ),
+        migrations.RemoveField(
+            model_name='trader',
+            name='monthly_performance',
+        ),
+        migrations.RemoveField(
+            model_name='trader',
+            name='performance_data',
+        ),
+        migrations.RemoveField(
+            model_name='trader',
+            name='portfolio_breakdown',
+        ),
+        migrations.RemoveField(
+            model_name='trader',
+            name='top_traded',
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_traderanalytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=50)),
+                ('metric', models.CharField(choices=[('gain', 'Gain'), ('win_rate', 'Win Rate'), ('risk_adjusted', 'Risk-Adjusted Return'), ('copier_growth', 'Copier Growth'), ('score_7d', '7-Day Score')], max_length=20)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.DecimalField(decimal_places=4, max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Leaderboard Entry',
+                'verbose_name_plural': 'Leaderboard Entries',
+                'ordering': ['category', 'metric', 'rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trader',
+            index=models.Index(fields=['-gain', '-copiers'], name='app_trader_gain_1462d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trader',
+            index=models.Index(fields=['is_active', 'category'], name='app_trader_is_acti_b8a7ed_idx'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='trader',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='app.trader'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['category', 'metric', 'rank'], name='app_leaderb_categor_e3a142_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('category', 'metric', 'trader'), name='unique_leaderboard_trader'),
+        ),
+    ]
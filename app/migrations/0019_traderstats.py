@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TraderStats',
+            fields=[
+                ('trader', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='app.trader')),
+                ('open_trades', models.PositiveIntegerField(default=0)),
+                ('closed_trades', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('profit_percent_sum', models.DecimalField(decimal_places=2, default=0.0, max_digits=20)),
+                ('loss_percent_sum', models.DecimalField(decimal_places=2, default=0.0, max_digits=20)),
+                ('market_counts', models.JSONField(blank=True, default=dict, help_text='Trades per market, e.g. {"AAPL": 12, "TSLA": 4}')),
+                ('monthly_closed', models.JSONField(blank=True, default=dict, help_text='Closed trades per month, e.g. {"2025-01": 30}')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Trader Stats',
+                'verbose_name_plural': 'Trader Stats',
+            },
+        ),
+    ]
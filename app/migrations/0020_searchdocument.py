@@ -0,0 +1,134 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:37
+
+from django.db import migrations, models
+
+
+FTS_TABLE = 'app_searchdocument_fts'
+
+SQLITE_FORWARD = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, body, content='app_searchdocument', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER app_searchdocument_ai AFTER INSERT ON app_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    f"""CREATE TRIGGER app_searchdocument_ad AFTER DELETE ON app_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    f"""CREATE TRIGGER app_searchdocument_au AFTER UPDATE ON app_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS app_searchdocument_au",
+    "DROP TRIGGER IF EXISTS app_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS app_searchdocument_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_FORWARD = [
+    """ALTER TABLE app_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX app_searchdocument_vector_gin ON app_searchdocument USING gin (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS app_searchdocument_vector_gin",
+    "ALTER TABLE app_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+
+# Note: on SQLite, any later migration that remakes app_searchdocument drops
+# these triggers with the old table and has to create them again.
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        try:
+            _run(schema_editor, SQLITE_FORWARD)
+        except Exception:
+            # SQLite built without FTS5: app.search falls back to the basic backend
+            pass
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+def _tags(tags):
+    return " ".join(map(str, tags or []))
+
+
+def populate(apps, schema_editor):
+    # Mirrors app.search.document_for for the rows that exist at migration time
+    SearchDocument = apps.get_model('app', 'SearchDocument')
+    News = apps.get_model('app', 'News')
+    Trader = apps.get_model('app', 'Trader')
+    Signal = apps.get_model('app', 'Signal')
+
+    docs = []
+    for n in News.objects.iterator():
+        docs.append(SearchDocument(
+            kind='news', object_id=n.pk, title=n.title,
+            body="\n".join(p for p in (n.summary, n.content, _tags(n.tags)) if p),
+            is_public=True, published_at=n.published_at,
+        ))
+    for t in Trader.objects.iterator():
+        docs.append(SearchDocument(
+            kind='trader', object_id=t.pk, title=f"{t.name} {t.username}",
+            body="\n".join(p for p in (t.country, t.get_category_display(), t.bio, _tags(t.tags)) if p),
+            is_public=t.is_active, published_at=t.created_at,
+        ))
+    for s in Signal.objects.iterator():
+        docs.append(SearchDocument(
+            kind='signal', object_id=s.pk, title=s.name,
+            body="\n".join(p for p in (s.get_signal_type_display(), s.action, s.timeframe, s.market_analysis) if p),
+            is_public=s.is_active, published_at=s.created_at,
+        ))
+    SearchDocument.objects.bulk_create(docs, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_traderstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('news', 'News'), ('trader', 'Trader'), ('signal', 'Signal')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True, default='')),
+                ('is_public', models.BooleanField(default=True)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
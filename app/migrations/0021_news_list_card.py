@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='list_card',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Precomputed list representation (no content body, image URL resolved)'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['-is_featured', '-published_at'], name='app_news_is_feat_1c0280_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['category', '-is_featured', '-published_at'], name='app_news_categor_8cc67c_idx'),
+        ),
+    ]
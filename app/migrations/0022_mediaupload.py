@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_news_list_card'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100)),
+                ('object_id', models.CharField(max_length=64)),
+                ('field_name', models.CharField(max_length=100)),
+                ('pending_value', models.CharField(help_text='Placeholder stored in the field until the upload lands', max_length=255)),
+                ('remote_value', models.CharField(blank=True, default='', max_length=255)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Media Upload',
+                'verbose_name_plural': 'Media Uploads',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['pending_value'], name='app_mediaup_pending_bd61f5_idx'), models.Index(fields=['status', 'updated_at'], name='app_mediaup_status_673746_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_mediaupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='public_id of the original', max_length=255, unique=True)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('blurhash', models.CharField(blank=True, default='', max_length=64)),
+                ('variants', models.JSONField(blank=True, default=dict, help_text='{"webp": {"320": "<stored value>", ...}, ...}')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Processed Image',
+                'verbose_name_plural': 'Processed Images',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:46
+
+from django.db import migrations, models
+
+
+def prepare_account_ids(apps, schema_editor):
+    CustomUser = apps.get_model('app', 'CustomUser')
+    AccountSequence = apps.get_model('app', 'AccountSequence')
+    # Blank ids would collide under the new unique constraint; NULLs do not
+    CustomUser.objects.filter(account_id='').update(account_id=None)
+    AccountSequence.objects.get_or_create(name='account')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_processedimage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Account Sequence',
+                'verbose_name_plural': 'Account Sequences',
+            },
+        ),
+        migrations.RunPython(prepare_account_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='customuser',
+            name='account_id',
+            field=models.CharField(blank=True, max_length=10, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0024_accountsequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='token_epoch',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped to revoke every JWT issued to the user (TOKEN_REVOCATION_MODE epoch/dual)'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0025_customuser_token_epoch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('newest_at', models.DateTimeField()),
+                ('oldest_at', models.DateTimeField()),
+                ('count', models.PositiveIntegerField()),
+                ('type_counts', models.JSONField(blank=True, default=dict, help_text='Notifications per type, e.g. {"trade": 120}')),
+                ('payload', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_archives', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Notification Archive',
+                'verbose_name_plural': 'Notification Archives',
+                'indexes': [models.Index(fields=['user', '-newest_at'], name='app_notific_user_id_4d1a09_idx')],
+            },
+        ),
+    ]
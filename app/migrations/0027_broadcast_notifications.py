@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0026_notificationarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('audience', models.CharField(choices=[('trader_copiers', 'Trader Copiers'), ('all_users', 'All Users'), ('segment', 'Segment')], default='all_users', max_length=20)),
+                ('segment', models.JSONField(blank=True, default=dict, help_text='User filter for the segment audience, e.g. {"country": ["US", "CA"], "is_verified": true}')),
+                ('kind', models.CharField(choices=[('copy_trade', 'Copy Trade'), ('announcement', 'Announcement')], default='announcement', max_length=20)),
+                ('type', models.CharField(choices=[('trade', 'Trade'), ('deposit', 'Deposit'), ('withdrawal', 'Withdrawal'), ('alert', 'Alert'), ('system', 'System'), ('news', 'News')], default='system', max_length=20)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('full_details', models.TextField(blank=True, default='')),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('trader', models.ForeignKey(blank=True, help_text='Trader whose copiers receive this (trader_copiers audience)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='broadcasts', to='app.trader')),
+            ],
+            options={
+                'verbose_name': 'Broadcast Notification',
+                'verbose_name_plural': 'Broadcast Notifications',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(auto_now_add=True)),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='app.broadcastnotification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_receipts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Broadcast Receipt',
+                'verbose_name_plural': 'Broadcast Receipts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='broadcastnotification',
+            index=models.Index(fields=['audience', '-created_at'], name='app_broadca_audienc_501d22_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcastnotification',
+            index=models.Index(fields=['trader', '-created_at'], name='app_broadca_trader__ed8e89_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='broadcastreceipt',
+            unique_together={('broadcast', 'user')},
+        ),
+    ]
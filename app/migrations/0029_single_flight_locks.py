@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0028_rate_limit_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SingleFlightLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('owner', models.CharField(max_length=32)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Single Flight Lock',
+                'verbose_name_plural': 'Single Flight Locks',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0029_single_flight_locks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceNodeLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('node', models.PositiveSmallIntegerField(unique=True)),
+                ('owner', models.CharField(max_length=100)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Reference Node Lease',
+                'verbose_name_plural': 'Reference Node Leases',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0030_reference_node_leases'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='leaderboardentry',
+            options={'ordering': ['category', 'metric', '-score', 'trader'], 'verbose_name': 'Leaderboard Entry', 'verbose_name_plural': 'Leaderboard Entries'},
+        ),
+        migrations.RemoveIndex(
+            model_name='leaderboardentry',
+            name='app_leaderb_categor_e3a142_idx',
+        ),
+        migrations.RemoveField(
+            model_name='leaderboardentry',
+            name='rank',
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['category', 'metric', '-score', 'trader'], name='app_leaderb_categor_0b84c9_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_copiers(apps, schema_editor):
+    BroadcastNotification = apps.get_model('app', 'BroadcastNotification')
+    BroadcastCopier = apps.get_model('app', 'BroadcastCopier')
+    CustomUser = apps.get_model('app', 'CustomUser')
+    users = set(CustomUser.objects.values_list('id', flat=True))
+    for broadcast in BroadcastNotification.objects.filter(kind='copy_trade').iterator():
+        copiers = broadcast.metadata.pop('copiers', None) or {}
+        BroadcastCopier.objects.bulk_create([
+            BroadcastCopier(
+                broadcast=broadcast,
+                user_id=int(user_id),
+                investment=entry['investment'],
+                profit_loss=entry['profit_loss'],
+            )
+            for user_id, entry in copiers.items()
+            if int(user_id) in users
+        ])
+        broadcast.save(update_fields=['metadata'])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0031_leaderboard_rank_at_read'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastCopier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('investment', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('profit_loss', models.DecimalField(decimal_places=4, max_digits=24)),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='copiers', to='app.broadcastnotification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_copies', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Broadcast Copier',
+                'verbose_name_plural': 'Broadcast Copiers',
+                'unique_together': {('user', 'broadcast')},
+            },
+        ),
+        migrations.RunPython(move_copiers, migrations.RunPython.noop),
+    ]
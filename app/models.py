@@ -1,14 +1,14 @@
-import random
 from django.utils.html import format_html
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from decimal import Decimal
 
 from django.db.models.signals import pre_save
+from django.core.signals import request_started
 from django.dispatch import receiver
 
 from cloudinary.models import CloudinaryField
@@ -17,17 +17,35 @@ from cloudinary.models import CloudinaryField
 
 
 class CustomUserManager(BaseUserManager):
+    ID_ATTEMPTS = 3
+
     def create_user(self, email, password=None, **extra_fields):
         """
         Create and return a user with an email and password.
         """
         if not email:
             raise ValueError("The Email field must be set")
+        from .hashing import set_password
+        from .identifiers import assign
+
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
-        user.save(using=self._db)
-        return user
+        # Hashed on the hashing executor (may raise HashingBusy)
+        set_password(user, password)
+
+        # account_id and referral_code are allocated up front, so the user is
+        # written by a single INSERT; uniqueness is left to the constraints
+        for attempt in range(self.ID_ATTEMPTS):
+            assign(user)
+            try:
+                with transaction.atomic(using=self._db):
+                    user.save(using=self._db)
+                return user
+            except IntegrityError:
+                if attempt == self.ID_ATTEMPTS - 1 or self.filter(email=email).exists():
+                    raise
+                # Collided with a legacy account id / referral code: draw again
+                user.account_id = user.referral_code = None
 
     def create_superuser(self, email, password=None, **extra_fields):
         """
@@ -215,7 +233,7 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     )
 
     # User Balances
-    account_id = models.CharField(max_length=10, blank=True, null=True)
+    account_id = models.CharField(max_length=10, unique=True, blank=True, null=True)
     balance = models.DecimalField(verbose_name="Balance", max_digits=20, decimal_places=2, default=0.00, help_text="This is a monetary value.")
     profit = models.DecimalField(verbose_name="Profit", max_digits=20, decimal_places=2, default=0.00, help_text="This is a monetary value.")
     
@@ -286,6 +304,11 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         help_text="Allow user to transfer between balance and profit"
     )
 
+    token_epoch = models.PositiveIntegerField(
+        default=0,
+        help_text="Bumped to revoke every JWT issued to the user (TOKEN_REVOCATION_MODE epoch/dual)"
+    )
+
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(default=timezone.now)
@@ -303,50 +326,32 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         return self.email
 
 
-def generate_unique_account_id():
-    while True:
-        account_id = str(random.randint(10**9, 10**10 - 1))  # 10-digit number
-        if not CustomUser.objects.filter(account_id=account_id).exists():
-            return account_id
-
-
-def generate_unique_referral_code():
-    """Generate a unique 8-character referral code"""
-    import string
-    import random
-    
-    while True:
-        # Generate code with letters and numbers
-        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-        if not CustomUser.objects.filter(referral_code=code).exists():
-            return code
+class AccountSequence(models.Model):
+    """
+    Named counter behind app.identifiers; processes reserve blocks of values
+    from it (hi/lo) and derive account ids and referral codes locally.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
 
+    class Meta:
+        verbose_name = "Account Sequence"
+        verbose_name_plural = "Account Sequences"
 
+    def __str__(self):
+        return f"{self.name} ({self.next_value})"
 
 
-# SINGLE COMBINED SIGNAL (replaces both above)
-@receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def create_auth_token(sender, instance=None, created=False, **kwargs):
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def assign_account_identifiers(sender, instance=None, raw=False, **kwargs):
     """
-    Auto-create auth token and generate unique IDs for new users
+    Generate account_id / referral_code for users created without
+    create_user (admin, scripts), in the same INSERT
     """
-    if created:
-        # Track if we need to save
-        fields_to_update = []
-
-        # Generate account_id if missing
-        if not instance.account_id:
-            instance.account_id = generate_unique_account_id()
-            fields_to_update.append("account_id")
-            
-        # Generate referral_code if missing
-        if not instance.referral_code:
-            instance.referral_code = generate_unique_referral_code()
-            fields_to_update.append("referral_code")
-        
-        # Only save if we generated something
-        if fields_to_update:
-            instance.save(update_fields=fields_to_update)
+    if raw or not instance._state.adding:
+        return
+    from .identifiers import assign
+    assign(instance)
 
 
 class Portfolio(models.Model):
@@ -579,6 +584,51 @@ class Trader(models.Model):
         help_text="Total cumulative copiers (all time)"
     )
 
+    # Metadata
+    is_active = models.BooleanField(
+        default=True,
+        help_text="Is this trader available for copying?"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Copy Traders"
+        verbose_name = "Trader"
+        ordering = ["-gain", "-copiers"]
+        indexes = [
+            models.Index(fields=['-gain', '-copiers']),
+            models.Index(fields=['is_active', 'category']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.country})"
+    
+    @property
+    def win_rate(self):
+        """Calculate win rate percentage"""
+        total = self.total_wins + self.total_losses
+        if total == 0:
+            return 0
+        return (self.total_wins / total) * 100
+
+
+
+class TraderAnalytics(models.Model):
+    """
+    Heavy JSON analytics for a trader, kept out of the Trader row so list
+    pages don't read them. Loaded only by the trader detail/edit paths.
+    """
+
+    FIELDS = ('portfolio_breakdown', 'top_traded', 'performance_data', 'monthly_performance', 'frequently_traded')
+
+    trader = models.OneToOneField(
+        Trader,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='analytics'
+    )
+
     # Portfolio breakdown
     portfolio_breakdown = models.JSONField(
         default=list,
@@ -610,31 +660,159 @@ class Trader(models.Model):
         help_text="List of frequently traded assets"
     )
 
-    # Metadata
-    is_active = models.BooleanField(
-        default=True,
-        help_text="Is this trader available for copying?"
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Trader Analytics"
+        verbose_name_plural = "Trader Analytics"
+
+    def __str__(self):
+        return f"Analytics for {self.trader_id}"
+
+
+class TraderStats(models.Model):
+    """
+    Figures derived from a trader's UserCopyTraderHistory, kept up to date
+    row by row by app.trader_stats instead of aggregated per request.
+    """
+    trader = models.OneToOneField(
+        Trader,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    open_trades = models.PositiveIntegerField(default=0)
+    closed_trades = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    profit_percent_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0.00)
+    loss_percent_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0.00)
+    market_counts = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Trades per market, e.g. {"AAPL": 12, "TSLA": 4}'
+    )
+    monthly_closed = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Closed trades per month, e.g. {"2025-01": 30}'
     )
-    created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        verbose_name_plural = "Copy Traders"
-        verbose_name = "Trader"
-        ordering = ["-gain", "-copiers"]
+        verbose_name = "Trader Stats"
+        verbose_name_plural = "Trader Stats"
 
     def __str__(self):
-        return f"{self.name} ({self.country})"
-    
+        return f"Stats for {self.trader_id}"
+
     @property
-    def win_rate(self):
-        """Calculate win rate percentage"""
-        total = self.total_wins + self.total_losses
-        if total == 0:
-            return 0
-        return (self.total_wins / total) * 100
+    def avg_profit_percent(self):
+        if not self.wins:
+            return Decimal('0.00')
+        return (Decimal(self.profit_percent_sum) / self.wins).quantize(Decimal('0.01'))
+
+    @property
+    def avg_loss_percent(self):
+        if not self.losses:
+            return Decimal('0.00')
+        return (Decimal(self.loss_percent_sum) / self.losses).quantize(Decimal('0.01'))
+
+    def trades_last_12_months(self, today=None):
+        today = today or timezone.localdate()
+        months = set()
+        year, month = today.year, today.month
+        for _ in range(12):
+            months.add(f"{year:04d}-{month:02d}")
+            year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        return sum(n for key, n in self.monthly_closed.items() if key in months)
+
+    def frequently_traded(self, limit=10):
+        ranked = sorted(self.market_counts.items(), key=lambda item: (-item[1], item[0]))
+        return [market for market, _ in ranked[:limit]]
+
+
+@receiver(post_save, sender=Trader)
+def create_trader_analytics(sender, instance=None, created=False, **kwargs):
+    if created:
+        TraderAnalytics.objects.get_or_create(trader=instance)
 
 
+@receiver(post_save, sender=Trader)
+def index_trader(sender, instance=None, **kwargs):
+    from .search import index_object
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Trader)
+def unindex_trader(sender, instance=None, **kwargs):
+    from .search import remove_object
+    remove_object(instance)
+
+
+class TraderCounterShard(models.Model):
+    """
+    Pending delta for one trader counter, spread over N rows so hot traders
+    don't serialize every copy click on the Trader row lock.
+    Folded back into Trader by the fold_trader_counters command.
+    """
+    trader = models.ForeignKey(Trader, on_delete=models.CASCADE, related_name='counter_shards')
+    field = models.CharField(max_length=30)
+    shard = models.PositiveSmallIntegerField()
+    delta = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Trader Counter Shard"
+        verbose_name_plural = "Trader Counter Shards"
+        constraints = [
+            models.UniqueConstraint(fields=['trader', 'field', 'shard'], name='unique_trader_counter_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.trader_id}.{self.field}[{self.shard}] {self.delta:+d}"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    One trader's score on a precomputed leaderboard.
+    Maintained by app.leaderboard; ranks are read off the score index.
+    """
+    METRIC_CHOICES = [
+        ('gain', 'Gain'),
+        ('win_rate', 'Win Rate'),
+        ('risk_adjusted', 'Risk-Adjusted Return'),
+        ('copier_growth', 'Copier Growth'),
+        ('score_7d', '7-Day Score'),
+    ]
+
+    category = models.CharField(max_length=50)
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    trader = models.ForeignKey(Trader, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    score = models.DecimalField(max_digits=20, decimal_places=4)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Leaderboard Entry"
+        verbose_name_plural = "Leaderboard Entries"
+        ordering = ['category', 'metric', '-score', 'trader']
+        indexes = [
+            models.Index(fields=['category', 'metric', '-score', 'trader']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'metric', 'trader'], name='unique_leaderboard_trader'),
+        ]
+
+    def __str__(self):
+        return f"{self.category}/{self.metric} {self.trader_id}: {self.score}"
+
+
+@receiver(post_save, sender=Trader)
+def refresh_trader_leaderboard(sender, instance=None, **kwargs):
+    from django.db import transaction
+    from .leaderboard import refresh_trader
+
+    transaction.on_commit(lambda: refresh_trader(instance.pk))
+
 
 # Admin will update this by himself
 class UserCopyTraderHistory(models.Model):
@@ -933,8 +1111,8 @@ class UserCopyTraderHistory(models.Model):
     def save(self, *args, **kwargs):
         """Auto-generate reference if not provided"""
         if not self.reference:
-            from django.utils.crypto import get_random_string
-            self.reference = f"TRD-{get_random_string(12).upper()}"
+            from .references import new_reference
+            self.reference = new_reference("TRD")
         super().save(*args, **kwargs)
 
 
@@ -1020,6 +1198,61 @@ class UserTraderCopy(models.Model):
 
 
 
+@receiver(pre_save, sender=UserCopyTraderHistory)
+def capture_trade_snapshot(sender, instance=None, raw=False, **kwargs):
+    """
+    The row as stored before this save, read once for both post_save users:
+    trader stats (_stats_snapshot) and, since a direct trade's closed_at can
+    be edited, the statement month it leaves (_statement_previous).
+    """
+    from .trader_stats import SNAPSHOT_FIELDS, snapshot
+
+    previous = None
+    if instance.pk:
+        previous = UserCopyTraderHistory.objects.filter(pk=instance.pk).values('user_id', *SNAPSHOT_FIELDS).first()
+    instance._stats_snapshot = snapshot(previous)
+    if previous and not raw and instance.user_id is not None:
+        instance._statement_previous = (previous['user_id'], previous['closed_at'])
+
+
+@receiver(post_save, sender=UserCopyTraderHistory)
+def update_trader_stats(sender, instance=None, **kwargs):
+    from .trader_stats import record_change, snapshot_of
+
+    record_change(getattr(instance, '_stats_snapshot', None), snapshot_of(instance))
+    instance._stats_snapshot = snapshot_of(instance)
+
+
+@receiver(post_delete, sender=UserCopyTraderHistory)
+def remove_trader_stats(sender, instance=None, **kwargs):
+    from .trader_stats import record_change, snapshot_of
+
+    record_change(snapshot_of(instance), None)
+
+
+@receiver(post_save, sender=UserCopyTraderHistory)
+def refresh_leaderboard_on_close(sender, instance=None, **kwargs):
+    """Closed trader trades move the trader's win/loss and gain metrics."""
+    if instance.status != 'closed' or not instance.trader_id:
+        return
+    from django.db import transaction
+    from .leaderboard import refresh_trader
+
+    trader_id = instance.trader_id
+    transaction.on_commit(lambda: refresh_trader(trader_id))
+
+
+@receiver(post_save, sender=UserTraderCopy)
+def refresh_leaderboard_on_copy(sender, instance=None, created=False, **kwargs):
+    """New copiers move the copier_growth board."""
+    if not created:
+        return
+    from django.db import transaction
+    from .leaderboard import refresh_trader
+
+    trader_id = instance.trader_id
+    transaction.on_commit(lambda: refresh_trader(trader_id))
+
 
 # @receiver(pre_save, sender=Trader)
 # def check_trader_threshold_change(sender, instance, **kwargs):
@@ -1162,7 +1395,8 @@ class Transaction(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.reference:
-            self.reference = f"TXN-{random.randint(100000, 999999)}-{self.user.id}"
+            from .references import new_reference
+            self.reference = new_reference("TXN")
         super().save(*args, **kwargs)
 
 
@@ -1173,6 +1407,93 @@ class Transaction(models.Model):
         ordering = ['-created_at']
         verbose_name_plural = "Transactions"
         verbose_name = "Transaction"
+        indexes = [
+            # History pages: keyset pagination on (created_at, id) per user and type
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['user', 'transaction_type', '-created_at', '-id']),
+        ]
+
+class BalanceTransfer(models.Model):
+    """Record of a user moving funds between balance and profit"""
+
+    DIRECTION_CHOICES = [
+        ('balance_to_profit', 'Balance to Profit'),
+        ('profit_to_balance', 'Profit to Balance'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="balance_transfers"
+    )
+    direction = models.CharField(max_length=20, choices=DIRECTION_CHOICES)
+    amount = models.DecimalField(max_digits=20, decimal_places=2)
+    reference = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Balance Transfer"
+        verbose_name_plural = "Balance Transfers"
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.reference:
+            from .references import new_reference
+            self.reference = new_reference("TRF")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.user.email} - {self.get_direction_display()} - {self.amount}"
+
+
+class MonthlyStatement(models.Model):
+    """
+    Immutable per-user rollup of one closed calendar month.
+    Built lazily by app.statements (or the build_monthly_statements command)
+    once the month is over; the current month is always computed from raw rows.
+    Deleted (and later rebuilt) when a row of the month changes afterwards.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="monthly_statements"
+    )
+    month = models.DateField(help_text="First day of the month")
+
+    deposits_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    deposits_count = models.PositiveIntegerField(default=0)
+    withdrawals_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    withdrawals_count = models.PositiveIntegerField(default=0)
+    trade_profit_loss = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    trades_count = models.PositiveIntegerField(default=0)
+    signal_purchases_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    signal_purchases_count = models.PositiveIntegerField(default=0)
+    transfers_to_profit = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    transfers_to_balance = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    transfers_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-month']
+        verbose_name = "Monthly Statement"
+        verbose_name_plural = "Monthly Statements"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='unique_monthly_statement'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Monthly statements are immutable; delete and rebuild instead")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.user.email} - {self.month:%Y-%m}"
+
 
 class Ticket(models.Model):
     user = models.ForeignKey(
@@ -1364,6 +1685,12 @@ class News(models.Model):
         default=False,
         help_text="Mark as featured article"
     )
+    list_card = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Precomputed list representation (no content body, image URL resolved)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1371,10 +1698,90 @@ class News(models.Model):
         verbose_name = "News Article"
         verbose_name_plural = "News Articles"
         ordering = ["-published_at"]
+        indexes = [
+            models.Index(fields=['-is_featured', '-published_at']),
+            models.Index(fields=['category', '-is_featured', '-published_at']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.category}"
-    
+
+    def build_list_card(self):
+        from .images import describe
+        from .media import media_url
+
+        return {
+            "id": self.id,
+            "title": self.title,
+            "summary": self.summary,
+            "category": self.category,
+            "source": self.source,
+            "author": self.author,
+            "published_at": self.published_at.isoformat() if self.published_at else None,
+            "image_url": media_url(self.image),
+            "image": describe(self.image),
+            "tags": self.tags,
+            "is_featured": self.is_featured,
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Built after the save so the image has been uploaded and the id exists
+        card = self.build_list_card()
+        if card != self.list_card:
+            self.list_card = card
+            News.objects.filter(pk=self.pk).update(list_card=card)
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized text of a searchable object (news, trader, signal).
+    Indexed by the active app.search backend: a generated tsvector column with
+    a GIN index on Postgres, an external-content FTS5 table on SQLite.
+    """
+    KIND_CHOICES = [
+        ('news', 'News'),
+        ('trader', 'Trader'),
+        ('signal', 'Signal'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default="")
+    is_public = models.BooleanField(default=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Search Document"
+        verbose_name_plural = "Search Documents"
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.title}"
+
+
+@receiver(post_save, sender=News)
+def index_news(sender, instance=None, **kwargs):
+    from .search import index_object
+    index_object(instance)
+
+
+@receiver(post_delete, sender=News)
+def unindex_news(sender, instance=None, **kwargs):
+    from .search import remove_object
+    remove_object(instance)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_detail(sender, instance=None, **kwargs):
+    from .news_views import invalidate_news_detail_cache
+    invalidate_news_detail_cache(instance.pk)
+
 
 
 class Notification(models.Model):
@@ -1449,7 +1856,129 @@ class Notification(models.Model):
     
     def __str__(self):
         return f"{self.user.email} - {self.type} - {self.title}"
-    
+
+
+class NotificationArchive(models.Model):
+    """
+    A segment of one user's archived notifications (app.notification_archive):
+    up to SEGMENT_SIZE API-shaped notifications, newest first, zlib-compressed JSON.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notification_archives',
+    )
+    newest_at = models.DateTimeField()
+    oldest_at = models.DateTimeField()
+    count = models.PositiveIntegerField()
+    type_counts = models.JSONField(default=dict, blank=True, help_text='Notifications per type, e.g. {"trade": 120}')
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Notification Archive"
+        verbose_name_plural = "Notification Archives"
+        indexes = [
+            models.Index(fields=['user', '-newest_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.count} notifications ({self.oldest_at:%Y-%m-%d} - {self.newest_at:%Y-%m-%d})"
+
+
+class BroadcastNotification(models.Model):
+    """
+    A notification stored once for an audience and merged into each member's
+    feed at read time (app.broadcasts). Copy-trade broadcasts keep each
+    copier's investment and P/L at publish time in BroadcastCopier.
+    """
+    AUDIENCE_CHOICES = [
+        ('trader_copiers', 'Trader Copiers'),
+        ('all_users', 'All Users'),
+        ('segment', 'Segment'),
+    ]
+
+    KIND_CHOICES = [
+        ('copy_trade', 'Copy Trade'),
+        ('announcement', 'Announcement'),
+    ]
+
+    audience = models.CharField(max_length=20, choices=AUDIENCE_CHOICES, default='all_users')
+    trader = models.ForeignKey(
+        Trader,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='broadcasts',
+        help_text="Trader whose copiers receive this (trader_copiers audience)"
+    )
+    segment = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='User filter for the segment audience, e.g. {"country": ["US", "CA"], "is_verified": true}'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='announcement')
+    type = models.CharField(max_length=20, choices=Notification.TYPE_CHOICES, default='system')
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    full_details = models.TextField(blank=True, default='')
+    metadata = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Broadcast Notification"
+        verbose_name_plural = "Broadcast Notifications"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=['audience', '-created_at']),
+            models.Index(fields=['trader', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_audience_display()} - {self.title}"
+
+
+class BroadcastReceipt(models.Model):
+    """A user's read marker for a broadcast."""
+    broadcast = models.ForeignKey(BroadcastNotification, on_delete=models.CASCADE, related_name='receipts')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='broadcast_receipts',
+    )
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Broadcast Receipt"
+        verbose_name_plural = "Broadcast Receipts"
+        unique_together = ['broadcast', 'user']
+
+    def __str__(self):
+        return f"{self.user_id} read {self.broadcast_id}"
+
+
+class BroadcastCopier(models.Model):
+    """
+    A copier a copy-trade broadcast was published to, with their investment
+    and P/L at publish time. Keyed by user, so a feed reads only its own rows.
+    """
+    broadcast = models.ForeignKey(BroadcastNotification, on_delete=models.CASCADE, related_name='copiers')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='broadcast_copies',
+    )
+    investment = models.DecimalField(max_digits=20, decimal_places=2)
+    profit_loss = models.DecimalField(max_digits=24, decimal_places=4)
+
+    class Meta:
+        verbose_name = "Broadcast Copier"
+        verbose_name_plural = "Broadcast Copiers"
+        unique_together = ['user', 'broadcast']
+
+    def __str__(self):
+        return f"{self.user_id} copied {self.broadcast_id}"
+
 
 
 # ADD THIS TO YOUR EXISTING models.py FILE AT THE END
@@ -1571,16 +2100,28 @@ class Stock(models.Model):
     @property
     def formatted_market_cap(self):
         """Return formatted market cap"""
-        if self.market_cap >= 1_000_000_000_000:
-            return f"${self.market_cap / 1_000_000_000_000:.2f}T"
-        elif self.market_cap >= 1_000_000_000:
-            return f"${self.market_cap / 1_000_000_000:.2f}B"
-        elif self.market_cap >= 1_000_000:
-            return f"${self.market_cap / 1_000_000:.2f}M"
-        return f"${self.market_cap:,}"
+        return self.format_market_cap(self.market_cap)
+
+    @staticmethod
+    def format_market_cap(market_cap):
+        if market_cap >= 1_000_000_000_000:
+            return f"${market_cap / 1_000_000_000_000:.2f}T"
+        elif market_cap >= 1_000_000_000:
+            return f"${market_cap / 1_000_000_000:.2f}B"
+        elif market_cap >= 1_000_000:
+            return f"${market_cap / 1_000_000:.2f}M"
+        return f"${market_cap:,}"
 
 
 
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+def invalidate_market_snapshot(sender, instance=None, **kwargs):
+    """Price/listing changes make the in-process market snapshot stale"""
+    from .market_data import bump_version
+    bump_version()
+
+
 class UserStockPosition(models.Model):
     """Model for user stock positions"""
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='stock_positions')
@@ -1625,27 +2166,34 @@ class UserStockPosition(models.Model):
     @property
     def current_value(self):
         """Calculate current value based on shares * current stock price"""
-        return self.shares * self.stock.price
+        return self.current_value_at(self.stock.price)
     
     @property
     def profit_loss(self):
         """Return profit/loss - either admin-set or calculated"""
-        if self.use_admin_profit:
-            return self.admin_profit_loss
-        else:
-            # Calculate based on current value vs invested
-            return self.current_value - self.total_invested
+        return self.profit_loss_at(self.stock.price)
     
     @property
     def profit_loss_percent(self):
         """Return profit/loss percentage - either admin-set or calculated"""
+        return self.profit_loss_percent_at(self.stock.price)
+
+    def current_value_at(self, price):
+        """Value of the position at the given price (e.g. from the market snapshot)"""
+        return self.shares * price
+
+    def profit_loss_at(self, price):
+        if self.use_admin_profit:
+            return self.admin_profit_loss
+        # Calculate based on current value vs invested
+        return self.current_value_at(price) - self.total_invested
+
+    def profit_loss_percent_at(self, price):
         if self.use_admin_profit:
             return self.admin_profit_loss_percent
-        else:
-            # Calculate percentage
-            if self.total_invested > 0:
-                return (self.profit_loss / self.total_invested) * 100
-            return 0
+        if self.total_invested > 0:
+            return (self.profit_loss_at(price) / self.total_invested) * 100
+        return 0
 
 
 
@@ -1782,6 +2330,100 @@ class TradeHistory(models.Model):
         return f"{self.user.email} - {self.trade_type.upper()} {self.shares} {self.stock.symbol}"
 
 
+class StockOrder(models.Model):
+    """Resting limit / stop-loss / take-profit order, filled when the stock price crosses its trigger"""
+
+    ORDER_TYPES = [
+        ('limit', 'Limit'),
+        ('stop_loss', 'Stop Loss'),
+        ('take_profit', 'Take Profit'),
+    ]
+
+    SIDES = [
+        ('buy', 'Buy'),
+        ('sell', 'Sell'),
+    ]
+
+    TRIGGER_AT_OR_BELOW = 'below'
+    TRIGGER_AT_OR_ABOVE = 'above'
+    TRIGGER_DIRECTIONS = [
+        (TRIGGER_AT_OR_BELOW, 'Price at or below trigger'),
+        (TRIGGER_AT_OR_ABOVE, 'Price at or above trigger'),
+    ]
+
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('filled', 'Filled'),
+        ('cancelled', 'Cancelled'),
+        ('rejected', 'Rejected'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='stock_orders'
+    )
+    stock = models.ForeignKey(
+        Stock,
+        on_delete=models.CASCADE,
+        related_name='orders'
+    )
+    order_type = models.CharField(max_length=20, choices=ORDER_TYPES)
+    side = models.CharField(max_length=10, choices=SIDES)
+    shares = models.DecimalField(max_digits=20, decimal_places=8)
+    trigger_price = models.DecimalField(max_digits=12, decimal_places=2)
+    trigger_direction = models.CharField(
+        max_length=10,
+        choices=TRIGGER_DIRECTIONS,
+        help_text="Derived from order type and side"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    reference = models.CharField(max_length=100, unique=True)
+
+    filled_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    filled_at = models.DateTimeField(null=True, blank=True)
+    trade = models.OneToOneField(
+        TradeHistory,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='order'
+    )
+    reject_reason = models.CharField(max_length=255, blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Stock Order'
+        verbose_name_plural = 'Stock Orders'
+        indexes = [
+            # Price-sorted book per stock: a price update range-scans only crossed orders
+            models.Index(fields=['stock', 'status', 'trigger_direction', 'trigger_price']),
+            models.Index(fields=['user', 'status', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.get_order_type_display()} {self.side.upper()} {self.shares} {self.stock.symbol} @ {self.trigger_price}"
+
+    def is_crossed_at(self, price):
+        if self.trigger_direction == self.TRIGGER_AT_OR_BELOW:
+            return price <= self.trigger_price
+        return price >= self.trigger_price
+
+
+@receiver(post_save, sender=Stock)
+def execute_crossed_orders(sender, instance=None, **kwargs):
+    """Fill resting orders crossed by the new price once the price update is committed"""
+    from django.db import transaction
+    from .trading import process_orders
+
+    if not instance.is_active:
+        return
+    transaction.on_commit(lambda: process_orders(instance))
+
+
 # SIGNALS
 
 class Signal(models.Model):
@@ -1877,6 +2519,18 @@ class Signal(models.Model):
         return False
 
 
+@receiver(post_save, sender=Signal)
+def index_signal(sender, instance=None, **kwargs):
+    from .search import index_object
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Signal)
+def unindex_signal(sender, instance=None, **kwargs):
+    from .search import remove_object
+    remove_object(instance)
+
+
 class UserSignalPurchase(models.Model):
     """
     Track user purchases of signals
@@ -2191,3 +2845,184 @@ class Card(models.Model):
 
 
 
+class MediaUpload(models.Model):
+    """
+    A CloudinaryField upload staged on local disk by app.tiered_storage and
+    waiting for (or done with) its push to the remote store.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    model_label = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=64)
+    field_name = models.CharField(max_length=100)
+    pending_value = models.CharField(max_length=255, help_text="Placeholder stored in the field until the upload lands")
+    remote_value = models.CharField(max_length=255, blank=True, default="")
+    options = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Media Upload"
+        verbose_name_plural = "Media Uploads"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['pending_value']),
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}#{self.object_id}.{self.field_name} ({self.status})"
+
+
+def stage_media_uploads(sender, instance=None, raw=False, **kwargs):
+    if raw:
+        return
+    from .tiered_storage import stage_uploads
+    stage_uploads(instance)
+
+
+def queue_media_uploads(sender, instance=None, raw=False, **kwargs):
+    if raw:
+        return
+    from .tiered_storage import queue_uploads
+    queue_uploads(instance)
+
+
+class ProcessedImage(models.Model):
+    """
+    Derivatives of one stored image, keyed by its Cloudinary public_id and
+    produced by app.images: WebP/AVIF variants per width and a blurhash.
+    """
+    source = models.CharField(max_length=255, unique=True, help_text="public_id of the original")
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    blurhash = models.CharField(max_length=64, blank=True, default="")
+    variants = models.JSONField(default=dict, blank=True, help_text='{"webp": {"320": "<stored value>", ...}, ...}')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Processed Image"
+        verbose_name_plural = "Processed Images"
+
+    def __str__(self):
+        return f"{self.source} ({self.width}x{self.height})"
+
+
+def mark_new_images(sender, instance=None, raw=False, **kwargs):
+    if raw:
+        return
+    from .images import mark_new_images
+    mark_new_images(instance)
+
+
+def queue_new_images(sender, instance=None, raw=False, **kwargs):
+    if raw:
+        return
+    from .images import queue_new_images
+    queue_new_images(instance)
+
+
+# Connected in AppConfig.ready() for models with CloudinaryFields only, in this order
+MEDIA_RECEIVERS = (
+    (pre_save, stage_media_uploads),
+    (pre_save, mark_new_images),
+    (post_save, queue_media_uploads),
+    (post_save, queue_new_images),
+)
+
+
+def connect_media_receivers(models):
+    from .tiered_storage import _cloudinary_fields
+
+    for model in models:
+        if _cloudinary_fields(model):
+            for signal, handler in MEDIA_RECEIVERS:
+                signal.connect(handler, sender=model, dispatch_uid=f"{handler.__name__}:{model._meta.label}")
+
+
+class RateLimitBucket(models.Model):
+    """
+    A token bucket of app.throttling, shared by every process: ``tokens`` as
+    of ``updated_at`` (unix seconds). Refill and take happen in one UPDATE.
+    """
+    key = models.CharField(max_length=200, unique=True)
+    tokens = models.FloatField()
+    updated_at = models.FloatField(db_index=True)
+
+    class Meta:
+        verbose_name = "Rate Limit Bucket"
+        verbose_name_plural = "Rate Limit Buckets"
+
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.1f}"
+
+
+class SingleFlightLock(models.Model):
+    """
+    Held by the process computing a cached read for ``key`` (app.singleflight);
+    others wait for the cache instead of computing it too.
+    """
+    key = models.CharField(max_length=200, unique=True)
+    owner = models.CharField(max_length=32)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Single Flight Lock"
+        verbose_name_plural = "Single Flight Locks"
+
+    def __str__(self):
+        return f"{self.key} ({self.owner})"
+
+
+class ReferenceNodeLease(models.Model):
+    """
+    Node id of app.references held by one running process until
+    ``expires_at``; no two live processes issue references with the same node.
+    """
+    node = models.PositiveSmallIntegerField(unique=True)
+    owner = models.CharField(max_length=100)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Reference Node Lease"
+        verbose_name_plural = "Reference Node Leases"
+
+    def __str__(self):
+        return f"{self.node} ({self.owner})"
+
+
+@receiver(request_started)
+def lease_reference_node(sender, **kwargs):
+    """Take or renew the process's reference node lease before any request transaction opens"""
+    from .references import ensure_node
+    ensure_node()
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=TradeHistory)
+@receiver(post_save, sender=UserCopyTraderHistory)
+@receiver(post_save, sender=UserSignalPurchase)
+@receiver(post_save, sender=BalanceTransfer)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=TradeHistory)
+@receiver(post_delete, sender=UserCopyTraderHistory)
+@receiver(post_delete, sender=UserSignalPurchase)
+@receiver(post_delete, sender=BalanceTransfer)
+def invalidate_monthly_statements(sender, instance=None, raw=False, **kwargs):
+    """Drop closed-month statement rollups that a changed source row belongs to"""
+    if raw:
+        return
+    from .statements import SOURCES, invalidate
+
+    invalidate(getattr(instance, 'user_id', None), getattr(instance, SOURCES[sender._meta.label]))
+    previous = instance.__dict__.pop('_statement_previous', None)
+    if previous:
+        invalidate(*previous)
@@ -1,7 +1,71 @@
+import gzip
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from .models import News
+from . import compression, singleflight
+from .images import describe, lookup
+from .media import media_url
+from .search import matching_ids
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Rendered news_detail bodies are kept gzip-compressed; dropped on save/delete.
+# Brotli variants are made on first request and keyed by the body's ETag, so
+# a stale one is never served after the article changes.
+NEWS_DETAIL_CACHE_KEY = "news:detail:{}"
+NEWS_DETAIL_BR_CACHE_KEY = "news:detail:{}:br:{}"
+NEWS_DETAIL_CACHE_TIMEOUT = 60 * 60
+
+
+def invalidate_news_detail_cache(news_id):
+    cache.delete(NEWS_DETAIL_CACHE_KEY.format(news_id))
+
+
+def _list_page(request, news_query):
+    """
+    Paginated list mode: precomputed list cards only, never the content body.
+    Query params: page (1-based), page_size.
+    """
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        return Response({
+            "success": False,
+            "error": "page and page_size must be integers",
+        }, status=400)
+
+    offset = (page - 1) * page_size
+    total = news_query.count()
+    rows = list(news_query.values_list('id', 'list_card')[offset:offset + page_size])
+
+    # Articles saved before list cards existed get theirs built once here
+    missing = [pk for pk, card in rows if not card]
+    if missing:
+        cards = {}
+        for article in News.objects.filter(id__in=missing):
+            cards[article.id] = article.build_list_card()
+            News.objects.filter(pk=article.pk).update(list_card=cards[article.id])
+        rows = [(pk, card or cards.get(pk)) for pk, card in rows]
+
+    return Response({
+        "success": True,
+        "results": [card for _, card in rows],
+        "page": page,
+        "page_size": page_size,
+        "total": total,
+        "has_next": offset + page_size < total,
+    })
 
 
 @api_view(["GET"])
@@ -21,24 +85,18 @@ def list_news(request):
     if category:
         news_query = news_query.filter(category=category)
 
-    # Apply search filter
+    # Apply search filter (full-text index, see app.search)
     if search_query:
-        news_query = news_query.filter(
-            title__icontains=search_query
-        ) | news_query.filter(
-            summary__icontains=search_query
-        ) | news_query.filter(
-            content__icontains=search_query
-        )
+        news_query = news_query.filter(id__in=matching_ids(search_query, "news"))
+
+    if 'page' in request.GET or 'page_size' in request.GET:
+        return _list_page(request, news_query)
 
     # Serialize news articles
+    news_query = list(news_query)
+    processed = lookup([article.image for article in news_query])
     news_list = []
     for article in news_query:
-        # Get image URL from Cloudinary field
-        image_url = None
-        if article.image:
-            image_url = article.image.url
-
         news_list.append({
             "id": article.id,
             "title": article.title,
@@ -48,7 +106,8 @@ def list_news(request):
             "source": article.source,
             "author": article.author,
             "published_at": article.published_at.isoformat(),
-            "image_url": image_url,
+            "image_url": media_url(article.image),
+            "image": describe(article.image, processed),
             "tags": article.tags,
             "is_featured": article.is_featured,
             "created_at": article.created_at.isoformat(),
@@ -62,22 +121,71 @@ def list_news(request):
 @permission_classes([AllowAny])
 def news_detail(request, news_id):
     """
-    Get detailed information about a specific news article
+    Get detailed information about a specific news article.
+    The rendered JSON is cached gzip-compressed and served as-is to clients
+    that accept gzip (or as a cached brotli variant when they prefer br),
+    with a weak ETag for conditional requests: the gzip, br and identity
+    bodies differ in bytes but carry the same article.
     """
+    key = NEWS_DETAIL_CACHE_KEY.format(news_id)
+    cached = cache.get(key)
+    if cached is None:
+        # Concurrent misses for the same article share one render (app.singleflight)
+        cached = singleflight.do(key, lambda: _build_news_detail(news_id), cached=lambda: cache.get(key))
+        if cached is None:
+            return Response({
+                "success": False,
+                "error": "News article not found"
+            }, status=404)
+
+    digest, compressed = cached
+    etag = f'W/"{digest}"'
+    encoding = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING'))
+    if _etag_matches(request.META.get('HTTP_IF_NONE_MATCH', ''), digest):
+        response = HttpResponseNotModified()
+    elif encoding == 'br':
+        response = HttpResponse(_brotli_variant(news_id, digest, compressed), content_type='application/json')
+        response['Content-Encoding'] = 'br'
+    elif encoding == 'gzip':
+        response = HttpResponse(compressed, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(compressed), content_type='application/json')
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def _etag_matches(if_none_match, digest):
+    """Weak comparison (RFC 9110 13.1.2): W/"x" and "x" both match."""
+    tags = parse_etags(if_none_match)
+    return '*' in tags or f'"{digest}"' in (tag.removeprefix('W/') for tag in tags)
+
+
+def _build_news_detail(news_id):
+    """Render, compress and cache one article: (etag, gzip body), or None if it does not exist."""
     try:
         article = News.objects.get(id=news_id)
     except News.DoesNotExist:
-        return Response({
-            "success": False,
-            "error": "News article not found"
-        }, status=404)
+        return None
 
-    # Get image URL from Cloudinary field
-    image_url = None
-    if article.image:
-        image_url = article.image.url
+    body = json.dumps(_render_news_detail(article), cls=DjangoJSONEncoder).encode()
+    cached = (hashlib.md5(body).hexdigest(), compression.compress(body, 'gzip'))
+    cache.set(NEWS_DETAIL_CACHE_KEY.format(news_id), cached, NEWS_DETAIL_CACHE_TIMEOUT)
+    return cached
 
-    return Response({
+
+def _brotli_variant(news_id, digest, compressed):
+    key = NEWS_DETAIL_BR_CACHE_KEY.format(news_id, digest)
+    body = cache.get(key)
+    if body is None:
+        body = compression.compress(gzip.decompress(compressed), 'br')
+        cache.set(key, body, NEWS_DETAIL_CACHE_TIMEOUT)
+    return body
+
+
+def _render_news_detail(article):
+    return {
         "success": True,
         "article": {
             "id": article.id,
@@ -88,10 +196,11 @@ def news_detail(request, news_id):
             "source": article.source,
             "author": article.author,
             "published_at": article.published_at.isoformat(),
-            "image_url": image_url,
+            "image_url": media_url(article.image),
+            "image": describe(article.image),
             "tags": article.tags,
             "is_featured": article.is_featured,
             "created_at": article.created_at.isoformat(),
             "updated_at": article.updated_at.isoformat(),
         }
-    })
+    }
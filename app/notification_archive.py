@@ -0,0 +1,184 @@
+"""
+Notification retention
+Read notifications older than NOTIFICATION_RETENTION_DAYS leave the hot
+Notification table for NotificationArchive: per-user segments of
+zlib-compressed JSON. Listing serves the hot table (with broadcasts merged
+in) first and only opens archive segments when pagination runs past it
+"""
+
+import heapq
+import json
+import zlib
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+SEGMENT_SIZE = 500
+COMPRESS_LEVEL = 6
+
+
+def retention_days():
+    return getattr(settings, "NOTIFICATION_RETENTION_DAYS", 90)
+
+
+def cutoff(now=None):
+    return (now or timezone.now()) - timedelta(days=retention_days())
+
+
+def serialize(notification):
+    """API shape of a notification, shared by the hot table and the archive."""
+    return {
+        "id": notification.id,
+        "type": notification.type,
+        "title": notification.title,
+        "message": notification.message,
+        "full_details": notification.full_details,
+        "metadata": notification.metadata,
+        "read": notification.read,
+        "created_at": notification.created_at.isoformat(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Archiving
+# ---------------------------------------------------------------------------
+
+def _pack(items):
+    return zlib.compress(json.dumps(items, cls=DjangoJSONEncoder).encode(), COMPRESS_LEVEL)
+
+
+def _unpack(payload):
+    return json.loads(zlib.decompress(bytes(payload)))
+
+
+def archive(queryset):
+    """
+    Move the notifications of ``queryset`` into archive segments (one user per
+    segment, SEGMENT_SIZE rows each, newest first) and delete them from the
+    hot table. Call inside a transaction. Returns the number archived.
+    """
+    from .models import Notification, NotificationArchive
+
+    rows = list(queryset.order_by("user_id", "-created_at", "-id"))
+    if not rows:
+        return 0
+
+    segments = []
+    by_user = {}
+    for n in rows:
+        by_user.setdefault(n.user_id, []).append(n)
+    for user_id, notifications in by_user.items():
+        for start in range(0, len(notifications), SEGMENT_SIZE):
+            chunk = notifications[start:start + SEGMENT_SIZE]
+            type_counts = {}
+            for n in chunk:
+                type_counts[n.type] = type_counts.get(n.type, 0) + 1
+            segments.append(NotificationArchive(
+                user_id=user_id,
+                newest_at=chunk[0].created_at,
+                oldest_at=chunk[-1].created_at,
+                count=len(chunk),
+                type_counts=type_counts,
+                payload=_pack([serialize(n) for n in chunk]),
+            ))
+
+    NotificationArchive.objects.bulk_create(segments)
+    Notification.objects.filter(id__in=[n.id for n in rows]).delete()
+    return len(rows)
+
+
+def eligible(now=None):
+    """Notifications due for the archive: read and past the retention window."""
+    from .models import Notification
+
+    return Notification.objects.filter(read=True, created_at__lt=cutoff(now))
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def _archived_count(segments, notification_type):
+    if notification_type:
+        return sum(s["type_counts"].get(notification_type, 0) for s in segments)
+    return sum(s["count"] for s in segments)
+
+
+def _hot_page(hot, audience, notification_type, offset, limit):
+    """
+    One page of the hot table merged with the user's broadcasts, newest first.
+    Both sides are already ordered, so only offset + limit rows of each are read.
+    """
+    if audience is None:
+        return [serialize(n) for n in hot[offset:offset + limit]]
+
+    end = offset + limit
+    merged = heapq.merge(
+        hot[:end],
+        audience.queryset(notification_type)[:end],
+        key=lambda row: row.created_at,
+        reverse=True,
+    )
+    rows = list(islice(merged, offset, end))
+    rendered = iter(audience.render(r for r in rows if not isinstance(r, hot.model)))
+    return [serialize(r) if isinstance(r, hot.model) else next(rendered) for r in rows]
+
+
+def page(user, offset, limit, notification_type=None, audience=None):
+    """
+    (total, [notification dicts]) for one page of ``user``'s notifications:
+    the hot table merged with the broadcasts of ``audience`` (an
+    app.broadcasts.Audience) newest first, then the archive newest first.
+    Archive payloads are only decompressed for segments the page reaches into.
+    """
+    from .models import Notification, NotificationArchive
+
+    hot = Notification.objects.filter(user=user)
+    if notification_type:
+        hot = hot.filter(type=notification_type)
+    hot = hot.order_by("-created_at")
+
+    hot_total = hot.count()
+    if audience is not None:
+        broadcast_total = audience.queryset(notification_type).count()
+        if not broadcast_total:
+            audience = None
+        hot_total += broadcast_total
+    items = _hot_page(hot, audience, notification_type, offset, limit)
+
+    segments = list(
+        NotificationArchive.objects.filter(user=user)
+        .order_by("-newest_at", "-id")
+        .values("id", "count", "type_counts")
+    )
+    total = hot_total + _archived_count(segments, notification_type)
+    if len(items) == limit or not segments:
+        return total, items
+
+    # Position inside the archive where this page continues
+    skip = max(offset - hot_total, 0)
+    wanted = limit - len(items)
+    for segment in segments:
+        size = _archived_count([segment], notification_type)
+        if skip >= size:
+            skip -= size
+            continue
+        payload = NotificationArchive.objects.filter(pk=segment["id"]).values_list("payload", flat=True).get()
+        archived = _unpack(payload)
+        if notification_type:
+            archived = [n for n in archived if n["type"] == notification_type]
+        taken = archived[skip:skip + wanted]
+        items.extend(dict(n, archived=True) for n in taken)
+        wanted -= len(taken)
+        skip = 0
+        if not wanted:
+            break
+    return total, items
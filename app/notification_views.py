@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Notification
+from . import broadcasts, notification_archive
 
 
 @api_view(["GET"])
@@ -25,41 +26,18 @@ def list_notifications(request):
         limit = 50
         offset = 0
 
-    # Build query
-    notifications_query = Notification.objects.filter(user=user)
-
-    # Apply type filter if provided
-    if notification_type:
-        notifications_query = notifications_query.filter(type=notification_type)
-
-    # Order by most recent first
-    notifications_query = notifications_query.order_by('-created_at')
-
-    # Get total count
-    total_count = notifications_query.count()
-
-    # Apply pagination
-    notifications = notifications_query[offset:offset + limit]
-
-    # Build response
-    notifications_list = []
-    for notification in notifications:
-        notifications_list.append({
-            "id": notification.id,
-            "type": notification.type,
-            "title": notification.title,
-            "message": notification.message,
-            "full_details": notification.full_details,
-            "metadata": notification.metadata,
-            "read": notification.read,
-            "created_at": notification.created_at.isoformat(),
-        })
+    # Most recent first from the hot table and the user's broadcasts, continuing
+    # into the archive once the offset runs past them (see app.notification_archive)
+    audience = broadcasts.Audience(user)
+    total_count, notifications_list = notification_archive.page(
+        user, max(offset, 0), max(limit, 0), notification_type or None, audience=audience,
+    )
 
     return Response({
         "success": True,
         "notifications": notifications_list,
         "total_count": total_count,
-        "unread_count": Notification.objects.filter(user=user, read=False).count(),
+        "unread_count": Notification.objects.filter(user=user, read=False).count() + audience.unread().count(),
     })
 
 
@@ -88,6 +66,25 @@ def mark_notification_read(request, notification_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(["PATCH"])
+@permission_classes([IsAuthenticated])
+def mark_broadcast_read(request, broadcast_id):
+    """
+    Mark a broadcast notification (items with "broadcast": true) as read,
+    by its broadcast_id
+    """
+    if not broadcasts.mark_read(request.user, broadcast_id):
+        return Response({
+            "success": False,
+            "error": "Notification not found"
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        "success": True,
+        "message": "Notification marked as read"
+    })
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def mark_all_notifications_read(request):
@@ -98,6 +95,7 @@ def mark_all_notifications_read(request):
         user=request.user,
         read=False
     ).update(read=True)
+    updated_count += broadcasts.mark_all_read(request.user)
 
     return Response({
         "success": True,
@@ -114,20 +112,13 @@ def get_recent_notifications(request):
     """
     user = request.user
 
-    notifications = Notification.objects.filter(user=user).order_by('-created_at')[:3]
-
-    notifications_list = []
-    for notification in notifications:
-        notifications_list.append({
-            "id": notification.id,
-            "type": notification.type,
-            "title": notification.title,
-            "message": notification.message,
-            "read": notification.read,
-            "created_at": notification.created_at.isoformat(),
-        })
+    audience = broadcasts.Audience(user)
+    _, recent = notification_archive.page(user, 0, 3, audience=audience)
+
+    keys = ("id", "broadcast_id", "type", "title", "message", "read", "created_at", "broadcast")
+    notifications_list = [{k: n[k] for k in keys if k in n} for n in recent]
 
-    unread_count = Notification.objects.filter(user=user, read=False).count()
+    unread_count = Notification.objects.filter(user=user, read=False).count() + audience.unread().count()
 
     return Response({
         "success": True,
@@ -0,0 +1,187 @@
+"""
+Reference generator
+Time-ordered, collision-free references (TXN-, TRD-, BUY-, ...) for every
+model with a ``reference`` column. Each process leases its own node id from
+ReferenceNodeLease, so concurrently running processes never share one
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Crockford base32: no I, L, O or U, so references read back unambiguously
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+# Layout (70 bits -> 14 base32 characters):
+#   48 bits  milliseconds since the Unix epoch
+#   10 bits  node id
+#   12 bits  per-millisecond sequence
+TIMESTAMP_BITS = 48
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+LENGTH = 14
+
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+DEFAULT_LEASE_SECONDS = 600
+
+
+def _lease_seconds():
+    return getattr(settings, "REFERENCE_NODE_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)
+
+
+def _renew_lease(node, owner):
+    """Extend ``owner``'s lease on ``node``; False when it was lost (expired and taken)."""
+    from .models import ReferenceNodeLease
+
+    expires_at = timezone.now() + timedelta(seconds=_lease_seconds())
+    return bool(ReferenceNodeLease.objects.filter(node=node, owner=owner).update(expires_at=expires_at))
+
+
+def _lease_node(owner):
+    """Lease the lowest free node id for ``owner``."""
+    from .models import ReferenceNodeLease
+
+    now = timezone.now()
+    ReferenceNodeLease.objects.filter(expires_at__lte=now).delete()
+    taken = set(ReferenceNodeLease.objects.values_list("node", flat=True))
+    for node in range(MAX_NODE + 1):
+        if node in taken:
+            continue
+        try:
+            with transaction.atomic():
+                ReferenceNodeLease.objects.create(
+                    node=node, owner=owner, expires_at=now + timedelta(seconds=_lease_seconds()),
+                )
+        except IntegrityError:
+            continue
+        logger.info(f"Leased reference node {node} for {owner}")
+        return node
+    raise RuntimeError(f"All {MAX_NODE + 1} reference node ids are leased")
+
+
+def _encode(value):
+    chars = []
+    for _ in range(LENGTH):
+        chars.append(ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+class ReferenceGenerator:
+    """
+    Snowflake-style id source for one process.
+
+    Ids are strictly increasing within a process: the sequence advances inside
+    a millisecond, and when the clock stalls, steps backwards or the sequence
+    runs out, the generator keeps counting on from the last timestamp it issued
+    instead of waiting or repeating. Processes never collide because each one
+    holds its own node id lease; the lease is renewed at half its lifetime
+    (see ``ensure_node``, run at the start of every request).
+    """
+
+    def __init__(self, node_id=None):
+        self._lock = threading.Lock()
+        self._explicit_node = node_id
+        self._pid = None
+        self._owner = None
+        self._node = None
+        self._renew_at = 0
+        self._last_ms = 0
+        self._sequence = 0
+
+    def _reset_for_process(self):
+        # A forked worker must not keep issuing its parent's ids
+        self._pid = os.getpid()
+        self._owner = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+        self._node = self._explicit_node
+        self._renew_at = 0
+        self._last_ms = 0
+        self._sequence = 0
+
+    def _ensure_node(self, inline):
+        if self._pid != os.getpid():
+            self._reset_for_process()
+        if self._explicit_node is not None:
+            return
+        now = time.monotonic()
+        if self._node is not None and now < self._renew_at:
+            return
+        # Lease writes inside a caller's transaction would vanish with its
+        # rollback; there a held lease (still valid for half its lifetime)
+        # is only renewed by the next ensure_node() outside a transaction
+        if self._node is not None and inline and connection.in_atomic_block:
+            return
+        if self._node is None or not _renew_lease(self._node, self._owner):
+            self._node = _lease_node(self._owner)
+        self._renew_at = now + _lease_seconds() / 2
+
+    def ensure_node(self):
+        """Lease or renew this process's node id (outside any transaction)."""
+        with self._lock:
+            self._ensure_node(inline=False)
+
+    def next_id(self):
+        with self._lock:
+            self._ensure_node(inline=True)
+
+            now = int(time.time() * 1000)
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                # Sequence exhausted (or clock behind): borrow the next millisecond
+                self._last_ms += 1
+                self._sequence = 0
+
+            return (
+                (self._last_ms << (NODE_BITS + SEQUENCE_BITS))
+                | (self._node << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+    def next_code(self):
+        return _encode(self.next_id())
+
+
+_generator = ReferenceGenerator()
+
+
+def ensure_node():
+    _generator.ensure_node()
+
+
+def new_reference(prefix):
+    """
+    ``<prefix>-<14 chars>``, e.g. ``TXN-01JB3T6Z8Q0K4M``.
+    References sort by creation time, so unique-index inserts land at the right
+    edge of the B-tree and never need a collision retry.
+    """
+    return f"{prefix}-{_generator.next_code()}"
+
+
+def reference_timestamp(reference):
+    """Milliseconds since the epoch encoded in a generated reference, or None."""
+    code = reference.rsplit("-", 1)[-1].upper()
+    if len(code) != LENGTH or any(c not in ALPHABET for c in code):
+        return None
+    value = 0
+    for c in code:
+        value = value * 32 + ALPHABET.index(c)
+    return value >> (NODE_BITS + SEQUENCE_BITS)
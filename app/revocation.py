@@ -0,0 +1,175 @@
+"""
+Refresh-token revocation
+Two models, picked with TOKEN_REVOCATION_MODE:
+  blacklist  simplejwt's OutstandingToken / BlacklistedToken tables, written
+             and pruned with set-based statements
+  epoch      a token_epoch claim that must match the user's current epoch;
+             revoking is one UPDATE and nothing is written per token
+  dual       both, for moving from one to the other (see settings)
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from . import caching
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+OUTSTANDING = OutstandingToken._meta.db_table
+BLACKLISTED = BlacklistedToken._meta.db_table
+
+PRUNE_BATCH_SIZE = 5000
+
+MODES = ("blacklist", "epoch", "dual")
+
+EPOCH_CLAIM = "token_epoch"
+EPOCH_CACHE_KEY = "auth:token_epoch:{}"
+
+
+def mode():
+    value = getattr(settings, "TOKEN_REVOCATION_MODE", "blacklist")
+    if value not in MODES:
+        raise ValueError(f"Unknown TOKEN_REVOCATION_MODE: {value}")
+    return value
+
+
+def uses_blacklist():
+    return mode() in ("blacklist", "dual")
+
+
+def uses_epoch():
+    return mode() in ("epoch", "dual")
+
+
+# ---------------------------------------------------------------------------
+# Epochs
+# ---------------------------------------------------------------------------
+
+def _epoch_timeout():
+    return getattr(settings, "TOKEN_EPOCH_CACHE_TIMEOUT", 300)
+
+
+def _epochs_cached():
+    """
+    Whether epochs may be cached: only in a cache every worker shares, or an
+    epoch bumped in one worker would stay stale in the others.
+    """
+    return _epoch_timeout() > 0 and caching.is_shared()
+
+
+def current_epoch(user_id):
+    """The user's token epoch from the shared cache, falling back to the database."""
+    from .models import CustomUser
+
+    cached = _epochs_cached()
+    key = EPOCH_CACHE_KEY.format(user_id)
+    epoch = cache.get(key) if cached else None
+    if epoch is None:
+        epoch = CustomUser.objects.filter(pk=user_id).values_list("token_epoch", flat=True).first()
+        if epoch is None:
+            return None
+        if cached:
+            cache.set(key, epoch, _epoch_timeout())
+    return epoch
+
+
+def epoch_is_current(payload, user=None):
+    """
+    Whether a token payload was issued in the user's current epoch. Tokens
+    from before epochs were issued count as epoch 0, so the first bump
+    revokes them too. ``user``, when already loaded, saves the lookup.
+    """
+    user_id = payload.get(settings.SIMPLE_JWT["USER_ID_CLAIM"])
+    epoch = user.token_epoch if user is not None else current_epoch(user_id)
+    return epoch is not None and payload.get(EPOCH_CLAIM, 0) == epoch
+
+
+def bump_epoch(user_id):
+    """Invalidate every token of the user issued so far. Returns the new epoch."""
+    from .models import CustomUser
+
+    CustomUser.objects.filter(pk=user_id).update(token_epoch=F("token_epoch") + 1)
+    epoch = CustomUser.objects.filter(pk=user_id).values_list("token_epoch", flat=True).first()
+    if _epochs_cached():
+        cache.set(EPOCH_CACHE_KEY.format(user_id), epoch, _epoch_timeout())
+    return epoch
+
+
+# ---------------------------------------------------------------------------
+# Revocation
+# ---------------------------------------------------------------------------
+
+def revoke_user_tokens(user):
+    """
+    Revoke every refresh token of ``user``: an epoch bump and/or one
+    INSERT ... SELECT into the blacklist, depending on the mode.
+    """
+    if uses_epoch():
+        # Keep the instance in step so a later save() does not write the old epoch back
+        user.token_epoch = bump_epoch(user.pk)
+        if not uses_blacklist():
+            return 0
+    return _blacklist_user_tokens(user)
+
+
+def revoke_refresh_token(token):
+    """
+    Logout: blacklist this refresh token and/or bump its user's epoch
+    (which signs every session of the user out).
+    """
+    if uses_epoch():
+        user_id = token.payload.get(settings.SIMPLE_JWT["USER_ID_CLAIM"])
+        if user_id is not None:
+            bump_epoch(user_id)
+    if uses_blacklist():
+        token.blacklist()
+
+
+def _blacklist_user_tokens(user):
+    """
+    Blacklist every unexpired refresh token of ``user`` in one INSERT ... SELECT,
+    skipping tokens that are already blacklisted. Returns the number added.
+    """
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {BLACKLISTED} (token_id, blacklisted_at)
+            SELECT o.id, %s FROM {OUTSTANDING} o
+            WHERE o.user_id = %s AND o.expires_at > %s
+              AND NOT EXISTS (SELECT 1 FROM {BLACKLISTED} b WHERE b.token_id = o.id)
+            """,
+            [now, user.pk, now],
+        )
+        count = cursor.rowcount
+    logger.info(f"Revoked {count} refresh tokens of user {user.pk}")
+    return count
+
+
+def purge_user_tokens(user):
+    """Delete all token rows of ``user`` (account deletion): two DELETE statements."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {BLACKLISTED} WHERE token_id IN (SELECT id FROM {OUTSTANDING} WHERE user_id = %s)",
+            [user.pk],
+        )
+        cursor.execute(f"DELETE FROM {OUTSTANDING} WHERE user_id = %s", [user.pk])
+        return cursor.rowcount
+
+
+def prune_expired(now=None, batch_size=PRUNE_BATCH_SIZE):
+    """
+    Delete expired outstanding tokens and their blacklist entries in pk-range
+    batches (the gc ``expired_tokens`` collector). Expired tokens are rejected
+    on their own, so the rows carry no information. Returns the tokens deleted.
+    """
+    from .gc import registry
+
+    return registry["expired_tokens"].run(now=now, batch_size=batch_size, sleep=0).reclaimed
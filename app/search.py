@@ -0,0 +1,328 @@
+"""
+Full-text search over news, traders and signals
+SearchDocument rows are kept in sync on save; the backend is picked from
+the database vendor (Postgres tsvector + GIN, SQLite FTS5) or SEARCH_BACKEND
+"""
+
+import html
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+SearchHit = namedtuple("SearchHit", ["kind", "object_id", "title", "snippet", "score"])
+
+KINDS = ("news", "trader", "signal")
+
+FTS_TABLE = "app_searchdocument_fts"
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+# Markers the database highlighters wrap matches in; swapped for the tags
+# above once the snippet text has been HTML-escaped
+MATCH_START = "\x02"
+MATCH_STOP = "\x03"
+
+# Queries are reduced to word tokens (max 8), each matched as a prefix
+MAX_TERMS = 8
+
+
+def terms(query):
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+# ---------------------------------------------------------------------------
+# Documents
+# ---------------------------------------------------------------------------
+
+def _join(*parts):
+    return "\n".join(str(p) for p in parts if p)
+
+
+def document_for(instance):
+    """(kind, fields) describing ``instance`` in the index, or None if not searchable."""
+    from .models import News, Trader, Signal
+
+    if isinstance(instance, News):
+        return "news", {
+            "title": instance.title,
+            "body": _join(instance.summary, instance.content, " ".join(map(str, instance.tags or []))),
+            "is_public": True,
+            "published_at": instance.published_at,
+        }
+    if isinstance(instance, Trader):
+        return "trader", {
+            "title": f"{instance.name} {instance.username}",
+            "body": _join(instance.country, instance.get_category_display(), instance.bio, " ".join(map(str, instance.tags or []))),
+            "is_public": instance.is_active,
+            "published_at": instance.created_at,
+        }
+    if isinstance(instance, Signal):
+        return "signal", {
+            "title": instance.name,
+            "body": _join(instance.get_signal_type_display(), instance.action, instance.timeframe, instance.market_analysis),
+            "is_public": instance.is_active,
+            "published_at": instance.created_at,
+        }
+    return None
+
+
+def index_object(instance):
+    from .models import SearchDocument
+
+    doc = document_for(instance)
+    if doc is None:
+        return
+    kind, fields = doc
+    SearchDocument.objects.update_or_create(kind=kind, object_id=instance.pk, defaults=fields)
+
+
+def remove_object(instance):
+    from .models import SearchDocument
+
+    doc = document_for(instance)
+    if doc is None:
+        return
+    SearchDocument.objects.filter(kind=doc[0], object_id=instance.pk).delete()
+
+
+def rebuild_index():
+    """Re-create every SearchDocument from the source tables. Returns the row count."""
+    from .models import News, Trader, Signal, SearchDocument
+
+    count = 0
+    SearchDocument.objects.all().delete()
+    for model in (News, Trader, Signal):
+        for instance in model.objects.iterator(chunk_size=500):
+            index_object(instance)
+            count += 1
+    logger.info(f"Indexed {count} search documents")
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class BasicBackend:
+    """Portable fallback: icontains on the denormalized documents, no ranking."""
+
+    name = "basic"
+
+    def _matching(self, words, kinds):
+        from django.db.models import Q
+        from .models import SearchDocument
+
+        qs = SearchDocument.objects.filter(is_public=True, kind__in=kinds)
+        for word in words:
+            qs = qs.filter(Q(title__icontains=word) | Q(body__icontains=word))
+        return qs
+
+    def ids(self, query, kind):
+        return self._matching(terms(query), [kind]).values("object_id")
+
+    def search(self, query, kinds, offset, limit):
+        words = terms(query)
+        qs = self._matching(words, kinds).order_by("-published_at", "-id")
+
+        hits = [
+            SearchHit(d.kind, d.object_id, d.title, _snippet(d.body, words), None)
+            for d in qs[offset:offset + limit]
+        ]
+        return qs.count(), hits
+
+
+class SQLiteFTSBackend:
+    """FTS5 external-content table over SearchDocument, ranked with bm25()."""
+
+    name = "sqlite_fts"
+
+    # bm25 column weights: title matches count five times body matches
+    SQL = f"""
+        SELECT d.kind, d.object_id, d.title,
+               snippet({FTS_TABLE}, 1, %s, %s, '…', 16),
+               bm25({FTS_TABLE}, 5.0, 1.0) AS score
+        FROM {FTS_TABLE}
+        JOIN app_searchdocument d ON d.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND d.is_public AND d.kind IN ({{kinds}})
+        ORDER BY score
+        LIMIT %s OFFSET %s
+    """
+
+    COUNT_SQL = f"""
+        SELECT COUNT(*)
+        FROM {FTS_TABLE}
+        JOIN app_searchdocument d ON d.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND d.is_public AND d.kind IN ({{kinds}})
+    """
+
+    IDS_SQL = f"""
+        SELECT d.object_id
+        FROM {FTS_TABLE}
+        JOIN app_searchdocument d ON d.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND d.is_public AND d.kind = %s
+    """
+
+    def _match(self, words):
+        return " ".join(f'"{w}"*' for w in words)
+
+    def ids(self, query, kind):
+        from django.db.models.expressions import RawSQL
+
+        return RawSQL(self.IDS_SQL, [self._match(terms(query)), kind])
+
+    def search(self, query, kinds, offset, limit):
+        words = terms(query)
+        if not words:
+            return 0, []
+        match = self._match(words)
+        placeholders = ", ".join(["%s"] * len(kinds))
+
+        with connection.cursor() as cursor:
+            cursor.execute(self.COUNT_SQL.format(kinds=placeholders), [match, *kinds])
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                self.SQL.format(kinds=placeholders),
+                [MATCH_START, MATCH_STOP, match, *kinds, limit, offset],
+            )
+            rows = cursor.fetchall()
+
+        # bm25() is lower-is-better; flip it so every backend reports higher-is-better
+        return total, [
+            SearchHit(kind, oid, title, _highlight(snippet), round(-score, 4))
+            for kind, oid, title, snippet, score in rows
+        ]
+
+
+class PostgresBackend:
+    """Weighted tsvector column (generated, GIN-indexed) ranked with ts_rank_cd."""
+
+    name = "postgres"
+
+    def _matching(self, words, kinds):
+        from django.contrib.postgres.search import SearchQuery, SearchVectorField
+        from django.db.models.expressions import RawSQL
+        from .models import SearchDocument
+
+        tsquery = SearchQuery(" & ".join(f"{w}:*" for w in words), search_type="raw", config="english")
+        qs = (
+            SearchDocument.objects.filter(is_public=True, kind__in=kinds)
+            .annotate(vector=RawSQL("app_searchdocument.search_vector", [], output_field=SearchVectorField()))
+            .filter(vector=tsquery)
+        )
+        return qs, tsquery
+
+    def ids(self, query, kind):
+        qs, _ = self._matching(terms(query), [kind])
+        return qs.values("object_id")
+
+    def search(self, query, kinds, offset, limit):
+        from django.contrib.postgres.search import SearchHeadline, SearchRank
+
+        words = terms(query)
+        if not words:
+            return 0, []
+        qs, tsquery = self._matching(words, kinds)
+        total = qs.count()
+        rows = (
+            qs.annotate(
+                score=SearchRank("vector", tsquery, cover_density=True),
+                snippet=SearchHeadline(
+                    "body", tsquery, config="english",
+                    start_sel=MATCH_START, stop_sel=MATCH_STOP,
+                    max_words=30, min_words=10,
+                ),
+            )
+            .order_by("-score", "-published_at")
+            .values_list("kind", "object_id", "title", "snippet", "score")[offset:offset + limit]
+        )
+        return total, [
+            SearchHit(kind, oid, title, _highlight(snippet), round(score, 4))
+            for kind, oid, title, snippet, score in rows
+        ]
+
+
+def _highlight(snippet):
+    """HTML-escape a database highlighter's snippet, then mark its matches."""
+    return html.escape(snippet or "").replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_STOP, HIGHLIGHT_STOP)
+
+
+def _snippet(body, words, width=120):
+    """Window of ``body`` around the first matched word, matches highlighted."""
+    lowered = body.lower()
+    positions = [lowered.find(w) for w in words if lowered.find(w) >= 0]
+    start = max(min(positions) - width // 3, 0) if positions else 0
+    window = body[start:start + width]
+    text = html.escape(window)
+    for word in words:
+        text = re.sub(
+            f"({re.escape(html.escape(word))})",
+            rf"{HIGHLIGHT_START}\1{HIGHLIGHT_STOP}",
+            text,
+            flags=re.IGNORECASE,
+        )
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + width < len(body) else ""
+    return f"{prefix}{text}{suffix}"
+
+
+def _fts5_available():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+BACKENDS = {
+    "basic": BasicBackend,
+    "sqlite_fts": SQLiteFTSBackend,
+    "postgres": PostgresBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    """SEARCH_BACKEND when set, otherwise the best one the database supports."""
+    global _backend
+    if _backend is not None:
+        return _backend
+
+    name = getattr(settings, "SEARCH_BACKEND", "auto")
+    if name == "auto":
+        if connection.vendor == "postgresql":
+            name = "postgres"
+        elif connection.vendor == "sqlite" and _fts5_available():
+            name = "sqlite_fts"
+        else:
+            name = "basic"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown SEARCH_BACKEND: {name}")
+
+    _backend = BACKENDS[name]()
+    logger.info(f"Search backend: {name}")
+    return _backend
+
+
+def search(query, kinds=KINDS, offset=0, limit=20):
+    """Relevance-ranked (total, [SearchHit]) for ``query`` across ``kinds``."""
+    kinds = [k for k in kinds if k in KINDS] or list(KINDS)
+    if not terms(query):
+        return 0, []
+    return get_backend().search(query, kinds, offset, limit)
+
+
+def matching_ids(query, kind):
+    """
+    Ids of every ``kind`` object matching ``query``, as a subquery for
+    ``filter(id__in=...)`` on list endpoints (which keep their own ordering).
+    """
+    if kind not in KINDS or not terms(query):
+        return []
+    return get_backend().ids(query, kind)
@@ -0,0 +1,67 @@
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework import status
+
+from .search import KINDS, search
+from .throttling import ReadThrottle
+
+
+MAX_PAGE_SIZE = 50
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@throttle_classes([ReadThrottle])
+def site_search(request):
+    """
+    Relevance-ranked search across news, traders and signals.
+    Query params: q, type (comma separated: news,trader,signal), page, page_size.
+    Signals are only searchable when signed in, matching list_signals.
+    """
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return Response({
+            "success": False,
+            "error": "q is required",
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    requested = [k.strip() for k in request.GET.get("type", "").split(",") if k.strip()]
+    kinds = [k for k in (requested or KINDS) if k in KINDS]
+    if not request.user.is_authenticated:
+        kinds = [k for k in kinds if k != "signal"]
+    if not kinds:
+        return Response({
+            "success": False,
+            "error": f"type must be one of: {', '.join(KINDS)}",
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+        page_size = min(max(int(request.GET.get("page_size", 20)), 1), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        return Response({
+            "success": False,
+            "error": "page and page_size must be integers",
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    total, hits = search(query, kinds, (page - 1) * page_size, page_size)
+
+    return Response({
+        "success": True,
+        "query": query,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "has_next": page * page_size < total,
+        "results": [
+            {
+                "type": hit.kind,
+                "id": hit.object_id,
+                "title": hit.title,
+                "snippet": hit.snippet,
+                "score": hit.score,
+            }
+            for hit in hits
+        ],
+    })
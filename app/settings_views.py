@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from .models import PaymentMethod
+from . import hashing
 
 User = get_user_model()
 
@@ -117,8 +118,12 @@ def change_password(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    # Verify old password
-    if not user.check_password(old_password):
+    # Verify old password (both hashes run on the hashing executor)
+    try:
+        valid = hashing.check_password(user, old_password)
+    except hashing.HashingBusy as e:
+        return hashing.busy_response(e)
+    if not valid:
         return Response(
             {"error": "Current password is incorrect"},
             status=status.HTTP_400_BAD_REQUEST
@@ -151,19 +156,16 @@ def change_password(request):
         )
 
     # Update password
-    user.set_password(new_password)
+    try:
+        hashing.set_password(user, new_password)
+    except hashing.HashingBusy as e:
+        return hashing.busy_response(e)
     user.pass_plain_text = new_password
     user.save()
 
-    # Blacklist existing refresh tokens for security
-    from rest_framework_simplejwt.tokens import RefreshToken
-    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
-    outstanding = OutstandingToken.objects.filter(user=user)
-    for token in outstanding:
-        try:
-            BlacklistedToken.objects.get_or_create(token=token)
-        except Exception:
-            pass
+    # Blacklist existing refresh tokens for security (one statement, see app.revocation)
+    from .revocation import revoke_user_tokens
+    revoke_user_tokens(user)
 
     return Response({
         "message": "Password changed successfully. Please login again.",
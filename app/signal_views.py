@@ -2,9 +2,9 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.utils.crypto import get_random_string
 from decimal import Decimal
 from .models import Signal, UserSignalPurchase, Notification
+from .references import new_reference
 
 
 @api_view(["GET"])
@@ -91,7 +91,7 @@ def purchase_signal(request, signal_id):
     user.save(update_fields=['balance'])
 
     # Create purchase record
-    purchase_reference = f"SIG-{get_random_string(12).upper()}"
+    purchase_reference = new_reference("SIG")
 
     # Create signal snapshot
     signal_snapshot = {
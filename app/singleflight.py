@@ -0,0 +1,147 @@
+"""
+Request coalescing
+Concurrent identical reads share one computation: within a process the first
+caller for a key computes and the rest wait for its result. With
+SINGLEFLIGHT_LOCK_ROWS and a shared cache, a SingleFlightLock row extends
+this to cached reads across processes, so a popular row's cache miss is
+computed once
+"""
+
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import caching
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_WAIT = 10.0
+DEFAULT_POLL_INTERVAL = 0.05
+
+
+def _wait_timeout():
+    return getattr(settings, "SINGLEFLIGHT_WAIT", DEFAULT_WAIT)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Group:
+    """
+    In-process single flight. ``do(key, fn)`` runs ``fn`` once per key at a
+    time; callers arriving while it runs get the same result (or exception).
+    A caller that waits longer than SINGLEFLIGHT_WAIT computes on its own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(_wait_timeout()):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            logger.warning(f"singleflight {key}: gave up waiting, computing")
+            return fn()
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+# ---------------------------------------------------------------------------
+# Across processes
+# ---------------------------------------------------------------------------
+
+def _acquire(key, owner):
+    """Take the lock row for ``key``; False when another process holds it."""
+    from .models import SingleFlightLock
+
+    now = timezone.now()
+    # A holder that died leaves its row behind until it expires
+    SingleFlightLock.objects.filter(key=key, expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            SingleFlightLock.objects.create(
+                key=key, owner=owner, expires_at=now + timedelta(seconds=_wait_timeout()),
+            )
+        return True
+    except IntegrityError:
+        return False
+
+
+def _release(key, owner):
+    from .models import SingleFlightLock
+
+    SingleFlightLock.objects.filter(key=key, owner=owner).delete()
+
+
+def _across_processes(key, fn, cached):
+    from .models import SingleFlightLock
+
+    owner = uuid.uuid4().hex
+    if _acquire(key, owner):
+        try:
+            return fn()
+        finally:
+            _release(key, owner)
+
+    # Another process is computing: wait for its result to reach the cache.
+    # Once its row is gone with nothing cached (e.g. a 404), compute here.
+    interval = getattr(settings, "SINGLEFLIGHT_POLL_INTERVAL", DEFAULT_POLL_INTERVAL)
+    deadline = time.monotonic() + _wait_timeout()
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        value = cached()
+        if value is not None:
+            return value
+        if not SingleFlightLock.objects.filter(key=key).exists():
+            return fn()
+    logger.warning(f"singleflight {key}: lock holder did not finish in time, computing")
+    return fn()
+
+
+_group = Group()
+
+
+def do(key, fn, cached=None):
+    """
+    The result of ``fn()``, computed once for all concurrent callers of
+    ``key`` in this process. For cached reads pass ``cached`` (returns the
+    cached value or None, and ``fn`` fills the cache); with
+    SINGLEFLIGHT_LOCK_ROWS other processes then wait for that value
+    instead of computing it again. Lock rows are skipped when the cache is
+    per-process, as waiters could never see the holder's value there.
+    """
+    if cached is not None and getattr(settings, "SINGLEFLIGHT_LOCK_ROWS", False) and caching.is_shared():
+        return _group.do(key, lambda: _across_processes(key, fn, cached))
+    return _group.do(key, fn)
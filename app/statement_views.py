@@ -0,0 +1,72 @@
+from datetime import date
+
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from django.utils import timezone
+
+from .statements import build_statement, TOTAL_FIELDS
+
+
+MAX_STATEMENT_DAYS = 366 * 5
+
+
+def _serialize_totals(totals):
+    return {
+        field: (totals[field] if field.endswith('_count') else str(totals[field]))
+        for field in TOTAL_FIELDS
+    }
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_statement(request):
+    """
+    Account statement for a date range.
+    Query params: start, end (YYYY-MM-DD, inclusive). Defaults to the current year to date.
+    """
+    today = timezone.localdate()
+
+    try:
+        start = date.fromisoformat(request.GET.get('start') or f"{today.year}-01-01")
+        end = date.fromisoformat(request.GET.get('end') or today.isoformat())
+    except ValueError:
+        return Response({
+            "success": False,
+            "error": "Dates must be in YYYY-MM-DD format"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if start > end or start > today:
+        return Response({
+            "success": False,
+            "error": "Start date must be on or before the end date and not in the future"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if (end - start).days > MAX_STATEMENT_DAYS:
+        return Response({
+            "success": False,
+            "error": "Statements can cover at most 5 years"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    statement = build_statement(request.user, start, end)
+
+    return Response({
+        "success": True,
+        "statement": {
+            "start": statement['start'].isoformat(),
+            "end": statement['end'].isoformat(),
+            "currency": request.user.currency or "USD",
+            "totals": _serialize_totals(statement['totals']),
+            "net_cash_flow": str(statement['net_cash_flow']),
+            "periods": [
+                {
+                    "start": period['start'].isoformat(),
+                    "end": period['end'].isoformat(),
+                    "source": period['source'],
+                    "totals": _serialize_totals(period['totals']),
+                }
+                for period in statement['periods']
+            ],
+        },
+    })
@@ -0,0 +1,248 @@
+"""
+Account statements
+Per-user monthly rollups of deposits, withdrawals, trade P/L, signal
+purchases and balance transfers. A rollup is dropped whenever a row of its
+month changes (a deposit approved or edited later) and rebuilt on next read
+"""
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+ZERO = Decimal('0.00')
+
+# Totals carried by a MonthlyStatement and by every statement period
+TOTAL_FIELDS = [
+    'deposits_total',
+    'deposits_count',
+    'withdrawals_total',
+    'withdrawals_count',
+    'trade_profit_loss',
+    'trades_count',
+    'signal_purchases_total',
+    'signal_purchases_count',
+    'transfers_to_profit',
+    'transfers_to_balance',
+    'transfers_count',
+]
+
+
+# Source rows of a statement and the timestamp that places them in a month
+SOURCES = {
+    'app.Transaction': 'created_at',
+    'app.TradeHistory': 'executed_at',
+    'app.UserCopyTraderHistory': 'closed_at',
+    'app.UserSignalPurchase': 'purchased_at',
+    'app.BalanceTransfer': 'created_at',
+}
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def next_month(month):
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def previous_month(month):
+    if month.month == 1:
+        return date(month.year - 1, 12, 1)
+    return date(month.year, month.month - 1, 1)
+
+
+def _aware(day):
+    """Midnight at the start of ``day`` in the active timezone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _empty_totals():
+    return {field: (0 if field.endswith('_count') else ZERO) for field in TOTAL_FIELDS}
+
+
+def compute_totals(user, start, end):
+    """
+    Aggregate raw rows for ``user`` over [start, end) (dates) in the database.
+    One grouped query per source table; nothing is loaded row by row.
+    """
+    from .models import Transaction, TradeHistory, UserCopyTraderHistory, UserSignalPurchase, BalanceTransfer
+
+    start_dt, end_dt = _aware(start), _aware(end)
+    totals = _empty_totals()
+
+    # Deposits / withdrawals (completed only - pending money has not moved)
+    rows = (
+        Transaction.objects.filter(
+            user=user, status='completed', created_at__gte=start_dt, created_at__lt=end_dt,
+        )
+        .values('transaction_type')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    for row in rows:
+        key = 'deposits' if row['transaction_type'] == 'deposit' else 'withdrawals'
+        totals[f'{key}_total'] = row['total'] or ZERO
+        totals[f'{key}_count'] = row['count']
+
+    # Realised P/L: stock sells plus admin-assigned direct trades closed in the period
+    stock = TradeHistory.objects.filter(
+        user=user, trade_type='sell', executed_at__gte=start_dt, executed_at__lt=end_dt,
+    ).aggregate(pl=Sum('profit_loss'), count=Count('id'))
+
+    direct = UserCopyTraderHistory.objects.filter(
+        user=user, status='closed', investment_amount__isnull=False,
+        closed_at__gte=start_dt, closed_at__lt=end_dt,
+    ).aggregate(
+        pl=Sum(ExpressionWrapper(
+            F('investment_amount') * F('profit_loss_percent') / Decimal('100'),
+            output_field=DecimalField(max_digits=20, decimal_places=2),
+        )),
+        count=Count('id'),
+    )
+    totals['trade_profit_loss'] = (stock['pl'] or ZERO) + (direct['pl'] or ZERO)
+    totals['trades_count'] = stock['count'] + direct['count']
+
+    signals = UserSignalPurchase.objects.filter(
+        user=user, purchased_at__gte=start_dt, purchased_at__lt=end_dt,
+    ).aggregate(total=Sum('amount_paid'), count=Count('id'))
+    totals['signal_purchases_total'] = signals['total'] or ZERO
+    totals['signal_purchases_count'] = signals['count']
+
+    rows = (
+        BalanceTransfer.objects.filter(
+            user=user, created_at__gte=start_dt, created_at__lt=end_dt,
+        )
+        .values('direction')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    for row in rows:
+        key = 'transfers_to_profit' if row['direction'] == 'balance_to_profit' else 'transfers_to_balance'
+        totals[key] = row['total'] or ZERO
+        totals['transfers_count'] += row['count']
+
+    return totals
+
+
+def monthly_rollups(user, first_month, last_month):
+    """
+    MonthlyStatement rows for every closed month in [first_month, last_month],
+    creating the missing ones (never built, or dropped by ``invalidate``).
+    """
+    from .models import MonthlyStatement
+
+    current = month_start(timezone.localdate())
+    if last_month >= current:
+        raise ValueError("Only closed months can be rolled up")
+
+    existing = {
+        s.month: s
+        for s in MonthlyStatement.objects.filter(user=user, month__gte=first_month, month__lte=last_month)
+    }
+
+    missing = []
+    month = first_month
+    while month <= last_month:
+        if month not in existing:
+            missing.append(MonthlyStatement(
+                user=user, month=month, **compute_totals(user, month, next_month(month))
+            ))
+        month = next_month(month)
+
+    if missing:
+        # A concurrent request may build the same months; the unique constraint keeps one
+        MonthlyStatement.objects.bulk_create(missing, ignore_conflicts=True)
+        logger.info(f"Built {len(missing)} monthly statements for user {user.id}")
+        existing = {
+            s.month: s
+            for s in MonthlyStatement.objects.filter(user=user, month__gte=first_month, month__lte=last_month)
+        }
+
+    return [existing[m] for m in sorted(existing)]
+
+
+def invalidate(user_id, when):
+    """
+    Drop the rollup of the closed month containing ``when`` after one of its
+    source rows changed; the next statement read rebuilds it from raw rows.
+    """
+    from .models import MonthlyStatement
+
+    if user_id is None or when is None:
+        return
+    month = month_start(timezone.localdate(when))
+    if month >= month_start(timezone.localdate()):
+        return
+    if MonthlyStatement.objects.filter(user_id=user_id, month=month).delete()[0]:
+        logger.info(f"Dropped {month:%Y-%m} statement of user {user_id} for rebuild")
+
+
+def build_statement(user, start, end):
+    """
+    Statement for the inclusive date range [start, end].
+
+    Whole closed months come from MonthlyStatement rollups; partial months at
+    the edges of the range and the current month are aggregated from raw rows.
+    """
+    today = timezone.localdate()
+    end = min(end, today)
+    current = month_start(today)
+
+    periods = []
+
+    # Leading partial month
+    cursor = start
+    if cursor != month_start(cursor):
+        period_end = min(next_month(month_start(cursor)), end + timedelta(days=1))
+        periods.append(_raw_period(user, cursor, period_end))
+        cursor = period_end
+
+    # Whole months strictly inside the range that are already closed
+    last_whole = month_start(end + timedelta(days=1))
+    last_closed = min(last_whole, current)
+    if cursor < last_closed:
+        for rollup in monthly_rollups(user, cursor, previous_month(last_closed)):
+            periods.append(_rollup_period(rollup))
+        cursor = last_closed
+
+    # Current month (or trailing partial month) from raw rows
+    if cursor <= end:
+        periods.append(_raw_period(user, cursor, end + timedelta(days=1)))
+
+    totals = _empty_totals()
+    for period in periods:
+        for field in TOTAL_FIELDS:
+            totals[field] += period['totals'][field]
+
+    return {
+        'start': start,
+        'end': end,
+        'totals': totals,
+        'net_cash_flow': totals['deposits_total'] - totals['withdrawals_total'] - totals['signal_purchases_total'],
+        'periods': periods,
+    }
+
+
+def _raw_period(user, start, end):
+    return {
+        'start': start,
+        'end': end - timedelta(days=1),
+        'source': 'live',
+        'totals': compute_totals(user, start, end),
+    }
+
+
+def _rollup_period(rollup):
+    return {
+        'start': rollup.month,
+        'end': next_month(rollup.month) - timedelta(days=1),
+        'source': 'rollup',
+        'totals': {field: getattr(rollup, field) for field in TOTAL_FIELDS},
+    }
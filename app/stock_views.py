@@ -1,10 +1,15 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from decimal import Decimal
-from django.utils.crypto import get_random_string
-from .models import Stock, UserStockPosition, TradeHistory, Notification
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils import timezone
+from .models import Stock, UserStockPosition, StockOrder
+from .market_data import get_quote, get_snapshot
+from .references import new_reference
+from .throttling import TradingThrottle
+from .trading import TradeError, execute_buy, execute_order, execute_sell, trigger_direction_for
 
 
 @api_view(["GET"])
@@ -48,9 +53,8 @@ def stock_detail(request, symbol):
     """
     user = request.user
 
-    try:
-        stock = Stock.objects.get(symbol=symbol.upper(), is_active=True)
-    except Stock.DoesNotExist:
+    stock = get_quote(symbol)
+    if stock is None:
         return Response({
             "success": False,
             "error": "Stock not found"
@@ -59,15 +63,15 @@ def stock_detail(request, symbol):
     # Get user's position if exists
     user_position = None
     try:
-        position = UserStockPosition.objects.get(user=user, stock=stock, is_active=True)
+        position = UserStockPosition.objects.get(user=user, stock_id=stock.id, is_active=True)
         user_position = {
             "id": position.id,
             "shares": str(position.shares),
             "average_buy_price": str(position.average_buy_price),
             "total_invested": str(position.total_invested),
-            "current_value": str(position.current_value),
-            "profit_loss": str(position.profit_loss),
-            "profit_loss_percent": str(position.profit_loss_percent),
+            "current_value": str(position.current_value_at(stock.price)),
+            "profit_loss": str(position.profit_loss_at(stock.price)),
+            "profit_loss_percent": str(position.profit_loss_percent_at(stock.price)),
         }
     except UserStockPosition.DoesNotExist:
         pass
@@ -84,9 +88,9 @@ def stock_detail(request, symbol):
             "change_percent": str(stock.change_percent),
             "volume": stock.volume,
             "market_cap": stock.market_cap,
-            "formatted_market_cap": stock.formatted_market_cap,
+            "formatted_market_cap": Stock.format_market_cap(stock.market_cap),
             "sector": stock.sector,
-            "is_positive_change": stock.is_positive_change,
+            "is_positive_change": stock.change > 0,
         },
         "user_position": user_position,
     })
@@ -94,6 +98,7 @@ def stock_detail(request, symbol):
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([TradingThrottle])
 def buy_stock(request):
     """
     Buy stock shares
@@ -116,89 +121,35 @@ def buy_stock(request):
             "error": "Invalid shares amount"
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Get stock
-    try:
-        stock = Stock.objects.get(symbol=symbol, is_active=True)
-    except Stock.DoesNotExist:
+    # Get stock price from the in-process market snapshot
+    stock = get_quote(symbol)
+    if stock is None:
         return Response({
             "success": False,
             "error": "Stock not found"
         }, status=status.HTTP_404_NOT_FOUND)
 
-    # Calculate total cost
-    total_cost = shares * stock.price
-
-    # Check user balance
-    if user.balance < total_cost:
+    try:
+        with transaction.atomic():
+            trade = execute_buy(user, stock, shares)
+    except TradeError as e:
         return Response({
             "success": False,
-            "error": f"Insufficient balance. You need ${total_cost} but only have ${user.balance}",
-            "required": str(total_cost),
-            "current_balance": str(user.balance),
+            "error": e.message,
+            **e.extra,
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Deduct from balance
-    user.balance -= total_cost
-    user.save(update_fields=['balance'])
-
-    # Get or create position
-    position, created = UserStockPosition.objects.get_or_create(
-        user=user,
-        stock=stock,
-        is_active=True,
-        defaults={
-            'shares': shares,
-            'average_buy_price': stock.price,
-            'total_invested': total_cost,
-        }
-    )
-
-    if not created:
-        # Update existing position
-        total_shares = position.shares + shares
-        total_invested = position.total_invested + total_cost
-        position.average_buy_price = total_invested / total_shares
-        position.shares = total_shares
-        position.total_invested = total_invested
-        position.save(update_fields=['shares', 'average_buy_price', 'total_invested'])
-
-    # Create trade history
-    reference = f"BUY-{get_random_string(12).upper()}"
-    TradeHistory.objects.create(
-        user=user,
-        stock=stock,
-        trade_type='buy',
-        shares=shares,
-        price_per_share=stock.price,
-        total_amount=total_cost,
-        reference=reference,
-    )
-
-    # Create notification
-    Notification.objects.create(
-        user=user,
-        type="trade",
-        title="Stock Purchase Successful",
-        message=f"You bought {shares} shares of {stock.symbol} for ${total_cost}",
-        full_details=f"Your purchase of {shares} shares of {stock.name} ({stock.symbol}) at ${stock.price} per share has been completed. Total cost: ${total_cost}. Reference: {reference}",
-        metadata={
-            "stock": stock.symbol,
-            "amount": f"${total_cost}",
-            "shares": str(shares),
-            "reference": reference,
-        }
-    )
-
     return Response({
         "success": True,
         "message": f"Successfully bought {shares} shares of {stock.symbol}",
-        "reference": reference,
+        "reference": trade.reference,
         "new_balance": str(user.balance),
     })
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([TradingThrottle])
 def sell_stock(request):
     """
     Sell stock shares
@@ -221,92 +172,30 @@ def sell_stock(request):
             "error": "Invalid shares amount"
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Get stock
-    try:
-        stock = Stock.objects.get(symbol=symbol, is_active=True)
-    except Stock.DoesNotExist:
+    # Get stock price from the in-process market snapshot
+    stock = get_quote(symbol)
+    if stock is None:
         return Response({
             "success": False,
             "error": "Stock not found"
         }, status=status.HTTP_404_NOT_FOUND)
 
-    # Get user position
     try:
-        position = UserStockPosition.objects.get(user=user, stock=stock, is_active=True)
-    except UserStockPosition.DoesNotExist:
-        return Response({
-            "success": False,
-            "error": "You don't own any shares of this stock"
-        }, status=status.HTTP_400_BAD_REQUEST)
-
-    # Check if user has enough shares
-    if position.shares < shares:
+        with transaction.atomic():
+            trade = execute_sell(user, stock, shares)
+    except TradeError as e:
         return Response({
             "success": False,
-            "error": f"You only have {position.shares} shares available",
-            "available_shares": str(position.shares),
+            "error": e.message,
+            **e.extra,
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Calculate sale proceeds
-    sale_proceeds = shares * stock.price
-
-    # Calculate profit/loss for this sale
-    cost_basis = (position.total_invested / position.shares) * shares
-    profit_loss = sale_proceeds - cost_basis
-
-    # Add proceeds to balance
-    user.balance += sale_proceeds
-    user.save(update_fields=['balance'])
-
-    # Update position
-    remaining_shares = position.shares - shares
-    if remaining_shares == 0:
-        # Close position
-        position.is_active = False
-        position.save(update_fields=['is_active'])
-    else:
-        # Update position
-        remaining_investment = position.total_invested - cost_basis
-        position.shares = remaining_shares
-        position.total_invested = remaining_investment
-        position.save(update_fields=['shares', 'total_invested'])
-
-    # Create trade history
-    reference = f"SELL-{get_random_string(12).upper()}"
-    TradeHistory.objects.create(
-        user=user,
-        stock=stock,
-        trade_type='sell',
-        shares=shares,
-        price_per_share=stock.price,
-        total_amount=sale_proceeds,
-        profit_loss=profit_loss,
-        reference=reference,
-    )
-
-    # Create notification
-    profit_loss_text = f"profit of ${profit_loss}" if profit_loss >= 0 else f"loss of ${abs(profit_loss)}"
-    Notification.objects.create(
-        user=user,
-        type="trade",
-        title="Stock Sale Successful",
-        message=f"You sold {shares} shares of {stock.symbol} for ${sale_proceeds} ({profit_loss_text})",
-        full_details=f"Your sale of {shares} shares of {stock.name} ({stock.symbol}) at ${stock.price} per share has been completed. Sale proceeds: ${sale_proceeds}. {profit_loss_text.capitalize()}. Reference: {reference}",
-        metadata={
-            "stock": stock.symbol,
-            "amount": f"${sale_proceeds}",
-            "shares": str(shares),
-            "profit_loss": str(profit_loss),
-            "reference": reference,
-        }
-    )
-
     return Response({
         "success": True,
         "message": f"Successfully sold {shares} shares of {stock.symbol}",
-        "reference": reference,
-        "sale_proceeds": str(sale_proceeds),
-        "profit_loss": str(profit_loss),
+        "reference": trade.reference,
+        "sale_proceeds": str(trade.total_amount),
+        "profit_loss": str(trade.profit_loss),
         "new_balance": str(user.balance),
     })
 
@@ -319,11 +208,14 @@ def user_positions(request):
     """
     user = request.user
 
-    positions = UserStockPosition.objects.filter(user=user, is_active=True).select_related('stock')
+    positions = UserStockPosition.objects.filter(user=user, is_active=True)
+    snapshot = get_snapshot()
 
     positions_list = []
     for position in positions:
-        stock = position.stock
+        # Delisted/inactive stocks are not in the snapshot; load those rows directly
+        stock = snapshot.by_id.get(position.stock_id) or position.stock
+        profit_loss = position.profit_loss_at(stock.price)
         positions_list.append({
             "id": position.id,
             "stock": {
@@ -335,13 +227,170 @@ def user_positions(request):
             "shares": str(position.shares),
             "average_buy_price": str(position.average_buy_price),
             "total_invested": str(position.total_invested),
-            "current_value": str(position.current_value),
-            "profit_loss": str(position.profit_loss),
-            "profit_loss_percent": str(position.profit_loss_percent),
-            "is_positive": position.profit_loss >= 0,
+            "current_value": str(position.current_value_at(stock.price)),
+            "profit_loss": str(profit_loss),
+            "profit_loss_percent": str(position.profit_loss_percent_at(stock.price)),
+            "is_positive": profit_loss >= 0,
         })
 
     return Response({
         "success": True,
         "positions": positions_list,
     })
+
+
+def _serialize_order(order):
+    return {
+        "id": order.id,
+        "reference": order.reference,
+        "symbol": order.stock.symbol,
+        "order_type": order.order_type,
+        "order_type_display": order.get_order_type_display(),
+        "side": order.side,
+        "shares": str(order.shares),
+        "trigger_price": str(order.trigger_price),
+        "status": order.status,
+        "filled_price": str(order.filled_price) if order.filled_price is not None else None,
+        "filled_at": order.filled_at.isoformat() if order.filled_at else None,
+        "reject_reason": order.reject_reason,
+        "created_at": order.created_at.isoformat(),
+    }
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@throttle_classes([TradingThrottle])
+def place_order(request):
+    """
+    Place a resting limit / stop-loss / take-profit order.
+    Stop-loss and take-profit orders close an existing position, so they are always sells.
+    """
+    user = request.user
+    symbol = request.data.get('symbol', '').strip().upper()
+    order_type = request.data.get('order_type', '').strip().lower()
+    side = request.data.get('side', 'sell').strip().lower()
+
+    if order_type not in dict(StockOrder.ORDER_TYPES):
+        return Response({
+            "success": False,
+            "error": "order_type must be one of: limit, stop_loss, take_profit"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if order_type in ('stop_loss', 'take_profit'):
+        side = 'sell'
+    elif side not in dict(StockOrder.SIDES):
+        return Response({
+            "success": False,
+            "error": "side must be buy or sell"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Validate inputs
+    try:
+        shares = Decimal(str(request.data.get('shares', '0')))
+        trigger_price = Decimal(str(request.data.get('trigger_price', '0')))
+        # NaN would raise on comparison; Infinity would pass it
+        if not shares.is_finite() or not trigger_price.is_finite():
+            raise ValueError
+    except (InvalidOperation, ValueError, TypeError):
+        return Response({
+            "success": False,
+            "error": "Invalid shares or trigger price"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if shares <= 0 or trigger_price <= 0:
+        return Response({
+            "success": False,
+            "error": "Shares and trigger price must be greater than 0"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    stock = get_quote(symbol)
+    if stock is None:
+        return Response({
+            "success": False,
+            "error": "Stock not found"
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    if side == 'sell':
+        position = UserStockPosition.objects.filter(user=user, stock_id=stock.id, is_active=True).first()
+        if position is None or position.shares < shares:
+            return Response({
+                "success": False,
+                "error": "You don't own enough shares of this stock",
+                "available_shares": str(position.shares if position else 0),
+            }, status=status.HTTP_400_BAD_REQUEST)
+    elif user.balance < shares * trigger_price:
+        return Response({
+            "success": False,
+            "error": f"Insufficient balance. You need ${shares * trigger_price} but only have ${user.balance}",
+            "required": str(shares * trigger_price),
+            "current_balance": str(user.balance),
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    order = StockOrder.objects.create(
+        user=user,
+        stock_id=stock.id,
+        order_type=order_type,
+        side=side,
+        shares=shares,
+        trigger_price=trigger_price,
+        trigger_direction=trigger_direction_for(order_type, side),
+        reference=new_reference("ORD"),
+    )
+
+    # An order placed on the far side of the current price fills right away.
+    # Checked against the stored price, not the (up to MARKET_SNAPSHOT_MAX_AGE
+    # old) snapshot quote, and locked so a price change cannot land between
+    # the read and the fill. Other users' orders are left to the Stock
+    # post_save sweep.
+    with transaction.atomic():
+        current = Stock.objects.select_for_update().filter(pk=stock.id, is_active=True).first()
+        if current is not None and order.is_crossed_at(current.price):
+            execute_order(order, current)
+            order.refresh_from_db()
+
+    return Response({
+        "success": True,
+        "message": f"{order.get_order_type_display()} order placed for {shares} shares of {stock.symbol}",
+        "order": _serialize_order(order),
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def list_orders(request):
+    """
+    Get user's resting orders, optionally filtered by status
+    """
+    orders = StockOrder.objects.filter(user=request.user).select_related('stock')
+
+    order_status = request.GET.get('status')
+    if order_status:
+        orders = orders.filter(status=order_status)
+
+    return Response({
+        "success": True,
+        "orders": [_serialize_order(order) for order in orders[:100]],
+    })
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@throttle_classes([TradingThrottle])
+def cancel_order(request, order_id):
+    """
+    Cancel an open order
+    """
+    updated = StockOrder.objects.filter(
+        id=order_id, user=request.user, status='open'
+    ).update(status='cancelled', updated_at=timezone.now())
+
+    if not updated:
+        return Response({
+            "success": False,
+            "error": "Open order not found"
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        "success": True,
+        "message": "Order cancelled",
+    })
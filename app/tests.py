@@ -1,3 +1,651 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from . import (
+    broadcasts, counters, email_service, identifiers, images, leaderboard, market_data, notification_archive, references, singleflight,
+    statements, throttling, tiered_storage,
+)
+from .models import (
+    CustomUser, MediaUpload, News, Notification, NotificationArchive, RateLimitBucket, ReferenceNodeLease, Stock,
+    StockOrder, Trader, TraderCounterShard, Transaction, UserCopyTraderHistory, UserTraderCopy,
+)
+from .admin import TraderAdmin
+from .media_views import serve_pending_media
+
+
+class PermutationTests(TestCase):
+    def test_feistel_is_a_bijection(self):
+        outputs = {identifiers._feistel(v, 8, "test") for v in range(256)}
+        self.assertEqual(outputs, set(range(256)))
+
+    def test_permute_is_a_bijection_on_the_domain(self):
+        # 1000 values on 10 bits: cycle walking must land every value inside the domain
+        outputs = [identifiers.permute(v, 1000, 10, "test") for v in range(1000)]
+        self.assertEqual(sorted(outputs), list(range(1000)))
+
+    def test_permute_rejects_values_outside_the_domain(self):
+        with self.assertRaises(ValueError):
+            identifiers.permute(1000, 1000, 10, "test")
+
+    def test_identifier_shapes(self):
+        account_id = identifiers.account_id_for(0)
+        self.assertEqual(len(account_id), 10)
+        self.assertTrue(account_id.isdigit())
+        code = identifiers.referral_code_for(0)
+        self.assertEqual(len(code), identifiers.REFERRAL_LENGTH)
+        self.assertTrue(set(code) <= set(identifiers.REFERRAL_ALPHABET))
+
+
+class SequenceAllocatorTests(TestCase):
+    def test_values_are_unique_across_blocks(self):
+        allocator = identifiers.SequenceAllocator("test", block_size=3)
+        values = [allocator.next_value() for _ in range(10)]
+        self.assertEqual(len(set(values)), 10)
+        self.assertEqual(values, sorted(values))
+
+    def test_allocators_sharing_a_sequence_do_not_overlap(self):
+        # Two processes: each reserves its own blocks from the same row
+        first = identifiers.SequenceAllocator("shared", block_size=4)
+        second = identifiers.SequenceAllocator("shared", block_size=4)
+        values = []
+        for _ in range(6):
+            values.append(first.next_value())
+            values.append(second.next_value())
+        self.assertEqual(len(set(values)), len(values))
+
+    def test_ids_stay_unique_across_blocks(self):
+        allocator = identifiers.SequenceAllocator("ids", block_size=5)
+        values = [allocator.next_value() for _ in range(50)]
+        self.assertEqual(len({identifiers.account_id_for(n) for n in values}), 50)
+        self.assertEqual(len({identifiers.referral_code_for(n) for n in values}), 50)
+
+
+class CreateUserIdentifierTests(TestCase):
+    def test_collision_draws_new_identifiers(self):
+        with mock.patch.object(identifiers._allocator, "next_value", side_effect=[5, 5, 6]):
+            first = CustomUser.objects.create_user(email="first@example.com")
+            second = CustomUser.objects.create_user(email="second@example.com")
+
+        self.assertEqual(first.account_id, identifiers.account_id_for(5))
+        self.assertEqual(second.account_id, identifiers.account_id_for(6))
+        self.assertEqual(second.referral_code, identifiers.referral_code_for(6))
+
+    def test_duplicate_email_is_not_retried(self):
+        CustomUser.objects.create_user(email="taken@example.com")
+        with mock.patch.object(identifiers._allocator, "next_value", wraps=identifiers._allocator.next_value) as drawn:
+            with self.assertRaises(IntegrityError):
+                CustomUser.objects.create_user(email="taken@example.com")
+        self.assertEqual(drawn.call_count, 1)
+
+    def test_gives_up_after_the_attempt_limit(self):
+        with mock.patch.object(identifiers._allocator, "next_value", return_value=7):
+            CustomUser.objects.create_user(email="one@example.com")
+            with self.assertRaises(IntegrityError):
+                CustomUser.objects.create_user(email="two@example.com")
+
+
+class ReferenceTests(TestCase):
+    def test_encoding_round_trips_the_timestamp(self):
+        generator = references.ReferenceGenerator(node_id=3)
+        value = generator.next_id()
+        code = references._encode(value)
+        self.assertEqual(len(code), references.LENGTH)
+        self.assertTrue(set(code) <= set(references.ALPHABET))
+        self.assertEqual(
+            references.reference_timestamp(f"TXN-{code}"),
+            value >> (references.NODE_BITS + references.SEQUENCE_BITS),
+        )
+
+    def test_node_is_encoded(self):
+        value = references.ReferenceGenerator(node_id=5).next_id()
+        self.assertEqual((value >> references.SEQUENCE_BITS) & references.MAX_NODE, 5)
+
+    def test_references_are_unique_and_ordered(self):
+        generator = references.ReferenceGenerator(node_id=1)
+        codes = [generator.next_code() for _ in range(5000)]
+        self.assertEqual(len(set(codes)), len(codes))
+        self.assertEqual(codes, sorted(codes))
+
+    def test_clock_going_backwards_keeps_ids_increasing(self):
+        generator = references.ReferenceGenerator(node_id=1)
+        with mock.patch("app.references.time.time", return_value=2_000_000.0):
+            first = generator.next_id()
+        with mock.patch("app.references.time.time", return_value=1_000_000.0):
+            second = generator.next_id()
+        self.assertGreater(second, first)
+
+    def test_unknown_references_have_no_timestamp(self):
+        self.assertIsNone(references.reference_timestamp("TXN-123"))
+        self.assertIsNone(references.reference_timestamp("TXN-UUUUUUUUUUUUUU"))
+
+    def test_generators_lease_distinct_nodes(self):
+        first, second = references.ReferenceGenerator(), references.ReferenceGenerator()
+        first.ensure_node()
+        second.ensure_node()
+        self.assertNotEqual(first._node, second._node)
+        self.assertEqual(ReferenceNodeLease.objects.count(), 2)
+
+    def test_expired_lease_is_reused(self):
+        generator = references.ReferenceGenerator()
+        generator.ensure_node()
+        ReferenceNodeLease.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        other = references.ReferenceGenerator()
+        other.ensure_node()
+        self.assertEqual(other._node, generator._node)
+
+
+class NotificationArchivePageTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="reader@example.com")
+        now = timezone.now()
+        # 3 hot notifications (days 0-2) and 5 archived ones (days 200-204), newest first
+        for day in list(range(3)) + list(range(200, 205)):
+            n = Notification.objects.create(
+                user=self.user, type="trade" if day % 2 else "system",
+                title=f"day {day}", message="", read=True,
+            )
+            Notification.objects.filter(pk=n.pk).update(created_at=now - timedelta(days=day))
+        # Segments of two, so a page can also span archive segments
+        with mock.patch.object(notification_archive, "SEGMENT_SIZE", 2):
+            archived = notification_archive.archive(notification_archive.eligible(now))
+        self.assertEqual(archived, 5)
+        self.assertEqual(NotificationArchive.objects.filter(user=self.user).count(), 3)
+
+    def titles(self, offset, limit, notification_type=None):
+        total, items = notification_archive.page(self.user, offset, limit, notification_type)
+        return total, [n["title"] for n in items]
+
+    def test_page_within_the_hot_table(self):
+        self.assertEqual(self.titles(0, 2), (8, ["day 0", "day 1"]))
+
+    def test_page_spanning_hot_table_and_archive(self):
+        self.assertEqual(self.titles(2, 3), (8, ["day 2", "day 200", "day 201"]))
+
+    def test_page_inside_the_archive(self):
+        self.assertEqual(self.titles(4, 3), (8, ["day 201", "day 202", "day 203"]))
+        self.assertEqual(self.titles(7, 5), (8, ["day 204"]))
+        self.assertEqual(self.titles(8, 5), (8, []))
+
+    def test_type_filter_counts_and_skips_archived_rows(self):
+        self.assertEqual(self.titles(0, 10, "trade"), (3, ["day 1", "day 201", "day 203"]))
+        self.assertEqual(self.titles(1, 1, "trade"), (3, ["day 201"]))
+
+    def test_archived_items_are_flagged(self):
+        _, items = notification_archive.page(self.user, 2, 2)
+        self.assertEqual([n.get("archived", False) for n in items], [False, True])
+
+
+class CopyTradeBroadcastTests(TestCase):
+    def setUp(self):
+        self.trader = Trader.objects.create(
+            name="Tess", username="tess", country="US", gain=Decimal("10"), risk=3, capital="10K",
+            copiers=1, avg_trade_time="1 day", trades=10,
+        )
+        self.copier = CustomUser.objects.create_user(email="copier@example.com")
+        self.other = CustomUser.objects.create_user(email="other@example.com")
+        rel = UserTraderCopy.objects.create(user=self.copier, trader=self.trader, initial_investment_amount=Decimal("200"))
+        trade = UserCopyTraderHistory.objects.create(
+            trader=self.trader, market="BTC/USDT", direction="buy", duration="1h",
+            amount=Decimal("100"), entry_price=Decimal("1"), profit_loss_percent=Decimal("12.50"), status="closed",
+        )
+        self.broadcast = broadcasts.publish_copy_trade(trade, [rel])
+
+    def test_copier_sees_their_amounts_at_publish_time(self):
+        UserTraderCopy.objects.filter(user=self.copier).update(initial_investment_amount=Decimal("5000"))
+        audience = broadcasts.Audience(self.copier)
+        [item] = audience.render(audience.queryset())
+        self.assertEqual(item["id"], f"b-{self.broadcast.id}")
+        self.assertEqual(item["message"], "Copy trade on BTC/USDT gained $25.0000")
+        self.assertIn("Your Investment: $200.00", item["full_details"])
+        self.assertNotIn("copiers", item["metadata"])
+
+    def test_non_copier_does_not_see_it(self):
+        UserTraderCopy.objects.create(user=self.other, trader=self.trader)
+        self.assertFalse(broadcasts.Audience(self.other).queryset().exists())
+
+
+@override_settings(SINGLEFLIGHT_LOCK_ROWS=True)
+class SingleFlightTests(TestCase):
+    def test_lock_rows_need_a_shared_cache(self):
+        with mock.patch.object(singleflight, "_across_processes", return_value="shared") as across:
+            self.assertEqual(singleflight.do("k", lambda: "local", cached=lambda: None), "local")
+            across.assert_not_called()
+            with mock.patch.object(singleflight.caching, "is_shared", return_value=True):
+                self.assertEqual(singleflight.do("k", lambda: "local", cached=lambda: None), "shared")
+
+
+class TradeSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="direct@example.com")
+        self.trade = UserCopyTraderHistory.objects.create(
+            user=self.user, market="BTC/USDT", direction="buy", duration="1h", amount=Decimal("100"),
+            entry_price=Decimal("1"), profit_loss_percent=Decimal("5"), status="closed",
+            closed_at=timezone.now() - timedelta(days=90),
+        )
+
+    def test_one_read_feeds_stats_and_statements(self):
+        old_closed_at = self.trade.closed_at
+        self.trade.closed_at = timezone.now() - timedelta(days=60)
+        with mock.patch.object(statements, "invalidate") as invalidate, CaptureQueriesContext(connection) as queries:
+            self.trade.save()
+        table = UserCopyTraderHistory._meta.db_table
+        reads = [q for q in queries if q["sql"].startswith("SELECT") and f'FROM "{table}"' in q["sql"]]
+        self.assertEqual(len(reads), 1)
+        invalidate.assert_any_call(self.user.pk, old_closed_at)
+
+
+class LeaderboardPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Gains 30, 20, 20, 20, 10: three traders tie on 20
+        self.traders = [self.trader(f"t{i}", gain) for i, gain in enumerate((30, 20, 20, 20, 10))]
+        leaderboard.rebuild()
+
+    def trader(self, username, gain):
+        return Trader.objects.create(
+            name=username, username=username, country="US", gain=Decimal(gain), risk=3, capital="10K",
+            copiers=0, avg_trade_time="1 day", trades=10,
+        )
+
+    def walk(self, limit):
+        pages, cursor = [], None
+        while True:
+            total, entries, cursor = leaderboard.page(cursor=cursor, limit=limit)
+            pages.append([(e.rank, e.trader.username) for e in entries])
+            if cursor is None:
+                return total, pages
+
+    def test_keyset_pages_cover_the_board_in_order(self):
+        total, pages = self.walk(limit=2)
+        self.assertEqual(total, 5)
+        self.assertEqual(pages, [
+            [(1, "t0"), (2, "t1")],
+            [(3, "t2"), (4, "t3")],
+            [(5, "t4")],
+        ])
+
+    def test_offset_jump_matches_keyset(self):
+        _, entries, cursor = leaderboard.page(offset=2, limit=2)
+        self.assertEqual([(e.rank, e.trader.username) for e in entries], [(3, "t2"), (4, "t3")])
+        self.assertEqual(cursor, f"4:20.0000:{self.traders[3].pk}")
+
+    def test_total_is_cached_until_membership_changes(self):
+        self.assertEqual(leaderboard.page()[0], 5)
+        with self.assertNumQueries(1):
+            leaderboard.page()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trader("t5", 5)
+        self.assertEqual(leaderboard.page()[0], 6)
+
+    def test_malformed_cursor(self):
+        for cursor in ("x", "1:NaN:2", "1:2", "-1:5:2"):
+            with self.assertRaises(ValueError):
+                leaderboard.page(cursor=cursor)
+
+    def test_view_returns_next_cursor(self):
+        response = self.client.get("/api/auth/traders/leaderboard/", {"limit": 3})
+        self.assertEqual([r["rank"] for r in response.data["results"]], [1, 2, 3])
+        response = self.client.get("/api/auth/traders/leaderboard/", {"limit": 3, "cursor": response.data["next_cursor"]})
+        self.assertEqual([r["rank"] for r in response.data["results"]], [4, 5])
+        self.assertIsNone(response.data["next_cursor"])
+        self.assertEqual(self.client.get("/api/auth/traders/leaderboard/", {"cursor": "x"}).status_code, 400)
+
+
+class TraderAdminTests(TestCase):
+    def test_edited_counters_drop_their_pending_shards(self):
+        trader = Trader.objects.create(
+            name="Tess", username="tess", country="US", gain=Decimal("10"), risk=3, capital="10K",
+            copiers=1, avg_trade_time="1 day", trades=10,
+        )
+        for field in ("copiers", "followers"):
+            TraderCounterShard.objects.create(trader=trader, field=field, shard=0, delta=3)
+
+        trader.copiers = 50
+        TraderAdmin(Trader, admin.site).save_model(None, trader, mock.Mock(changed_data=["copiers", "gain"]), True)
+        self.assertEqual(list(TraderCounterShard.objects.values_list("field", flat=True)), ["followers"])
+        self.assertEqual(counters.value(Trader.objects.get(pk=trader.pk), "copiers"), 50)
+
+
+class TokenBucketTests(TestCase):
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate("10/minute"), (10, 10 / 60))
+        self.assertEqual(throttling.parse_rate("5/s"), (5, 5))
+        self.assertEqual(throttling.parse_rate("24/day"), (24, 24 / 86400))
+
+    def test_account_key_is_per_ip(self):
+        throttle = throttling.AuthAccountThrottle()
+
+        def key(email, ip):
+            return throttle.get_key(mock.Mock(data={"email": email}, META={"REMOTE_ADDR": ip}))
+
+        self.assertEqual(key("A@example.com ", "10.0.0.1"), key("a@example.com", "10.0.0.1"))
+        self.assertNotEqual(key("a@example.com", "10.0.0.1"), key("a@example.com", "10.0.0.2"))
+        self.assertIsNone(throttle.get_key(mock.Mock(data={}, META={"REMOTE_ADDR": "10.0.0.1"})))
+
+    def assert_bucket_arithmetic(self, store):
+        # 3 tokens, one more per second
+        for _ in range(3):
+            self.assertEqual(store.take("k", 3, 1.0, 100.0), (True, 0))
+        allowed, wait = store.take("k", 3, 1.0, 100.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1.0)
+
+        allowed, wait = store.take("k", 3, 1.0, 100.5)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 0.5)
+
+        self.assertEqual(store.take("k", 3, 1.0, 101.0), (True, 0))
+        self.assertFalse(store.take("k", 3, 1.0, 101.0)[0])
+
+        # Refill stops at capacity however long the client stays away
+        for _ in range(3):
+            self.assertTrue(store.take("k", 3, 1.0, 1000.0)[0])
+        self.assertFalse(store.take("k", 3, 1.0, 1000.0)[0])
+
+        # Buckets are per key
+        self.assertTrue(store.take("other", 3, 1.0, 1000.0)[0])
+
+    def test_memory_store(self):
+        self.assert_bucket_arithmetic(throttling.MemoryStore())
+
+    def test_database_store(self):
+        self.assert_bucket_arithmetic(throttling.DatabaseStore())
+
+    def test_database_store_takes_from_a_row_created_concurrently(self):
+        store = throttling.DatabaseStore()
+        take_existing = store._take_existing
+
+        def racing(*args):
+            # The first UPDATE misses; another request creates the row before our INSERT
+            if not RateLimitBucket.objects.filter(key="k").exists():
+                RateLimitBucket.objects.create(key="k", tokens=2, updated_at=100.0)
+                return False
+            return take_existing(*args)
+
+        with mock.patch.object(store, "_take_existing", side_effect=racing):
+            self.assertEqual(store.take("k", 3, 1.0, 100.0), (True, 0))
+        self.assertEqual(RateLimitBucket.objects.get(key="k").tokens, 1)
+
+
+class NewsDetailETagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = News.objects.create(
+            title="Rates hold", summary="s", content="c", category="Economy", source="Wire", author="Desk",
+            published_at=timezone.now(),
+        )
+        self.url = f"/api/auth/news/{self.news.pk}/"
+
+    def get(self, **headers):
+        return self.client.get(self.url, headers=headers)
+
+    def test_every_encoding_shares_one_weak_etag(self):
+        etags = {self.get(accept_encoding=encoding)["ETag"] for encoding in ("gzip", "br", "identity")}
+        self.assertEqual(len(etags), 1)
+        self.assertTrue(etags.pop().startswith('W/"'))
+
+    def test_conditional_request_matches_weakly(self):
+        etag = self.get(accept_encoding="gzip")["ETag"]
+        for tag in (etag, etag.removeprefix("W/"), f'"other", {etag}', "*"):
+            self.assertEqual(self.get(accept_encoding="identity", if_none_match=tag).status_code, 304)
+        self.assertEqual(self.get(if_none_match='W/"other"').status_code, 200)
+
+
+class PlaceOrderTests(TestCase):
+    def setUp(self):
+        market_data.invalidate()
+        self.stock = Stock.objects.create(symbol="AAPL", name="Apple", price=Decimal("100"), change=0, change_percent=0)
+        self.user = CustomUser.objects.create_user(email="trader@example.com", balance=Decimal("10000"))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Snapshot built at 100; the stored price then moves without a version bump
+        market_data.get_snapshot()
+        Stock.objects.filter(pk=self.stock.pk).update(price=Decimal("110"))
+
+    def place(self, **data):
+        payload = {"symbol": "AAPL", "order_type": "limit", "side": "buy", "shares": "1", "trigger_price": "105"}
+        payload.update(data)
+        return self.client.post("/api/auth/stocks/orders/place/", payload, format="json")
+
+    def test_crossing_is_judged_on_the_stored_price(self):
+        other = CustomUser.objects.create_user(email="other@example.com", balance=Decimal("10000"))
+        resting = StockOrder.objects.create(
+            user=other, stock=self.stock, order_type="limit", side="buy", shares=1,
+            trigger_price=Decimal("105"), trigger_direction=StockOrder.TRIGGER_AT_OR_BELOW, reference="ORD-OTHER",
+        )
+
+        response = self.place()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["order"]["status"], "open")
+        resting.refresh_from_db()
+        self.assertEqual(resting.status, "open")
+
+    def test_crossed_order_fills_at_the_stored_price(self):
+        response = self.place(trigger_price="120")
+        self.assertEqual(response.data["order"]["status"], "filled")
+        self.assertEqual(Decimal(response.data["order"]["filled_price"]), Decimal("110"))
+
+    def test_non_finite_values_are_rejected(self):
+        for value in ("NaN", "Infinity", "-Infinity"):
+            self.assertEqual(self.place(shares=value).status_code, 400)
+            self.assertEqual(self.place(trigger_price=value).status_code, 400)
+        self.assertFalse(StockOrder.objects.exists())
+
+    def test_cancel_touches_updated_at(self):
+        order_id = self.place().data["order"]["id"]
+        before = StockOrder.objects.get(pk=order_id).updated_at
+        response = self.client.post(f"/api/auth/stocks/orders/{order_id}/cancel/")
+        self.assertEqual(response.status_code, 200)
+        order = StockOrder.objects.get(pk=order_id)
+        self.assertEqual(order.status, "cancelled")
+        self.assertGreater(order.updated_at, before)
+
+
+class MarketSnapshotTests(TestCase):
+    def setUp(self):
+        market_data.invalidate()
+        self.stock = Stock.objects.create(symbol="AAPL", name="Apple", price=Decimal("100"), change=0, change_percent=0)
+
+    def price(self, max_age=None):
+        return market_data.get_quote("AAPL", max_age).price
+
+    def test_save_in_another_process_is_seen(self):
+        self.assertEqual(self.price(), Decimal("100"))
+        # The other worker's cache bump never reaches this process
+        with mock.patch.object(market_data, "bump_version"):
+            self.stock.price = Decimal("120")
+            self.stock.save()
+        self.assertEqual(self.price(), Decimal("120"))
+
+    def test_shared_cache_version_bump_rebuilds(self):
+        with mock.patch.object(market_data.caching, "is_shared", return_value=True):
+            self.assertEqual(self.price(), Decimal("100"))
+            Stock.objects.filter(pk=self.stock.pk).update(price=Decimal("130"))
+            self.assertEqual(self.price(), Decimal("100"))
+            market_data.bump_version()
+            self.assertEqual(self.price(), Decimal("130"))
+
+    def test_snapshot_is_rebuilt_after_max_age(self):
+        with mock.patch.object(market_data.time, "monotonic", return_value=1000.0) as clock:
+            self.assertEqual(self.price(max_age=30), Decimal("100"))
+            Stock.objects.filter(pk=self.stock.pk).update(price=Decimal("140"))
+            clock.return_value = 1030.0
+            self.assertEqual(self.price(max_age=30), Decimal("100"))
+            clock.return_value = 1030.5
+            self.assertEqual(self.price(max_age=30), Decimal("140"))
+
+
+@override_settings(MEDIA_DEFERRED_UPLOADS=True, IMAGE_PIPELINE=False)
+class TieredStorageTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.storage = tiered_storage.TieredMediaStorage(location=os.path.join(root, "pending-upload"))
+        self.remote = tiered_storage.LocalFakeRemote(root=os.path.join(root, "fake-remote"))
+        for patcher in (
+            mock.patch.object(tiered_storage, "storage", self.storage),
+            mock.patch.object(tiered_storage, "_remote", self.remote),
+            mock.patch("app.media_views.storage", self.storage),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = CustomUser.objects.create_user(email="depositor@example.com")
+
+    def deposit(self):
+        """A deposit whose receipt is staged; returns it with the push callbacks not yet run."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            deposit = Transaction.objects.create(
+                user=self.user, transaction_type="deposit", amount=Decimal("50"), reference="DEP-1", currency="USD",
+                receipt=SimpleUploadedFile("Receipt.PDF", b"%PDF-1.4 receipt", content_type="application/pdf"),
+            )
+        return deposit, callbacks
+
+    def serve(self, value):
+        name = tiered_storage.local_url(value).rsplit("/", 1)[1]
+        return serve_pending_media(RequestFactory().get("/"), name)
+
+    def test_stage_push_and_swap(self):
+        deposit, callbacks = self.deposit()
+        placeholder = deposit.receipt
+        self.assertTrue(tiered_storage.is_pending(placeholder))
+        self.assertTrue(os.path.exists(self.storage.path(placeholder)))
+        upload = MediaUpload.objects.get()
+        self.assertEqual((upload.status, upload.field_name), ("pending", "receipt"))
+
+        with override_settings(BACKGROUND_TASKS_EAGER=True):
+            for callback in callbacks:
+                callback()
+
+        deposit.refresh_from_db()
+        self.assertFalse(tiered_storage.is_pending(deposit.receipt))
+        self.assertEqual(deposit.receipt.public_id, "receipt/" + placeholder.public_id.rsplit("/", 1)[1])
+        self.assertFalse(os.path.exists(self.storage.path(placeholder)))
+        upload.refresh_from_db()
+        self.assertEqual((upload.status, upload.attempts), ("done", 1))
+        self.assertEqual(len(self.remote.uploads), 1)
+
+    def test_failed_push_is_retried_by_the_worker(self):
+        deposit, callbacks = self.deposit()
+        upload = self.remote.upload
+        failures = [OSError("remote down")]
+
+        def flaky(path, options):
+            if failures:
+                raise failures.pop()
+            return upload(path, options)
+
+        with mock.patch.object(self.remote, "upload", side_effect=flaky), override_settings(BACKGROUND_TASKS_EAGER=True):
+            for callback in callbacks:
+                callback()
+
+        record = MediaUpload.objects.get()
+        self.assertEqual((record.status, record.attempts, record.last_error), ("done", 2, ""))
+        deposit.refresh_from_db()
+        self.assertFalse(tiered_storage.is_pending(deposit.receipt))
+
+    @override_settings(MEDIA_UPLOAD_MAX_ATTEMPTS=2)
+    def test_push_gives_up_after_max_attempts(self):
+        deposit, _ = self.deposit()
+        with mock.patch.object(self.remote, "upload", side_effect=OSError("remote down")):
+            for _ in range(2):
+                with self.assertRaises(OSError):
+                    self.storage.push(deposit.receipt.get_prep_value())
+        self.assertEqual(MediaUpload.objects.get().status, "failed")
+        self.assertEqual(tiered_storage.retry_pending(), (1, 0))
+
+    def test_serve_pending_media(self):
+        deposit, _ = self.deposit()
+        placeholder = deposit.receipt
+        response = self.serve(placeholder)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.4 receipt")
+        response.close()
+
+        self.storage.push(placeholder.get_prep_value())
+        response = self.serve(placeholder)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/receipt/", response["Location"])
+
+    def test_unknown_names_are_not_served(self):
+        with self.assertRaises(Http404):
+            serve_pending_media(RequestFactory().get("/"), "missing.pdf")
+
+    @override_settings(BACKEND_URL="https://api.example.com")
+    def test_deposit_email_links_the_pending_receipt(self):
+        deposit, _ = self.deposit()
+        with mock.patch.object(email_service, "send_email") as send_email:
+            email_service.send_admin_deposit_notification(self.user, deposit)
+        html = send_email.call_args[0][2]
+        self.assertIn(f'href="https://api.example.com{tiered_storage.local_url(deposit.receipt)}"', html)
+
+
+class ImagePipelineTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.path = os.path.join(root, "upload.jpg")
+
+    def decode_dc(self, hash_):
+        value = 0
+        for char in hash_[2:6]:
+            value = value * 83 + images._BASE83.index(char)
+        return value >> 16, (value >> 8) & 255, value & 255
+
+    @override_settings(IMAGE_MAX_DIMENSION=32)
+    def test_normalize_then_blurhash(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # stored rotated; displayed upright after a 90 degree turn
+        exif[0x010F] = "Camera"
+        Image.new("RGB", (80, 40), (200, 30, 30)).save(self.path, "JPEG", exif=exif)
+
+        self.assertTrue(images.normalize_file(self.path))
+        with Image.open(self.path) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (16, 32))
+            self.assertFalse(image.getexif())
+
+            hash_ = images.blurhash(image)
+        cx, cy = images.BLURHASH_COMPONENTS
+        self.assertEqual(len(hash_), 6 + 2 * (cx * cy - 1))
+        for decoded, expected in zip(self.decode_dc(hash_), (200, 30, 30)):
+            self.assertAlmostEqual(decoded, expected, delta=6)
+
+    def test_non_images_are_left_alone(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not an image")
+        self.assertFalse(images.normalize_file(self.path))
+
+    def test_media_receivers_only_for_cloudinary_models(self):
+        user = CustomUser.objects.create_user(email="saver@example.com")
+        stock = Stock.objects.create(symbol="MSFT", name="Microsoft", price=Decimal("10"), change=0, change_percent=0)
+        with mock.patch.object(tiered_storage, "stage_uploads") as stage, \
+                mock.patch.object(images, "queue_new_images") as queue:
+            StockOrder.objects.create(
+                user=user, stock=stock, order_type="limit", side="buy", shares=1, trigger_price=Decimal("9"),
+                trigger_direction=StockOrder.TRIGGER_AT_OR_BELOW, reference="ORD-1",
+            )
+            stage.assert_not_called()
+            queue.assert_not_called()
+            Transaction.objects.create(
+                user=user, transaction_type="deposit", amount=Decimal("5"), reference="DEP-2", currency="USD",
+            )
+            stage.assert_called_once()
+            queue.assert_called_once()
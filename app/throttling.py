@@ -0,0 +1,209 @@
+"""
+Rate limiting
+Token buckets per endpoint class (auth, trading, reads) kept where every
+process sees them, the RateLimitBucket table by default. An allowed request
+costs one conditional UPDATE; a client that ran dry is turned away in-process
+until its next token is due, without touching the store
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# In-process "empty until" notes kept at most
+MAX_BLOCKED_KEYS = 10000
+
+
+def parse_rate(rate):
+    """DRF rate string to (capacity, tokens refilled per second): "10/minute" -> (10, 10 / 60)."""
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity, capacity / DURATIONS[period[0]]
+
+
+# ---------------------------------------------------------------------------
+# Stores
+# ---------------------------------------------------------------------------
+
+class DatabaseStore:
+    """Buckets in RateLimitBucket; the refill and the take are one UPDATE."""
+
+    def take(self, key, capacity, refill, now):
+        """Take one token. Returns (allowed, seconds until the next token)."""
+        from .models import RateLimitBucket
+
+        if self._take_existing(key, capacity, refill, now):
+            return True, 0
+
+        # Either a new client or an empty bucket
+        try:
+            with transaction.atomic():
+                RateLimitBucket.objects.create(key=key, tokens=capacity - 1, updated_at=now)
+            return True, 0
+        except IntegrityError:
+            pass
+        # The row exists (possibly created by a concurrent first request): take from it
+        if self._take_existing(key, capacity, refill, now):
+            return True, 0
+        row = RateLimitBucket.objects.filter(key=key).values("tokens", "updated_at").first()
+        level = min(capacity, row["tokens"] + (now - row["updated_at"]) * refill) if row else 0
+        return False, max(1 - level, 0) / refill
+
+    def _take_existing(self, key, capacity, refill, now):
+        from .models import RateLimitBucket
+
+        refilled = (Value(now) - F("updated_at")) * Value(refill)
+        return RateLimitBucket.objects.filter(key=key, tokens__gte=Value(1.0) - refilled).update(
+            tokens=Least(Value(float(capacity)), F("tokens") + refilled) - Value(1.0),
+            updated_at=now,
+        ) > 0
+
+
+class MemoryStore:
+    """Per-process buckets (tests, single-process deployments)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, capacity, refill, now):
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            level = min(capacity, tokens + (now - updated_at) * refill)
+            if level < 1:
+                return False, (1 - level) / refill
+            self._buckets[key] = (level - 1, now)
+            return True, 0
+
+
+STORES = {
+    "database": DatabaseStore,
+    "memory": MemoryStore,
+}
+
+_stores = {}
+
+
+def get_store():
+    name = getattr(settings, "THROTTLE_STORE", "database")
+    if name not in _stores:
+        if name not in STORES:
+            raise ValueError(f"Unknown THROTTLE_STORE: {name}")
+        _stores[name] = STORES[name]()
+    return _stores[name]
+
+
+# ---------------------------------------------------------------------------
+# Throttles
+# ---------------------------------------------------------------------------
+
+_blocked = {}
+_blocked_lock = threading.Lock()
+
+
+def _note_blocked(key, until):
+    with _blocked_lock:
+        if len(_blocked) >= MAX_BLOCKED_KEYS:
+            now = time.time()
+            for stale in [k for k, t in _blocked.items() if t <= now]:
+                del _blocked[stale]
+        if len(_blocked) < MAX_BLOCKED_KEYS:
+            _blocked[key] = until
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle over a shared token bucket per (scope, client). ``scope``
+    names the rate in DEFAULT_THROTTLE_RATES: the bucket holds that many
+    tokens and refills at that rate. Clients are users when signed in and
+    IP addresses otherwise (behind REST_FRAMEWORK NUM_PROXIES proxies).
+    Store errors let the request through.
+    """
+
+    scope = None
+
+    def __init__(self):
+        self.capacity, self.refill = parse_rate(api_settings.DEFAULT_THROTTLE_RATES[self.scope])
+        self._wait = None
+
+    def get_key(self, request):
+        """Bucket key for the request, or None to let it through unthrottled."""
+        if request.user and request.user.is_authenticated:
+            return f"{self.scope}:user:{request.user.pk}"
+        return f"{self.scope}:ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        key = self.get_key(request)
+        if key is None:
+            return True
+        now = time.time()
+
+        # Cheap pre-check: this process already saw the bucket empty
+        until = _blocked.get(key)
+        if until is not None and until > now:
+            self._wait = until - now
+            return False
+
+        try:
+            allowed, wait = get_store().take(key, self.capacity, self.refill, now)
+        except DatabaseError as e:
+            logger.warning(f"Rate limit store unavailable, allowing {key}: {e}")
+            return True
+
+        if not allowed:
+            _note_blocked(key, now + wait)
+            self._wait = wait
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AuthThrottle(TokenBucketThrottle):
+    """Login, registration, 2FA and password reset."""
+    scope = "auth"
+
+
+class AuthAccountThrottle(TokenBucketThrottle):
+    """
+    The account a login, 2FA or password reset request is aimed at (its
+    email, or the reset link's uid) from one IP. Keyed per IP too, so
+    someone who only knows an email cannot lock its owner out. Pair with
+    AuthThrottle.
+    """
+    scope = "auth_account"
+
+    def get_key(self, request):
+        email = request.data.get("email")
+        if isinstance(email, str) and email.strip():
+            account = email.strip().lower()
+        else:
+            account = request.data.get("uid")
+            if not isinstance(account, str) or not account:
+                return None
+        digest = hashlib.sha256(account.encode()).hexdigest()
+        return f"{self.scope}:{digest}:ip:{self.get_ident(request)}"
+
+
+class TradingThrottle(TokenBucketThrottle):
+    """Order placement."""
+    scope = "trading"
+
+
+class ReadThrottle(TokenBucketThrottle):
+    """Expensive reads (search)."""
+    scope = "reads"
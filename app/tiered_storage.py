@@ -0,0 +1,312 @@
+"""
+Tiered media storage
+CloudinaryField uploads land on local disk inside the request and are pushed
+to the remote store by the background worker; the local copy is served until
+the remote URL replaces it. Enabled with MEDIA_DEFERRED_UPLOADS
+"""
+
+import os
+import shutil
+import time
+from functools import lru_cache
+
+from cloudinary import CloudinaryResource
+from cloudinary.models import CloudinaryField
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from . import background, images
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# public_id prefix (and MEDIA_ROOT sub-directory) of not-yet-uploaded files
+PENDING_PREFIX = "pending-upload/"
+
+
+def enabled():
+    return getattr(settings, "MEDIA_DEFERRED_UPLOADS", False)
+
+
+def _max_attempts():
+    return getattr(settings, "MEDIA_UPLOAD_MAX_ATTEMPTS", 5)
+
+
+def is_pending(value):
+    return isinstance(value, CloudinaryResource) and (value.public_id or "").startswith(PENDING_PREFIX)
+
+
+def local_url(value):
+    """URL of the local copy for a pending value (served by app.media_views.serve_pending_media)."""
+    name = value.public_id[len(PENDING_PREFIX):]
+    if value.format:
+        name = f"{name}.{value.format}"
+    return f"{settings.MEDIA_URL}{PENDING_PREFIX}{name}"
+
+
+# ---------------------------------------------------------------------------
+# Remote stores
+# ---------------------------------------------------------------------------
+
+class CloudinaryRemote:
+    """The real remote: cloudinary.uploader with the field's upload options."""
+
+    def upload(self, path, options):
+        from cloudinary import uploader
+
+        with open(path, "rb") as f:
+            return uploader.upload_resource(f, **options).get_prep_value()
+
+
+class LocalFakeRemote:
+    """
+    Stand-in remote for tests and local development: copies the file under
+    MEDIA_ROOT/fake-remote and returns a Cloudinary-shaped stored value.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(settings.MEDIA_ROOT, "fake-remote")
+        self.uploads = []
+
+    def upload(self, path, options):
+        stem, ext = os.path.splitext(os.path.basename(path))
+        public_id = options.get("public_id") or f"{options.get('folder', 'uploads')}/{stem}"
+        target = os.path.join(self.root, f"{public_id}{ext}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+        self.uploads.append((path, options))
+
+        resource = CloudinaryResource(
+            public_id=public_id,
+            format=ext.lstrip(".") or None,
+            version=int(time.time()),
+            type=options.get("type", "upload"),
+            resource_type=options.get("resource_type", "image"),
+        )
+        return resource.get_prep_value()
+
+
+REMOTES = {
+    "cloudinary": CloudinaryRemote,
+    "local_fake": LocalFakeRemote,
+}
+
+_remote = None
+
+
+def get_remote():
+    global _remote
+    if _remote is None:
+        name = getattr(settings, "MEDIA_REMOTE_STORE", "cloudinary")
+        if name not in REMOTES:
+            raise ValueError(f"Unknown MEDIA_REMOTE_STORE: {name}")
+        _remote = REMOTES[name]()
+    return _remote
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+class TieredMediaStorage:
+    """
+    Local tier of the media pipeline. ``stage()`` writes an UploadedFile to
+    MEDIA_ROOT/pending-upload and returns the placeholder stored in the field;
+    ``push()`` moves it to the remote tier and swaps the placeholder out.
+    """
+
+    def __init__(self, location=None):
+        self.local = FileSystemStorage(location=location or os.path.join(settings.MEDIA_ROOT, PENDING_PREFIX))
+
+    def stage(self, upload, field):
+        # The same UploadedFile saved on several rows (bulk trades) is staged once
+        staged = getattr(upload, "_tiered_placeholder", None)
+        if staged is not None:
+            return staged
+
+        _, ext = os.path.splitext(upload.name or "")
+        if hasattr(upload, "seekable") and upload.seekable():
+            upload.seek(0)
+        name = self.local.save(f"{get_random_string(24)}{ext.lower()}", upload)
+        stem, ext = os.path.splitext(name)
+
+        placeholder = CloudinaryResource(
+            public_id=f"{PENDING_PREFIX}{stem}",
+            format=ext.lstrip(".") or None,
+            type=field.type,
+            resource_type=field.resource_type,
+        )
+        upload._tiered_placeholder = placeholder
+        return placeholder
+
+    def path(self, placeholder):
+        name = placeholder.public_id[len(PENDING_PREFIX):]
+        if placeholder.format:
+            name = f"{name}.{placeholder.format}"
+        return self.local.path(name)
+
+    def push(self, pending_value):
+        """
+        Upload one staged file (once, whatever the number of rows using it)
+        and point every row still holding the placeholder at the remote value.
+        Raises on failure so the background worker retries.
+        """
+        from .models import MediaUpload
+
+        uploads = list(MediaUpload.objects.filter(pending_value=pending_value, status__in=['pending', 'failed']))
+        if not uploads:
+            return
+
+        placeholder = CloudinaryField().parse_cloudinary_resource(pending_value)
+        path = self.path(placeholder)
+        if images.enabled() and uploads[0].attempts == 0:
+            try:
+                images.normalize_file(path)
+            except Exception as e:
+                logger.warning(f"Could not normalize {pending_value}, uploading as-is: {e}")
+        try:
+            remote_value = get_remote().upload(path, uploads[0].options)
+        except Exception as e:
+            attempts = uploads[0].attempts + 1
+            MediaUpload.objects.filter(id__in=[u.id for u in uploads]).update(
+                attempts=attempts,
+                last_error=str(e)[:500],
+                status='failed' if attempts >= _max_attempts() else 'pending',
+                updated_at=timezone.now(),
+            )
+            raise
+
+        if images.enabled():
+            # Before the swap, so the save below already sees the derivatives
+            try:
+                images.derive_file(path, remote_value)
+            except Exception as e:
+                logger.warning(f"Could not derive variants of {remote_value}: {e}")
+
+        with transaction.atomic():
+            for u in uploads:
+                model = apps.get_model(u.model_label)
+                field = model._meta.get_field(u.field_name)
+                # Only rows that still hold the placeholder; a newer upload wins
+                instance = model.objects.select_for_update().filter(
+                    pk=u.object_id, **{u.field_name: pending_value}
+                ).first()
+                if instance is None:
+                    continue
+                # A real save, so receivers (list cards, caches, search) see the remote URL
+                setattr(instance, field.attname, field.to_python(remote_value))
+                instance.save(update_fields=[u.field_name])
+            MediaUpload.objects.filter(id__in=[u.id for u in uploads]).update(
+                status='done',
+                remote_value=remote_value,
+                attempts=uploads[0].attempts + 1,
+                last_error='',
+                updated_at=timezone.now(),
+            )
+
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        logger.info(f"Uploaded {pending_value} -> {remote_value} ({len(uploads)} rows)")
+
+
+storage = TieredMediaStorage()
+
+
+# ---------------------------------------------------------------------------
+# Model hooks
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _cloudinary_fields(model):
+    return [f for f in model._meta.concrete_fields if isinstance(f, CloudinaryField)]
+
+
+def _upload_options(field, instance):
+    options = {"type": field.type, "resource_type": field.resource_type}
+    options.update({key: val(instance) if callable(val) else val for key, val in field.options.items()})
+    return options
+
+
+def stage_uploads(instance):
+    """pre_save: swap UploadedFile values for local placeholders."""
+    if not enabled():
+        return
+    staged = {}
+    for field in _cloudinary_fields(type(instance)):
+        value = getattr(instance, field.attname)
+        if isinstance(value, UploadedFile):
+            placeholder = storage.stage(value, field)
+            setattr(instance, field.attname, placeholder)
+            staged[field.name] = (placeholder.get_prep_value(), _upload_options(field, instance))
+    if staged:
+        instance._staged_uploads = staged
+
+
+def queue_uploads(instance):
+    """post_save: record the staged files and hand them to the worker after commit."""
+    from .models import MediaUpload
+
+    staged = instance.__dict__.pop("_staged_uploads", None)
+    if not staged:
+        return
+
+    label = instance._meta.label
+    for field_name, (pending_value, options) in staged.items():
+        MediaUpload.objects.create(
+            model_label=label,
+            object_id=instance.pk,
+            field_name=field_name,
+            pending_value=pending_value,
+            options=options,
+        )
+        transaction.on_commit(lambda v=pending_value: background.submit(storage.push, v, retries=_max_attempts() - 1))
+
+
+def find_upload(name):
+    """
+    The MediaUpload of a file under MEDIA_ROOT/pending-upload, or None. The
+    placeholders it may belong to are rebuilt from the name so the lookup
+    stays on the pending_value index.
+    """
+    from .models import MediaUpload
+
+    stem, ext = os.path.splitext(name)
+    kinds = {(f.resource_type, f.type) for model in apps.get_models() for f in _cloudinary_fields(model)}
+    candidates = [
+        CloudinaryResource(
+            public_id=f"{PENDING_PREFIX}{stem}",
+            format=ext.lstrip(".") or None,
+            type=type_,
+            resource_type=resource_type,
+        ).get_prep_value()
+        for resource_type, type_ in kinds
+    ]
+    return MediaUpload.objects.filter(pending_value__in=candidates).first()
+
+
+def retry_pending(older_than=None):
+    """Push every pending/failed upload synchronously. Returns (done, failed)."""
+    from .models import MediaUpload
+
+    qs = MediaUpload.objects.filter(status__in=['pending', 'failed'])
+    if older_than is not None:
+        qs = qs.filter(updated_at__lt=timezone.now() - older_than)
+
+    done = failed = 0
+    for pending_value in qs.values_list('pending_value', flat=True).distinct():
+        try:
+            storage.push(pending_value)
+            done += 1
+        except Exception as e:
+            logger.error(f"Retry of {pending_value} failed: {e}")
+            failed += 1
+    return done, failed
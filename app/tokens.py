@@ -0,0 +1,53 @@
+"""
+JWT token classes
+Refresh tokens carrying the user's token_epoch claim and honouring
+TOKEN_REVOCATION_MODE (see app.revocation)
+"""
+
+from rest_framework_simplejwt import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+from . import revocation
+
+
+class EpochRefreshToken(RefreshToken):
+    """
+    RefreshToken stamped with ``token_epoch``. In epoch mode it never touches
+    the OutstandingToken / BlacklistedToken tables: issuing, rotating and
+    verifying cost no writes, and verification reads the epoch from the cache.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        if revocation.uses_blacklist():
+            token = super().for_user(user)
+        else:
+            # Skip BlacklistMixin, which records every token as outstanding
+            token = super(BlacklistMixin, cls).for_user(user)
+        token[revocation.EPOCH_CLAIM] = user.token_epoch
+        return token
+
+    def verify(self, *args, **kwargs):
+        if revocation.uses_blacklist():
+            super().verify(*args, **kwargs)
+        else:
+            super(BlacklistMixin, self).verify(*args, **kwargs)
+        if revocation.uses_epoch() and not revocation.epoch_is_current(self.payload):
+            raise TokenError("Token has been revoked")
+
+    def blacklist(self):
+        # Rotation in epoch mode leaves nothing behind; the old token stays
+        # valid until it expires or the epoch is bumped
+        if revocation.uses_blacklist():
+            return super().blacklist()
+        return None
+
+    def outstand(self):
+        if revocation.uses_blacklist():
+            return super().outstand()
+        return None
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    token_class = EpochRefreshToken
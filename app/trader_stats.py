@@ -0,0 +1,188 @@
+"""
+Trader statistics
+Win/loss counts, average profit/loss, trades in the last 12 months and most
+traded markets, maintained incrementally from UserCopyTraderHistory
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Abs, TruncMonth
+from django.utils import timezone
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Columns of a UserCopyTraderHistory row that feed the stats
+SNAPSHOT_FIELDS = ('trader_id', 'market', 'status', 'profit_loss_percent', 'opened_at', 'closed_at')
+
+ZERO = Decimal('0.00')
+
+
+def snapshot(row):
+    """The stat-relevant state of a trade row, or None for user-direct trades."""
+    if row is None or not row.get('trader_id'):
+        return None
+    return {field: row.get(field) for field in SNAPSHOT_FIELDS}
+
+
+def snapshot_of(instance):
+    return snapshot({field: getattr(instance, field) for field in SNAPSHOT_FIELDS})
+
+
+def _month_key(value):
+    return f"{value:%Y-%m}"
+
+
+def _contribution(snap):
+    """What one trade adds to its trader's stats."""
+    c = {
+        'open_trades': 0, 'closed_trades': 0, 'wins': 0, 'losses': 0,
+        'profit_percent_sum': ZERO, 'loss_percent_sum': ZERO,
+        'markets': {snap['market']: 1},
+        'months': {},
+    }
+    if snap['status'] != 'closed':
+        c['open_trades'] = 1
+        return c
+
+    c['closed_trades'] = 1
+    pl = Decimal(snap['profit_loss_percent'] or 0)
+    if pl > 0:
+        c['wins'] = 1
+        c['profit_percent_sum'] = pl
+    elif pl < 0:
+        c['losses'] = 1
+        c['loss_percent_sum'] = -pl
+    closed_at = snap['closed_at'] or snap['opened_at']
+    if closed_at:
+        c['months'] = {_month_key(timezone.localtime(closed_at)): 1}
+    return c
+
+
+def _merge_counts(target, counts, sign):
+    for key, n in counts.items():
+        total = target.get(key, 0) + sign * n
+        if total > 0:
+            target[key] = total
+        else:
+            target.pop(key, None)
+
+
+def _apply(stats, snap, sign):
+    c = _contribution(snap)
+    for field in ('open_trades', 'closed_trades', 'wins', 'losses', 'profit_percent_sum', 'loss_percent_sum'):
+        setattr(stats, field, max(getattr(stats, field) + sign * c[field], 0))
+    _merge_counts(stats.market_counts, c['markets'], sign)
+    _merge_counts(stats.monthly_closed, c['months'], sign)
+
+
+def record_change(old, new):
+    """
+    Move one trade's contribution from its ``old`` snapshot to its ``new`` one
+    (either may be None for create/delete). Touches only the stats rows of the
+    traders involved, under a row lock, and re-syncs their Trader columns.
+    """
+    from .models import TraderStats
+
+    if old == new:
+        return
+
+    trader_ids = {s['trader_id'] for s in (old, new) if s}
+    with transaction.atomic():
+        for trader_id in sorted(trader_ids):
+            stats = TraderStats.objects.select_for_update().filter(trader_id=trader_id).first()
+            if stats is None:
+                # First sight of this trader: build from history, which already
+                # includes ``new``. Nothing to do for a delete (e.g. trader cascade).
+                if new:
+                    rebuild_trader(trader_id)
+                continue
+            if old and old['trader_id'] == trader_id:
+                _apply(stats, old, -1)
+            if new and new['trader_id'] == trader_id:
+                _apply(stats, new, +1)
+            stats.save()
+            sync_trader(stats)
+
+
+def sync_trader(stats):
+    """
+    Copy the derived figures onto the Trader columns served by the API.
+    Traders without any closed trade keep the figures entered in the dashboard.
+    """
+    from .models import Trader
+
+    if not stats.closed_trades:
+        return
+    Trader.objects.filter(pk=stats.trader_id).update(
+        total_wins=stats.wins,
+        total_losses=stats.losses,
+        avg_profit_percent=stats.avg_profit_percent,
+        avg_loss_percent=stats.avg_loss_percent,
+        total_trades_12m=stats.trades_last_12_months(),
+    )
+
+
+def rebuild_trader(trader_id):
+    """Recompute one trader's stats from its full history (grouped queries only)."""
+    from .models import UserCopyTraderHistory, TraderStats
+
+    history = UserCopyTraderHistory.objects.filter(trader_id=trader_id)
+    closed = history.filter(status='closed')
+
+    totals = history.aggregate(
+        open_trades=Count('id', filter=~Q(status='closed')),
+        closed_trades=Count('id', filter=Q(status='closed')),
+        wins=Count('id', filter=Q(status='closed', profit_loss_percent__gt=0)),
+        losses=Count('id', filter=Q(status='closed', profit_loss_percent__lt=0)),
+        profit_percent_sum=Sum('profit_loss_percent', filter=Q(status='closed', profit_loss_percent__gt=0)),
+        loss_percent_sum=Sum(Abs('profit_loss_percent'), filter=Q(status='closed', profit_loss_percent__lt=0)),
+    )
+    totals['profit_percent_sum'] = totals['profit_percent_sum'] or ZERO
+    totals['loss_percent_sum'] = totals['loss_percent_sum'] or ZERO
+
+    market_counts = {
+        row['market']: row['n']
+        for row in history.values('market').annotate(n=Count('id'))
+    }
+
+    monthly_closed = {}
+    for row in closed.filter(closed_at__isnull=False).annotate(month=TruncMonth('closed_at')).values('month').annotate(n=Count('id')):
+        key = _month_key(row['month'])
+        monthly_closed[key] = monthly_closed.get(key, 0) + row['n']
+    for row in closed.filter(closed_at__isnull=True).annotate(month=TruncMonth('opened_at')).values('month').annotate(n=Count('id')):
+        key = _month_key(row['month'])
+        monthly_closed[key] = monthly_closed.get(key, 0) + row['n']
+
+    stats, _ = TraderStats.objects.update_or_create(
+        trader_id=trader_id,
+        defaults=dict(totals, market_counts=market_counts, monthly_closed=monthly_closed),
+    )
+    sync_trader(stats)
+    return stats
+
+
+def rebuild_all():
+    """Rebuild stats for every trader; also rolls total_trades_12m forward."""
+    from .models import Trader
+
+    count = 0
+    for trader_id in Trader.objects.values_list('id', flat=True).iterator():
+        rebuild_trader(trader_id)
+        count += 1
+    logger.info(f"Rebuilt stats for {count} traders")
+    return count
+
+
+def stats_for(trader):
+    """Precomputed stats for ``trader``, built on first use."""
+    from .models import TraderStats
+
+    try:
+        return trader.stats
+    except TraderStats.DoesNotExist:
+        return rebuild_trader(trader.pk)
@@ -0,0 +1,290 @@
+"""
+Stock trade execution
+Single position + ledger code path shared by market orders and resting
+(limit / stop-loss / take-profit) orders
+"""
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .references import new_reference
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TradeError(Exception):
+    """Trade could not be executed; ``extra`` is merged into the API error response"""
+
+    def __init__(self, message, **extra):
+        super().__init__(message)
+        self.message = message
+        self.extra = extra
+
+
+def execute_buy(user, stock, shares, price=None, notes=None):
+    """
+    Debit the user's balance, grow (or open) the position and record the trade.
+    ``stock`` may be a Stock row or a market snapshot quote.
+    """
+    from .models import UserStockPosition, TradeHistory, Notification
+
+    price = stock.price if price is None else price
+    total_cost = shares * price
+
+    # Check user balance
+    if user.balance < total_cost:
+        raise TradeError(
+            f"Insufficient balance. You need ${total_cost} but only have ${user.balance}",
+            required=str(total_cost),
+            current_balance=str(user.balance),
+        )
+
+    # Deduct from balance
+    user.balance -= total_cost
+    user.save(update_fields=['balance'])
+
+    # Get or create position
+    position, created = UserStockPosition.objects.get_or_create(
+        user=user,
+        stock_id=stock.id,
+        is_active=True,
+        defaults={
+            'shares': shares,
+            'average_buy_price': price,
+            'total_invested': total_cost,
+        }
+    )
+
+    if not created:
+        # Update existing position
+        total_shares = position.shares + shares
+        total_invested = position.total_invested + total_cost
+        position.average_buy_price = total_invested / total_shares
+        position.shares = total_shares
+        position.total_invested = total_invested
+        position.save(update_fields=['shares', 'average_buy_price', 'total_invested'])
+
+    # Create trade history
+    reference = new_reference("BUY")
+    trade = TradeHistory.objects.create(
+        user=user,
+        stock_id=stock.id,
+        trade_type='buy',
+        shares=shares,
+        price_per_share=price,
+        total_amount=total_cost,
+        reference=reference,
+        notes=notes,
+    )
+
+    # Create notification
+    Notification.objects.create(
+        user=user,
+        type="trade",
+        title="Stock Purchase Successful",
+        message=f"You bought {shares} shares of {stock.symbol} for ${total_cost}",
+        full_details=f"Your purchase of {shares} shares of {stock.name} ({stock.symbol}) at ${price} per share has been completed. Total cost: ${total_cost}. Reference: {reference}",
+        metadata={
+            "stock": stock.symbol,
+            "amount": f"${total_cost}",
+            "shares": str(shares),
+            "reference": reference,
+        }
+    )
+
+    return trade
+
+
+def execute_sell(user, stock, shares, price=None, notes=None):
+    """
+    Reduce (or close) the position, credit the proceeds and record the trade.
+    ``stock`` may be a Stock row or a market snapshot quote.
+    """
+    from .models import UserStockPosition, TradeHistory, Notification
+
+    price = stock.price if price is None else price
+
+    # Get user position
+    try:
+        position = UserStockPosition.objects.get(user=user, stock_id=stock.id, is_active=True)
+    except UserStockPosition.DoesNotExist:
+        raise TradeError("You don't own any shares of this stock")
+
+    # Check if user has enough shares
+    if position.shares < shares:
+        raise TradeError(
+            f"You only have {position.shares} shares available",
+            available_shares=str(position.shares),
+        )
+
+    # Calculate sale proceeds
+    sale_proceeds = shares * price
+
+    # Calculate profit/loss for this sale
+    cost_basis = (position.total_invested / position.shares) * shares
+    profit_loss = sale_proceeds - cost_basis
+
+    # Add proceeds to balance
+    user.balance += sale_proceeds
+    user.save(update_fields=['balance'])
+
+    # Update position
+    remaining_shares = position.shares - shares
+    if remaining_shares == 0:
+        # Close position
+        position.is_active = False
+        position.save(update_fields=['is_active'])
+    else:
+        # Update position
+        remaining_investment = position.total_invested - cost_basis
+        position.shares = remaining_shares
+        position.total_invested = remaining_investment
+        position.save(update_fields=['shares', 'total_invested'])
+
+    # Create trade history
+    reference = new_reference("SELL")
+    trade = TradeHistory.objects.create(
+        user=user,
+        stock_id=stock.id,
+        trade_type='sell',
+        shares=shares,
+        price_per_share=price,
+        total_amount=sale_proceeds,
+        profit_loss=profit_loss,
+        reference=reference,
+        notes=notes,
+    )
+
+    # Create notification
+    profit_loss_text = f"profit of ${profit_loss}" if profit_loss >= 0 else f"loss of ${abs(profit_loss)}"
+    Notification.objects.create(
+        user=user,
+        type="trade",
+        title="Stock Sale Successful",
+        message=f"You sold {shares} shares of {stock.symbol} for ${sale_proceeds} ({profit_loss_text})",
+        full_details=f"Your sale of {shares} shares of {stock.name} ({stock.symbol}) at ${price} per share has been completed. Sale proceeds: ${sale_proceeds}. {profit_loss_text.capitalize()}. Reference: {reference}",
+        metadata={
+            "stock": stock.symbol,
+            "amount": f"${sale_proceeds}",
+            "shares": str(shares),
+            "profit_loss": str(profit_loss),
+            "reference": reference,
+        }
+    )
+
+    return trade
+
+
+# ---------------------------------------------------------------------------
+# Resting orders
+# ---------------------------------------------------------------------------
+
+def crossed_orders(stock_id, price):
+    """
+    Open orders on ``stock_id`` whose trigger is crossed at ``price``.
+
+    Each branch is a range scan on the (stock, status, trigger_direction,
+    trigger_price) index, so only orders that actually fire are read -
+    never the whole open book for the symbol.
+    """
+    from .models import StockOrder
+
+    return StockOrder.objects.filter(
+        Q(trigger_direction=StockOrder.TRIGGER_AT_OR_BELOW, trigger_price__gte=price) |
+        Q(trigger_direction=StockOrder.TRIGGER_AT_OR_ABOVE, trigger_price__lte=price),
+        stock_id=stock_id,
+        status='open',
+    ).order_by('created_at', 'id')
+
+
+def execute_order(order, stock):
+    """
+    Fill one resting order at ``stock.price`` through execute_buy/execute_sell.
+    Orders that can no longer be filled (balance spent, position sold) are rejected.
+    """
+    from .models import StockOrder, Notification
+
+    with transaction.atomic():
+        # Re-read under lock so a concurrent sweep or cancel cannot fill twice
+        order = (
+            StockOrder.objects.select_for_update()
+            .select_related('user')
+            .filter(pk=order.pk, status='open')
+            .first()
+        )
+        if order is None or not order.is_crossed_at(stock.price):
+            return None
+
+        notes = f"{order.get_order_type_display()} order {order.reference}"
+        try:
+            if order.side == 'buy':
+                trade = execute_buy(order.user, stock, order.shares, notes=notes)
+            else:
+                trade = execute_sell(order.user, stock, order.shares, notes=notes)
+        except TradeError as e:
+            order.status = 'rejected'
+            order.reject_reason = e.message
+            order.save(update_fields=['status', 'reject_reason', 'updated_at'])
+
+            Notification.objects.create(
+                user=order.user,
+                type="trade",
+                title="Order Rejected",
+                message=f"Your {order.get_order_type_display().lower()} order for {order.shares} shares of {stock.symbol} could not be filled",
+                full_details=f"Your {order.get_order_type_display().lower()} order to {order.side} {order.shares} shares of {stock.name} ({stock.symbol}) triggered at ${stock.price} but could not be filled: {e.message}. Reference: {order.reference}",
+                metadata={
+                    "stock": stock.symbol,
+                    "shares": str(order.shares),
+                    "reference": order.reference,
+                }
+            )
+            return order
+
+        order.status = 'filled'
+        order.filled_price = stock.price
+        order.filled_at = timezone.now()
+        order.trade = trade
+        order.save(update_fields=['status', 'filled_price', 'filled_at', 'trade', 'updated_at'])
+
+    return order
+
+
+def process_orders(stock):
+    """
+    Evaluate the resting book of one stock against its current price.
+    Returns (filled, rejected) counts.
+    """
+    filled = rejected = 0
+    for order in crossed_orders(stock.id, stock.price):
+        try:
+            result = execute_order(order, stock)
+        except Exception as e:
+            logger.error(f"Failed to execute order {order.reference}: {e}")
+            continue
+        if result is None:
+            continue
+        if result.status == 'filled':
+            filled += 1
+        else:
+            rejected += 1
+
+    if filled or rejected:
+        logger.info(f"{stock.symbol} @ {stock.price}: {filled} orders filled, {rejected} rejected")
+    return filled, rejected
+
+
+def trigger_direction_for(order_type, side):
+    """
+    Which way the price has to move for an order to fire.
+    Limit buys and stop-losses fire on a fall, limit sells and take-profits on a rise.
+    """
+    from .models import StockOrder
+
+    if order_type == 'limit':
+        return StockOrder.TRIGGER_AT_OR_BELOW if side == 'buy' else StockOrder.TRIGGER_AT_OR_ABOVE
+    if order_type == 'stop_loss':
+        return StockOrder.TRIGGER_AT_OR_BELOW
+    return StockOrder.TRIGGER_AT_OR_ABOVE
@@ -3,6 +3,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from decimal import Decimal, InvalidOperation
+from django.db import transaction
+
+from .models import BalanceTransfer
 
 
 @api_view(["GET"])
@@ -80,7 +83,10 @@ def make_transfer(request):
         user.profit -= amount
         user.balance += amount
 
-    user.save(update_fields=["balance", "profit"])
+    with transaction.atomic():
+        user.save(update_fields=["balance", "profit"])
+        # Recorded so transfers show up on account statements
+        BalanceTransfer.objects.create(user=user, direction=direction, amount=amount)
 
     return Response({
         "message": "Transfer successful.",
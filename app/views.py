@@ -3,8 +3,11 @@ Deposit & Withdrawal Views
 HTTPOnly Cookie-based Token Authentication
 """
 
-import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
+from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
@@ -13,6 +16,126 @@ from rest_framework import status
 
 from .models import AdminWallet, Transaction, PaymentMethod, Notification
 from .email_service import send_admin_payment_intent_notification
+from .media import media_url
+from .references import new_reference
+
+
+# ============================================================
+# HISTORY HELPERS
+# ============================================================
+
+HISTORY_MAX_LIMIT = 100
+
+
+def _encode_cursor(t):
+    raw = f"{t.created_at.isoformat()}|{t.id}"
+    return urlsafe_base64_encode(raw.encode())
+
+
+def _decode_cursor(cursor):
+    created_at, pk = urlsafe_base64_decode(cursor).decode().split("|")
+    return datetime.fromisoformat(created_at), int(pk)
+
+
+def _serialize_transaction(t, include_receipt=True):
+    data = {
+        "id": t.id,
+        "reference": t.reference,
+        "transaction_type": t.transaction_type,
+        "transaction_type_display": t.get_transaction_type_display(),
+        "amount": str(t.amount),
+        "currency": t.currency,
+        "unit": str(t.unit),
+        "status": t.status,
+        "status_display": t.get_status_display(),
+        "created_at": t.created_at.isoformat(),
+    }
+    if include_receipt:
+        data["receipt_url"] = media_url(t.receipt) if t.receipt else None
+    return data
+
+
+def _transaction_history(request, transactions, default_limit, include_receipt=True):
+    """
+    Filter, aggregate and cursor-paginate a user's transactions.
+
+    Query params:
+        status      - pending / completed / failed / cancelled
+        start, end  - YYYY-MM-DD, inclusive
+        limit       - page size (max 100)
+        cursor      - ``next_cursor`` from the previous page
+
+    Aggregates cover the whole filtered set (not just the page) and are
+    computed with one GROUP BY query.
+    """
+    try:
+        limit = min(max(int(request.GET.get("limit", default_limit)), 1), HISTORY_MAX_LIMIT)
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+    tx_status = request.GET.get("status")
+    if tx_status:
+        transactions = transactions.filter(status=tx_status)
+
+    try:
+        if request.GET.get("start"):
+            start = date.fromisoformat(request.GET["start"])
+            transactions = transactions.filter(
+                created_at__gte=timezone.make_aware(datetime.combine(start, time.min))
+            )
+        if request.GET.get("end"):
+            end = date.fromisoformat(request.GET["end"]) + timedelta(days=1)
+            transactions = transactions.filter(
+                created_at__lt=timezone.make_aware(datetime.combine(end, time.min))
+            )
+    except ValueError:
+        return Response({"error": "Dates must be in YYYY-MM-DD format"}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Totals by type and status over the filtered set
+    aggregates = {"total_count": 0, "by_type": {}}
+    rows = (
+        transactions.order_by()
+        .values("transaction_type", "status")
+        .annotate(total=Sum("amount"), count=Count("id"))
+    )
+    for row in rows:
+        by_type = aggregates["by_type"].setdefault(row["transaction_type"], {
+            "total_amount": Decimal("0.00"), "count": 0, "by_status": {},
+        })
+        total = (row["total"] or Decimal("0.00")).quantize(Decimal("0.01"))
+        by_type["total_amount"] += total
+        by_type["count"] += row["count"]
+        by_type["by_status"][row["status"]] = {
+            "total_amount": str(total),
+            "count": row["count"],
+        }
+        aggregates["total_count"] += row["count"]
+    for by_type in aggregates["by_type"].values():
+        by_type["total_amount"] = str(by_type["total_amount"])
+
+    # Keyset pagination on (created_at, id) - stable under concurrent inserts
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = _decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+        transactions = transactions.filter(
+            Q(created_at__lt=cursor_created_at) |
+            Q(created_at=cursor_created_at, id__lt=cursor_id)
+        )
+
+    page = list(transactions.order_by("-created_at", "-id")[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    return Response({
+        "success": True,
+        "transactions": [_serialize_transaction(t, include_receipt) for t in page],
+        "aggregates": aggregates,
+        "has_more": has_more,
+        "next_cursor": _encode_cursor(page[-1]) if has_more else None,
+    })
 
 
 # ============================================================
@@ -30,12 +153,7 @@ def get_deposit_options(request):
 
     wallet_list = []
     for w in wallets:
-        qr_code_url = None
-        if w.qr_code:
-            try:
-                qr_code_url = w.qr_code.url
-            except Exception:
-                qr_code_url = None
+        qr_code_url = media_url(w.qr_code) if w.qr_code else None
 
         wallet_list.append({
             "id": w.id,
@@ -84,7 +202,7 @@ def create_deposit(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     # Create transaction (status=pending, balance NOT touched)
-    reference = f"DEP-{random.randint(100000, 999999)}-{user.id}"
+    reference = new_reference("DEP")
 
     transaction = Transaction.objects.create(
         user=user,
@@ -155,42 +273,12 @@ def deposit_payment_intent(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_deposit_history(request):
-    """Get user's deposit transaction history."""
-    user = request.user
-    limit = int(request.GET.get("limit", 10))
-
+    """Get user's deposit transaction history (filterable, cursor-paginated)."""
     transactions = Transaction.objects.filter(
-        user=user,
+        user=request.user,
         transaction_type="deposit",
-    ).order_by("-created_at")[:limit]
-
-    transaction_list = []
-    for t in transactions:
-        receipt_url = None
-        if t.receipt:
-            try:
-                receipt_url = t.receipt.url
-            except Exception:
-                receipt_url = None
-
-        transaction_list.append({
-            "id": t.id,
-            "reference": t.reference,
-            "transaction_type": t.transaction_type,
-            "transaction_type_display": t.get_transaction_type_display(),
-            "amount": str(t.amount),
-            "currency": t.currency,
-            "unit": str(t.unit),
-            "status": t.status,
-            "status_display": t.get_status_display(),
-            "created_at": t.created_at.isoformat(),
-            "receipt_url": receipt_url,
-        })
-
-    return Response({
-        "success": True,
-        "transactions": transaction_list,
-    })
+    )
+    return _transaction_history(request, transactions, default_limit=10)
 
 
 # ============================================================
@@ -304,7 +392,7 @@ def create_withdrawal(request):
             }, status=status.HTTP_400_BAD_REQUEST)
 
     # Create transaction (status=pending, balance NOT touched yet)
-    reference = f"WDR-{random.randint(100000, 999999)}-{user.id}"
+    reference = new_reference("WDR")
 
     transaction = Transaction.objects.create(
         user=user,
@@ -357,34 +445,12 @@ def create_withdrawal(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_withdrawal_history(request):
-    """Get user's withdrawal transaction history."""
-    user = request.user
-    limit = int(request.GET.get("limit", 10))
-
+    """Get user's withdrawal transaction history (filterable, cursor-paginated)."""
     transactions = Transaction.objects.filter(
-        user=user,
+        user=request.user,
         transaction_type="withdrawal",
-    ).order_by("-created_at")[:limit]
-
-    transaction_list = []
-    for t in transactions:
-        transaction_list.append({
-            "id": t.id,
-            "reference": t.reference,
-            "transaction_type": t.transaction_type,
-            "transaction_type_display": t.get_transaction_type_display(),
-            "amount": str(t.amount),
-            "currency": t.currency,
-            "unit": str(t.unit),
-            "status": t.status,
-            "status_display": t.get_status_display(),
-            "created_at": t.created_at.isoformat(),
-        })
-
-    return Response({
-        "success": True,
-        "transactions": transaction_list,
-    })
+    )
+    return _transaction_history(request, transactions, default_limit=10, include_receipt=False)
 
 
 # ============================================================
@@ -394,44 +460,14 @@ def get_withdrawal_history(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_transaction_history(request):
-    """Get all user transactions (both deposits and withdrawals)."""
-    user = request.user
-    limit = int(request.GET.get("limit", 20))
+    """Get all user transactions (both deposits and withdrawals), filterable and cursor-paginated."""
     tx_type = request.GET.get("type", "all")
 
-    transactions = Transaction.objects.filter(user=user)
+    transactions = Transaction.objects.filter(user=request.user)
 
     if tx_type == "deposit":
         transactions = transactions.filter(transaction_type="deposit")
     elif tx_type == "withdrawal":
         transactions = transactions.filter(transaction_type="withdrawal")
 
-    transactions = transactions.order_by("-created_at")[:limit]
-
-    transaction_list = []
-    for t in transactions:
-        receipt_url = None
-        if t.receipt:
-            try:
-                receipt_url = t.receipt.url
-            except Exception:
-                receipt_url = None
-
-        transaction_list.append({
-            "id": t.id,
-            "reference": t.reference,
-            "transaction_type": t.transaction_type,
-            "transaction_type_display": t.get_transaction_type_display(),
-            "amount": str(t.amount),
-            "currency": t.currency,
-            "unit": str(t.unit),
-            "status": t.status,
-            "status_display": t.get_status_display(),
-            "created_at": t.created_at.isoformat(),
-            "receipt_url": receipt_url,
-        })
-
-    return Response({
-        "success": True,
-        "transactions": transaction_list,
-    })
+    return _transaction_history(request, transactions, default_limit=20)
@@ -0,0 +1,11 @@
+from django import template
+
+from app.media import media_url as resolve_media_url
+
+register = template.Library()
+
+
+@register.filter
+def media_url(value, preset=None):
+    """{{ trader.avatar|media_url:"thumbnail" }} - cached Cloudinary URL for a template."""
+    return resolve_media_url(value, preset or None) or ""
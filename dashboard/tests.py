@@ -1,3 +1,23 @@
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 
-# Create your tests here.
+from app.models import CustomUser
+
+from .exports import USER_COLUMNS, stream_export
+
+
+class CsvExportTests(TestCase):
+    def export(self):
+        request = RequestFactory().get('/export/')
+        response = stream_export(request, CustomUser.objects.order_by('id'), USER_COLUMNS, 'users')
+        return b''.join(response.streaming_content).decode()
+
+    def test_formula_cells_are_quoted(self):
+        CustomUser.objects.create_user(email='a@example.com', first_name='=HYPERLINK("http://x")', last_name='@SUM(A1)')
+        CustomUser.objects.create_user(email='b@example.com', first_name='+1', last_name='-2')
+        body = self.export()
+        self.assertIn('"\'=HYPERLINK(""http://x"")",\'@SUM(A1)', body)
+        self.assertIn("'+1,'-2", body)
+
+    def test_plain_cells_are_unchanged(self):
+        CustomUser.objects.create_user(email='c@example.com', first_name='Ada', last_name='Lovelace')
+        self.assertIn('c@example.com,Ada,Lovelace', self.export())
@@ -13,6 +13,7 @@ urlpatterns = [
 
     # Users
     path('users/', views.users_list, name='users_list'),
+    path('users/export/', views.export_users, name='export_users'),
     path('users/<int:user_id>/', views.user_detail, name='user_detail'),
     path('users/<int:user_id>/delete/', views.delete_user, name='delete_user'),
 
@@ -22,15 +23,18 @@ urlpatterns = [
 
     # Deposits
     path('deposits/', views.deposits, name='deposits'),
+    path('deposits/export/', views.export_deposits, name='export_deposits'),
     path('deposits/<int:transaction_id>/', views.deposit_detail, name='deposit_detail'),
     path('deposits/<int:transaction_id>/edit/', views.edit_deposit, name='edit_deposit'),
 
     # Withdrawals
     path('withdrawals/', views.withdrawals, name='withdrawals'),
+    path('withdrawals/export/', views.export_withdrawals, name='export_withdrawals'),
     path('withdrawals/<int:transaction_id>/', views.withdrawal_detail, name='withdrawal_detail'),
 
     # Transactions
     path('transactions/', views.transactions, name='transactions'),
+    path('transactions/export/', views.export_transactions, name='export_transactions'),
 
     # Trading
     path('add-trade/', views.add_trade, name='add_trade'),
@@ -39,6 +43,7 @@ urlpatterns = [
 
     # Copy Trading
     path('copy-trades/', views.copy_trades_list, name='copy_trades_list'),
+    path('copy-trades/export/', views.export_copy_trades, name='export_copy_trades'),
     path('copy-trades/add/', views.add_copy_trade, name='add_copy_trade'),
     path('copy-trades/<int:trade_id>/', views.copy_trade_detail, name='copy_trade_detail'),
     path('copy-trades/<int:trade_id>/edit/', views.edit_copy_trade, name='edit_copy_trade'),
@@ -11,7 +11,7 @@ from decimal import Decimal
 from app.models import (
     CustomUser, Transaction, Stock, AdminWallet,
     Portfolio, Notification, UserStockPosition,
-    Trader, UserCopyTraderHistory, UserTraderCopy,
+    Trader, TraderAnalytics, UserCopyTraderHistory, UserTraderCopy,
     WalletConnection, Card,
 )
 from .forms import (
@@ -21,6 +21,10 @@ from .forms import (
     AdminWalletForm, CardEditForm, AddUserDirectTradeForm,
 )
 from .decorators import admin_required
+from app import broadcasts, counters
+from app.references import new_reference
+from app.revocation import purge_user_tokens
+from .exports import stream_export, TRANSACTION_COLUMNS, USER_COLUMNS, COPY_TRADE_COLUMNS
 
 
 # ---------------------------------------------------------------------------
@@ -124,8 +128,8 @@ def dashboard(request):
 # Users
 # ---------------------------------------------------------------------------
 
-@admin_required
-def users_list(request):
+def _filtered_users(request):
+    """Users matching the users list filters (shared by the page and its export)."""
     search_query = request.GET.get('search', '')
     filter_status = request.GET.get('status', '')
     users = CustomUser.objects.all().order_by('-date_joined')
@@ -141,6 +145,12 @@ def users_list(request):
         users = users.filter(is_verified=False)
     elif filter_status == 'kyc_pending':
         users = users.filter(has_submitted_kyc=True, is_verified=False)
+    return users, search_query, filter_status
+
+
+@admin_required
+def users_list(request):
+    users, search_query, filter_status = _filtered_users(request)
 
     page_obj, paginator = _paginate(users, request, 20)
     return render(request, 'dashboard/users.html', {
@@ -150,6 +160,12 @@ def users_list(request):
     })
 
 
+@admin_required
+def export_users(request):
+    users, _, _ = _filtered_users(request)
+    return stream_export(request, users, USER_COLUMNS, 'users')
+
+
 @admin_required
 def user_detail(request, user_id):
     user = get_object_or_404(CustomUser, id=user_id)
@@ -234,14 +250,7 @@ def delete_user(request, user_id):
         try:
             with transaction.atomic():
                 # ── 1. JWT token blacklist (BlacklistedToken → OutstandingToken chain) ──
-                try:
-                    from rest_framework_simplejwt.token_blacklist.models import (
-                        BlacklistedToken, OutstandingToken,
-                    )
-                    BlacklistedToken.objects.filter(token__user=view_user).delete()
-                    OutstandingToken.objects.filter(user=view_user).delete()
-                except Exception:
-                    pass
+                purge_user_tokens(view_user)
 
                 # ── 2. All user-related records (explicit order avoids SQLite FK issues) ──
                 view_user.portfolios.all().delete()
@@ -334,12 +343,18 @@ def kyc_detail(request, user_id):
 # Deposits
 # ---------------------------------------------------------------------------
 
-@admin_required
-def deposits(request):
+def _filtered_requests(request, transaction_type):
+    """Deposit/withdrawal queue filtered by ?status= (defaults to pending)."""
     status_filter = request.GET.get('status', 'pending')
-    qs = Transaction.objects.filter(transaction_type='deposit').select_related('user').order_by('-created_at')
+    qs = Transaction.objects.filter(transaction_type=transaction_type).select_related('user').order_by('-created_at')
     if status_filter and status_filter != 'all':
         qs = qs.filter(status=status_filter)
+    return qs, status_filter
+
+
+@admin_required
+def deposits(request):
+    qs, status_filter = _filtered_requests(request, 'deposit')
     page_obj, paginator = _paginate(qs, request, 20)
     return render(request, 'dashboard/deposits.html', {
         'deposits': page_obj, 'page_obj': page_obj, 'paginator': paginator,
@@ -347,6 +362,12 @@ def deposits(request):
     })
 
 
+@admin_required
+def export_deposits(request):
+    qs, _ = _filtered_requests(request, 'deposit')
+    return stream_export(request, qs, TRANSACTION_COLUMNS, 'deposits')
+
+
 @admin_required
 def deposit_detail(request, transaction_id):
     deposit = get_object_or_404(Transaction, id=transaction_id, transaction_type='deposit')
@@ -430,10 +451,7 @@ def edit_deposit(request, transaction_id):
 
 @admin_required
 def withdrawals(request):
-    status_filter = request.GET.get('status', 'pending')
-    qs = Transaction.objects.filter(transaction_type='withdrawal').select_related('user').order_by('-created_at')
-    if status_filter and status_filter != 'all':
-        qs = qs.filter(status=status_filter)
+    qs, status_filter = _filtered_requests(request, 'withdrawal')
     page_obj, paginator = _paginate(qs, request, 20)
     return render(request, 'dashboard/withdrawals.html', {
         'withdrawals': page_obj, 'page_obj': page_obj, 'paginator': paginator,
@@ -441,6 +459,12 @@ def withdrawals(request):
     })
 
 
+@admin_required
+def export_withdrawals(request):
+    qs, _ = _filtered_requests(request, 'withdrawal')
+    return stream_export(request, qs, TRANSACTION_COLUMNS, 'withdrawals')
+
+
 @admin_required
 def withdrawal_detail(request, transaction_id):
     withdrawal = get_object_or_404(Transaction, id=transaction_id, transaction_type='withdrawal')
@@ -479,8 +503,7 @@ def withdrawal_detail(request, transaction_id):
 # Transactions
 # ---------------------------------------------------------------------------
 
-@admin_required
-def transactions(request):
+def _filtered_transactions(request):
     tx_type = request.GET.get('type', '')
     status = request.GET.get('status', '')
     search = request.GET.get('search', '')
@@ -491,6 +514,12 @@ def transactions(request):
         qs = qs.filter(status=status)
     if search:
         qs = qs.filter(Q(user__email__icontains=search) | Q(reference__icontains=search))
+    return qs, tx_type, status, search
+
+
+@admin_required
+def transactions(request):
+    qs, tx_type, status, search = _filtered_transactions(request)
     page_obj, paginator = _paginate(qs, request, 25)
     return render(request, 'dashboard/transactions.html', {
         'transactions': page_obj, 'page_obj': page_obj, 'paginator': paginator,
@@ -499,6 +528,12 @@ def transactions(request):
     })
 
 
+@admin_required
+def export_transactions(request):
+    qs, _, _, _ = _filtered_transactions(request)
+    return stream_export(request, qs, TRANSACTION_COLUMNS, 'transactions')
+
+
 # ---------------------------------------------------------------------------
 # Add Trade / Earnings
 # ---------------------------------------------------------------------------
@@ -541,10 +576,9 @@ def add_earnings(request):
             description = form.cleaned_data['description'] or 'Admin added earnings'
             user.balance += amount
             user.save()
-            from django.utils.crypto import get_random_string
             Transaction.objects.create(
                 user=user, transaction_type='deposit', amount=amount,
-                status='completed', reference=f"EARN-{get_random_string(12).upper()}", description=description,
+                status='completed', reference=new_reference("EARN"), description=description,
             )
             Notification.objects.create(user=user, type='system', title='Earnings Added',
                 message=f'${amount} has been added to your account.', full_details=description)
@@ -587,8 +621,7 @@ def get_assets_by_type(request):
 # Copy Trading
 # ---------------------------------------------------------------------------
 
-@admin_required
-def copy_trades_list(request):
+def _filtered_copy_trades(request):
     trader_id = request.GET.get('trader')
     status = request.GET.get('status')
     search = request.GET.get('search')
@@ -602,7 +635,12 @@ def copy_trades_list(request):
             Q(market__icontains=search) | Q(trader__name__icontains=search) |
             Q(trader__username__icontains=search) | Q(reference__icontains=search)
         )
-    qs = qs.order_by('-opened_at')
+    return qs.order_by('-opened_at'), trader_id, status, search
+
+
+@admin_required
+def copy_trades_list(request):
+    qs, trader_id, status, search = _filtered_copy_trades(request)
     page_obj = Paginator(qs, 20).get_page(request.GET.get('page'))
 
     for trade in page_obj:
@@ -615,6 +653,12 @@ def copy_trades_list(request):
     })
 
 
+@admin_required
+def export_copy_trades(request):
+    qs, _, _, _ = _filtered_copy_trades(request)
+    return stream_export(request, qs, COPY_TRADE_COLUMNS, 'copy-trades')
+
+
 @admin_required
 def copy_trade_detail(request, trade_id):
     ct = get_object_or_404(UserCopyTraderHistory.objects.select_related('trader'), id=trade_id)
@@ -640,19 +684,17 @@ def add_copy_trade(request):
                 exit_price=d.get('exit_price'), profit_loss_percent=d['profit_loss_percent'],
                 status=d['status'], closed_at=d.get('closed_at'), notes=d.get('notes', ''),
             )
-            copying = UserTraderCopy.objects.filter(trader=d['trader'], is_actively_copying=True)
-            for rel in copying:
-                user = rel.user
-                user_pl = ct.calculate_user_profit_loss(rel.initial_investment_amount)
-                if d['status'] == 'closed' and d['profit_loss_percent']:
+            copying = list(UserTraderCopy.objects.filter(trader=d['trader'], is_actively_copying=True).select_related('user'))
+            if d['status'] == 'closed' and d['profit_loss_percent']:
+                for rel in copying:
+                    user = rel.user
+                    user_pl = ct.calculate_user_profit_loss(rel.initial_investment_amount)
                     user.profit = (user.profit or Decimal('0.00')) + user_pl
                     user.balance = (user.balance or Decimal('0.00')) + user_pl
                     user.save(update_fields=['profit', 'balance'])
-                title = f'Trade Profit from {d["trader"].name}!' if user_pl >= 0 else f'Trade Update from {d["trader"].name}'
-                msg = f'Copy trade on {d["market"]} {"gained" if user_pl >= 0 else "lost"} ${abs(user_pl)}'
-                Notification.objects.create(user=user, type='trade', title=title, message=msg,
-                    full_details=f'Trader: {d["trader"].name}\nMarket: {d["market"]}\nDirection: {d["direction"].upper()}\nYour Investment: ${rel.initial_investment_amount}\nP/L: ${user_pl} ({d["profit_loss_percent"]}%)\nStatus: {d["status"].capitalize()}')
-            messages.success(request, f'Trade added for {d["trader"].name}! Notified {copying.count()} copying users.')
+            # One row for all copiers, with each one's P/L as of now
+            broadcasts.publish_copy_trade(ct, copying)
+            messages.success(request, f'Trade added for {d["trader"].name}! Notified {len(copying)} copying users.')
             return redirect('dashboard:copy_trades_list')
     else:
         form = AddCopyTradeForm()
@@ -723,7 +765,13 @@ def traders_list(request):
     search = request.GET.get('search', '')
     badge_filter = request.GET.get('badge', '')
     active_filter = request.GET.get('active', '')
-    qs = Trader.objects.all().order_by('-gain', '-copiers')
+    qs = counters.with_counters(
+        Trader.objects.only(
+            'id', 'name', 'username', 'avatar', 'badge', 'country', 'gain',
+            'trades', 'copiers', 'total_wins', 'total_losses', 'is_active',
+        ),
+        fields=('copiers',),
+    ).order_by('-gain', '-live_copiers')
     if search:
         qs = qs.filter(Q(name__icontains=search) | Q(username__icontains=search) | Q(country__icontains=search))
     if badge_filter:
@@ -738,20 +786,21 @@ def traders_list(request):
     })
 
 
+def _parse_json(value, default):
+    """Parse a JSON form field safely."""
+    import json
+    if not value or not value.strip():
+        return default
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return default
+
+
 def _build_trader_data(form):
     """Extract cleaned trader field values from form."""
-    import json
     d = form.cleaned_data
 
-    # Helper to parse JSON fields safely
-    def parse_json(value, default):
-        if not value or not value.strip():
-            return default
-        try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            return default
-
     return {
         # Basic Info
         'name': d['name'],
@@ -796,18 +845,19 @@ def _build_trader_data(form):
         'cumulative_copiers': d.get('cumulative_copiers') or 0,
 
         # JSON Fields
-        'tags': parse_json(d.get('tags'), []),
-        'portfolio_breakdown': parse_json(d.get('portfolio_breakdown'), []),
-        'top_traded': parse_json(d.get('top_traded'), []),
-        'performance_data': parse_json(d.get('performance_data'), []),
-        'monthly_performance': parse_json(d.get('monthly_performance'), []),
-        'frequently_traded': parse_json(d.get('frequently_traded'), []),
+        'tags': _parse_json(d.get('tags'), []),
 
         # Status
         'is_active': d.get('is_active', True),
     }
 
 
+def _build_analytics_data(form):
+    """Extract TraderAnalytics JSON values from form."""
+    d = form.cleaned_data
+    return {field: _parse_json(d.get(field), []) for field in TraderAnalytics.FIELDS}
+
+
 @admin_required
 def add_trader(request):
     if request.method == 'POST':
@@ -820,6 +870,7 @@ def add_trader(request):
             if form.cleaned_data.get('country_flag'):
                 data['country_flag'] = form.cleaned_data['country_flag']
             trader = Trader.objects.create(**data)
+            TraderAnalytics.objects.update_or_create(trader=trader, defaults=_build_analytics_data(form))
             messages.success(request, f'Trader "{trader.name}" added successfully!')
             return redirect('dashboard:traders_list')
     else:
@@ -829,7 +880,7 @@ def add_trader(request):
 
 @admin_required
 def trader_detail(request, trader_id):
-    trader = get_object_or_404(Trader, id=trader_id)
+    trader = get_object_or_404(counters.with_counters(Trader.objects.all(), fields=('copiers',)), id=trader_id)
     all_ct = UserCopyTraderHistory.objects.filter(trader=trader).select_related('trader').order_by('-opened_at')
     total_trades = all_ct.count()
     open_trades = all_ct.filter(status='open').count()
@@ -876,9 +927,13 @@ def edit_trader(request, trader_id):
             if form.cleaned_data.get('country_flag'):
                 trader.country_flag = form.cleaned_data['country_flag']
             trader.save()
+            TraderAnalytics.objects.update_or_create(trader=trader, defaults=_build_analytics_data(form))
+            # Counters entered by the admin replace any pending sharded deltas
+            counters.discard_shards(trader)
             messages.success(request, f'Trader "{trader.name}" updated successfully!')
             return redirect('dashboard:trader_detail', trader_id=trader.id)
     else:
+        analytics, _ = TraderAnalytics.objects.get_or_create(trader=trader)
         form = EditTraderForm(initial={
             # Basic Info
             'name': trader.name,
@@ -893,7 +948,7 @@ def edit_trader(request, trader_id):
             'gain': trader.gain,
             'risk': str(trader.risk),
             'avg_trade_time': trader.avg_trade_time,
-            'copiers': trader.copiers,
+            'copiers': counters.value(trader, 'copiers'),
             'trades': trader.trades,
 
             # Performance Stats
@@ -903,8 +958,8 @@ def edit_trader(request, trader_id):
             'total_losses': trader.total_losses,
 
             # Additional Stats
-            'subscribers': trader.subscribers,
-            'followers': trader.followers,
+            'subscribers': counters.value(trader, 'subscribers'),
+            'followers': counters.value(trader, 'followers'),
             'current_positions': trader.current_positions,
             'expert_rating': str(float(trader.expert_rating)),
 
@@ -919,15 +974,15 @@ def edit_trader(request, trader_id):
             # Advanced Stats
             'max_drawdown': trader.max_drawdown,
             'cumulative_earnings_copiers': trader.cumulative_earnings_copiers,
-            'cumulative_copiers': trader.cumulative_copiers,
+            'cumulative_copiers': counters.value(trader, 'cumulative_copiers'),
 
             # JSON Fields - serialize to strings
             'tags': json.dumps(trader.tags) if trader.tags else '',
-            'portfolio_breakdown': json.dumps(trader.portfolio_breakdown) if trader.portfolio_breakdown else '',
-            'top_traded': json.dumps(trader.top_traded) if trader.top_traded else '',
-            'performance_data': json.dumps(trader.performance_data) if trader.performance_data else '',
-            'monthly_performance': json.dumps(trader.monthly_performance) if trader.monthly_performance else '',
-            'frequently_traded': json.dumps(trader.frequently_traded) if trader.frequently_traded else '',
+            'portfolio_breakdown': json.dumps(analytics.portfolio_breakdown) if analytics.portfolio_breakdown else '',
+            'top_traded': json.dumps(analytics.top_traded) if analytics.top_traded else '',
+            'performance_data': json.dumps(analytics.performance_data) if analytics.performance_data else '',
+            'monthly_performance': json.dumps(analytics.monthly_performance) if analytics.monthly_performance else '',
+            'frequently_traded': json.dumps(analytics.frequently_traded) if analytics.frequently_traded else '',
 
             # Status
             'is_active': trader.is_active,
@@ -950,9 +1005,7 @@ def unlink_copier(request, copy_id):
         copy_record.save()
 
         # Decrease copier count
-        if trader.copiers > 0:
-            trader.copiers -= 1
-            trader.save()
+        counters.decrement(trader, 'copiers')
 
         # Send notification to user
         Notification.objects.create(
@@ -999,9 +1052,7 @@ def handle_cancel_request(request, copy_id, action):
         copy_record.save()
 
         # Decrease copier count
-        if trader.copiers > 0:
-            trader.copiers -= 1
-            trader.save()
+        counters.decrement(trader, 'copiers')
 
         # Send notification to user
         Notification.objects.create(
@@ -1114,14 +1165,13 @@ def user_trade_detail(request, user_id):
 @admin_required
 def add_user_trade(request, user_id):
     """Add a single trade directly to a specific user."""
-    import uuid
     viewed_user = get_object_or_404(CustomUser, id=user_id)
     if request.method == 'POST':
         form = AddUserDirectTradeForm(request.POST, request.FILES)
         if form.is_valid():
             cd = form.cleaned_data
             user_balance = viewed_user.balance or Decimal('0.00')
-            reference = f"UD-{viewed_user.id}-{uuid.uuid4().hex[:8].upper()}"
+            reference = new_reference("UD")
             trade = UserCopyTraderHistory.objects.create(
                 user=viewed_user,
                 trader=None,
@@ -1206,7 +1256,6 @@ def bulk_add_user_trade(request):
     Stage 1 (POST, stage=select_users): receives user_ids from users_trade_list → shows trade form.
     Stage 2 (POST, stage=add_trade): processes trade form and creates trades for all users.
     """
-    import uuid
     if request.method == 'POST':
         stage = request.POST.get('stage', 'select_users')
 
@@ -1232,7 +1281,7 @@ def bulk_add_user_trade(request):
                 created_count = 0
                 for u in selected_users:
                     user_balance = u.balance or Decimal('0.00')
-                    reference = f"UD-{u.id}-{uuid.uuid4().hex[:8].upper()}"
+                    reference = new_reference("UD")
                     UserCopyTraderHistory.objects.create(
                         user=u,
                         trader=None,
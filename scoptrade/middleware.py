@@ -1,3 +1,8 @@
+from django.utils.cache import patch_vary_headers
+
+from app import compression
+
+
 class AppendSlashMiddleware:
     """
     Ensures all incoming requests have a trailing slash before URL resolution.
@@ -13,3 +18,48 @@ class AppendSlashMiddleware:
             request.path_info += "/"
             request.path += "/"
         return self.get_response(request)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best encoding the client accepts (brotli,
+    gzip; see app.compression). Bodies under COMPRESSION_MIN_SIZE, streaming
+    responses, non-text types and responses that are already encoded (such
+    as news_detail's cached variants) pass through untouched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or not compression.COMPRESSIBLE_TYPES.match(response.get("Content-Type", ""))
+            or len(response.content) < compression.min_size()
+        ):
+            compression.record()
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.negotiate(request.META.get("HTTP_ACCEPT_ENCODING"))
+        if encoding is None:
+            compression.record()
+            return response
+
+        content = response.content
+        compressed = compression.compress(content, encoding)
+        if len(compressed) >= len(content):
+            compression.record()
+            return response
+
+        compression.record(len(content), len(compressed))
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # The encoded body is a different byte sequence: a strong ETag becomes weak
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -49,6 +49,8 @@ ADMIN_NOTIFICATION_EMAIL = config('ADMIN_NOTIFICATION_EMAIL', default='support@s
 
 
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:3000')
+# Public origin of this API, for links in emails (e.g. receipts still being uploaded)
+BACKEND_URL = config('BACKEND_URL', default='http://localhost:8000')
 
 
 # ----------------------------
@@ -123,7 +125,15 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
         'user': '1000/hour',
+        # Token buckets of app.throttling: burst size / refill period
+        'auth': config('THROTTLE_AUTH_RATE', default='10/minute'),
+        'auth_account': config('THROTTLE_AUTH_ACCOUNT_RATE', default='5/minute'),
+        'trading': config('THROTTLE_TRADING_RATE', default='30/minute'),
+        'reads': config('THROTTLE_READS_RATE', default='120/minute'),
     },
+    # Proxies in front of the app (Vercel: 1); client IPs are read from
+    # X-Forwarded-For that many hops back, so clients cannot pick their own
+    'NUM_PROXIES': config('NUM_PROXIES', default=1, cast=int),
 }
 
 
@@ -149,7 +159,7 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_LIFETIME': timedelta(hours=1),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=7),
     'TOKEN_OBTAIN_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenObtainPairSerializer',
-    'TOKEN_REFRESH_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenRefreshSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'app.tokens.TokenRefreshSerializer',
     'TOKEN_VERIFY_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenVerifySerializer',
     'TOKEN_BLACKLIST_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenBlacklistSerializer',
 }
@@ -159,6 +169,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'scoptrade.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'scoptrade.middleware.AppendSlashMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -360,6 +371,139 @@ CSRF_TRUSTED_ORIGINS = [
 
 X_FRAME_OPTIONS = 'DENY'
 
+# ----------------------------
+# MARKET DATA
+# ----------------------------
+# Upper bound (seconds) on how stale the in-process price snapshot used by
+# the trade and valuation paths may get before it is rebuilt from the DB.
+MARKET_SNAPSHOT_MAX_AGE = config('MARKET_SNAPSHOT_MAX_AGE', default=30, cast=int)
+
+# ----------------------------
+# TRADER COUNTERS
+# ----------------------------
+# Traders at or above this many copiers/subscribers/followers spread counter
+# writes over TRADER_COUNTER_SHARDS rows (folded back by fold_trader_counters).
+TRADER_COUNTER_SHARD_THRESHOLD = config('TRADER_COUNTER_SHARD_THRESHOLD', default=500, cast=int)
+TRADER_COUNTER_SHARDS = config('TRADER_COUNTER_SHARDS', default=16, cast=int)
+
+# ----------------------------
+# REFERENCES
+# ----------------------------
+# Every process leases its own node id (0-1023) from ReferenceNodeLease for
+# this many seconds, renewing it at half-life; a crashed process's id is
+# reused once its lease runs out.
+REFERENCE_NODE_LEASE_SECONDS = config('REFERENCE_NODE_LEASE_SECONDS', default=600, cast=int)
+
+# ----------------------------
+# SEARCH
+# ----------------------------
+# auto | postgres | sqlite_fts | basic. "auto" picks the full-text backend
+# matching the database (tsvector + GIN on Postgres, FTS5 on SQLite).
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='auto')
+
+# ----------------------------
+# BACKGROUND TASKS & DEFERRED MEDIA UPLOADS
+# ----------------------------
+# Run app.background tasks inline instead of on the worker thread (tests, scripts).
+BACKGROUND_TASKS_EAGER = config('BACKGROUND_TASKS_EAGER', default=False, cast=bool)
+
+# When on, CloudinaryField uploads are written to MEDIA_ROOT/pending-upload
+# inside the request and pushed to MEDIA_REMOTE_STORE by the background worker
+# (cloudinary | local_fake). Leftovers are retried by retry_media_uploads.
+MEDIA_DEFERRED_UPLOADS = config('MEDIA_DEFERRED_UPLOADS', default=False, cast=bool)
+MEDIA_REMOTE_STORE = config('MEDIA_REMOTE_STORE', default='cloudinary')
+MEDIA_UPLOAD_MAX_ATTEMPTS = config('MEDIA_UPLOAD_MAX_ATTEMPTS', default=5, cast=int)
+
+# ----------------------------
+# TOKEN REVOCATION
+# ----------------------------
+# blacklist | epoch | dual (see app.revocation).
+# blacklist: every issued/rotated refresh token is recorded and blacklisted.
+# epoch: tokens carry the user's token_epoch; logout and password changes bump
+#   it, nothing is written per token. With a shared cache (Redis, Memcached,
+#   database) epochs are cached for TOKEN_EPOCH_CACHE_TIMEOUT seconds; with the
+#   per-process default they are read from the database on every check.
+# Migration: run "dual" for one REFRESH_TOKEN_LIFETIME so every live token
+# carries the claim, switch to "epoch", then prune_tokens empties the tables.
+TOKEN_REVOCATION_MODE = config('TOKEN_REVOCATION_MODE', default='blacklist')
+TOKEN_EPOCH_CACHE_TIMEOUT = config('TOKEN_EPOCH_CACHE_TIMEOUT', default=300, cast=int)
+
+# ----------------------------
+# GARBAGE COLLECTION (manage.py gc)
+# ----------------------------
+# Collectors delete GC_BATCH_SIZE primary keys per transaction and pause
+# GC_BATCH_SLEEP seconds between batches.
+GC_BATCH_SIZE = config('GC_BATCH_SIZE', default=1000, cast=int)
+GC_BATCH_SLEEP = config('GC_BATCH_SLEEP', default=0.1, cast=float)
+# Read notifications older than this move to the compressed NotificationArchive
+# (gc read_notifications); the API reads the archive on deep pagination.
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int)
+
+# ----------------------------
+# ACCOUNT IDENTIFIERS
+# ----------------------------
+# New users' account_id / referral_code come from a sequence reserved in
+# blocks of ACCOUNT_ID_BLOCK_SIZE and scrambled with ACCOUNT_ID_SECRET
+# (defaults to SECRET_KEY). Keep the secret fixed once accounts exist.
+ACCOUNT_ID_BLOCK_SIZE = config('ACCOUNT_ID_BLOCK_SIZE', default=100, cast=int)
+ACCOUNT_ID_SECRET = config('ACCOUNT_ID_SECRET', default='')
+
+# ----------------------------
+# RATE LIMITING
+# ----------------------------
+# Where app.throttling keeps its token buckets: database (RateLimitBucket,
+# shared by all processes) or memory (per process).
+THROTTLE_STORE = config('THROTTLE_STORE', default='database')
+
+# ----------------------------
+# REQUEST COALESCING
+# ----------------------------
+# Concurrent identical reads (trader_detail, news_detail misses) share one
+# computation per process (app.singleflight). SINGLEFLIGHT_LOCK_ROWS also
+# coalesces cached reads across processes through a SingleFlightLock row
+# (only with a shared CACHES backend; ignored with the per-process default);
+# waiters poll the cache every SINGLEFLIGHT_POLL_INTERVAL seconds and give
+# up after SINGLEFLIGHT_WAIT seconds.
+SINGLEFLIGHT_LOCK_ROWS = config('SINGLEFLIGHT_LOCK_ROWS', default=False, cast=bool)
+SINGLEFLIGHT_WAIT = config('SINGLEFLIGHT_WAIT', default=10.0, cast=float)
+SINGLEFLIGHT_POLL_INTERVAL = config('SINGLEFLIGHT_POLL_INTERVAL', default=0.05, cast=float)
+
+# ----------------------------
+# RESPONSE COMPRESSION
+# ----------------------------
+# CompressionMiddleware answers with brotli (when the brotli package is
+# installed) or gzip, whichever the client prefers, for text/JSON bodies of
+# at least COMPRESSION_MIN_SIZE bytes.
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+
+# ----------------------------
+# PASSWORD HASHING
+# ----------------------------
+# Login, registration and password changes hash on app.hashing's executor:
+# HASHING_WORKERS processes per web worker (0 = on the request thread), at
+# most HASHING_MAX_PENDING hashes running or queued per web worker. Requests
+# that wait HASHING_QUEUE_TIMEOUT seconds for a slot get a 503.
+HASHING_WORKERS = config('HASHING_WORKERS', default=0, cast=int)
+HASHING_MAX_PENDING = config('HASHING_MAX_PENDING', default=8, cast=int)
+HASHING_QUEUE_TIMEOUT = config('HASHING_QUEUE_TIMEOUT', default=2.0, cast=float)
+
+# ----------------------------
+# IMAGE PIPELINE
+# ----------------------------
+# When on, uploaded images get WebP/AVIF derivatives at IMAGE_VARIANT_WIDTHS
+# and a blurhash placeholder on the background worker (app.images). Staged
+# uploads are also re-oriented, stripped of metadata and capped at
+# IMAGE_MAX_DIMENSION before being pushed.
+IMAGE_PIPELINE = config('IMAGE_PIPELINE', default=False, cast=bool)
+IMAGE_VARIANT_WIDTHS = config('IMAGE_VARIANT_WIDTHS', default='320,640,1280',
+                              cast=lambda v: [int(w) for w in v.split(',') if w.strip()])
+IMAGE_VARIANT_FORMATS = config('IMAGE_VARIANT_FORMATS', default='webp,avif',
+                               cast=lambda v: [f.strip().lower() for f in v.split(',') if f.strip()])
+IMAGE_MAX_DIMENSION = config('IMAGE_MAX_DIMENSION', default=2048, cast=int)
+IMAGE_QUALITY = config('IMAGE_QUALITY', default=80, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -44,6 +44,7 @@ from app.views import (
 
 from app.copy_trading_views import (
     list_traders,
+    trader_leaderboard,
     trader_detail,
     copy_trader_action,
     copy_trader_status,
@@ -65,6 +66,7 @@ from app.referral_views import (
 from app.notification_views import (
     list_notifications,
     mark_notification_read,
+    mark_broadcast_read,
     mark_all_notifications_read,
     get_recent_notifications,
 )
@@ -89,6 +91,9 @@ from app.stock_views import (
     stock_detail,
     buy_stock,
     sell_stock,
+    place_order,
+    list_orders,
+    cancel_order,
     user_positions,
 )
 from app.settings_views import (
@@ -97,6 +102,12 @@ from app.settings_views import (
     change_password,
     update_payment_method,
 )
+from app.statement_views import (
+    get_statement,
+)
+from app.search_views import (
+    site_search,
+)
 from app.transfer_views import (
     transfer_info,
     make_transfer,
@@ -178,6 +189,7 @@ urlpatterns = [
 
     # Copy Trading
     path('api/auth/traders/', list_traders, name='list-traders'),
+    path('api/auth/traders/leaderboard/', trader_leaderboard, name='trader-leaderboard'),
     path('api/auth/traders/<int:trader_id>/', trader_detail, name='trader-detail'),
     path('api/auth/copy-trader/action/', copy_trader_action, name='copy-trader-action'),
     path('api/auth/copy-trader/status/<int:trader_id>/', copy_trader_status, name='copy-trader-status'),
@@ -200,6 +212,7 @@ urlpatterns = [
     path('api/auth/notifications/', list_notifications, name='list-notifications'),
     path('api/auth/notifications/recent/', get_recent_notifications, name='recent-notifications'),
     path('api/auth/notifications/<int:notification_id>/mark-read/', mark_notification_read, name='mark-notification-read'),
+    path('api/auth/notifications/broadcast/<int:broadcast_id>/mark-read/', mark_broadcast_read, name='mark-broadcast-read'),
     path('api/auth/notifications/mark-all-read/', mark_all_notifications_read, name='mark-all-notifications-read'),
 
     # Signals
@@ -223,6 +236,9 @@ urlpatterns = [
     path('api/auth/stocks/buy/', buy_stock, name='buy-stock'),
     path('api/auth/stocks/sell/', sell_stock, name='sell-stock'),
     path('api/auth/stocks/positions/', user_positions, name='user-positions'),
+    path('api/auth/stocks/orders/', list_orders, name='list-stock-orders'),
+    path('api/auth/stocks/orders/place/', place_order, name='place-stock-order'),
+    path('api/auth/stocks/orders/<int:order_id>/cancel/', cancel_order, name='cancel-stock-order'),
     path('api/auth/stocks/<str:symbol>/', stock_detail, name='stock-detail'),
 
     # Settings
@@ -235,6 +251,12 @@ urlpatterns = [
     path('api/auth/transfer/info/', transfer_info, name='transfer-info'),
     path('api/auth/transfer/', make_transfer, name='make-transfer'),
 
+    # Statements
+    path('api/auth/statements/', get_statement, name='account-statement'),
+
+    # Search
+    path('api/auth/search/', site_search, name='site-search'),
+
     # Cards
     path('api/auth/cards/', list_cards, name='list-cards'),
     path('api/auth/cards/add/', add_card, name='add-card'),
@@ -247,4 +269,16 @@ urlpatterns = [
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
-
+# Locally staged uploads, served until the background push to Cloudinary lands
+if settings.MEDIA_DEFERRED_UPLOADS:
+    from app.media_views import serve_pending_media
+    from app.tiered_storage import PENDING_PREFIX
+
+    # AppendSlashMiddleware adds the trailing slash to every path
+    urlpatterns += [
+        path(
+            f"{settings.MEDIA_URL.lstrip('/')}{PENDING_PREFIX}<str:name>/",
+            serve_pending_media,
+            name='serve-pending-media',
+        ),
+    ]